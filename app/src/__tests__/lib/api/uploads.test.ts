@@ -0,0 +1,123 @@
+import { beforeEach, describe, expect, it, vi } from 'vitest'
+import { uploadMultipart } from '@/lib/api/uploads'
+
+vi.mock('@/lib/utils/fetch', () => ({
+	getFetchOptions: vi.fn(async (method: string, body?: Record<string, unknown>) => ({
+		method,
+		body,
+		headers: { 'X-CSRFToken': 'test-token' },
+	})),
+}))
+
+const fetchMock = vi.fn()
+
+const response = (body: unknown, ok = true) =>
+	Promise.resolve({
+		ok,
+		status: ok ? 200 : 404,
+		json: () => Promise.resolve(body),
+	} as Response)
+
+const upload = {
+	upload_token: 'token-1',
+	file_path: 'post/audio/1/clip.mp4',
+	part_size: 4,
+	part_count: 3,
+}
+
+// 10 bytes in parts of 4: two full parts and a 2 byte tail.
+const makeFile = () => new File(['0123456789'], 'clip.mp4', { type: 'video/mp4', lastModified: 1 })
+
+const resumeKey = 'multipart-upload:clip.mp4:10:1'
+
+const mockServer = (uploadedParts: { part_number: number; size: number }[] | null = null) => {
+	fetchMock.mockImplementation((url: string, init?: RequestInit) => {
+		const body = init?.body as unknown as Record<string, unknown>
+		switch (url) {
+			case '/api/uploads/multipart/':
+				return response(upload)
+			case '/api/uploads/multipart/list/':
+				return uploadedParts ? response({ parts: uploadedParts }) : response({}, false)
+			case '/api/uploads/multipart/parts/': {
+				const numbers = body.part_numbers as number[]
+				return response({
+					urls: Object.fromEntries(numbers.map((number) => [number, `https://r2/part-${number}`])),
+				})
+			}
+			case '/api/uploads/multipart/complete/':
+				return response({ file_path: upload.file_path })
+			default:
+				return response({})
+		}
+	})
+}
+
+const calledUrls = () => fetchMock.mock.calls.map(([url]) => url as string)
+
+describe('uploads API', () => {
+	beforeEach(() => {
+		vi.clearAllMocks()
+		localStorage.clear()
+		globalThis.fetch = fetchMock
+		fetchMock.mockReset()
+	})
+
+	it('uploads every part and completes the upload', async () => {
+		mockServer()
+		const progress = vi.fn()
+
+		const filePath = await uploadMultipart(makeFile(), progress)
+
+		expect(filePath).toBe(upload.file_path)
+		const puts = fetchMock.mock.calls.filter(([, init]) => init?.method === 'PUT')
+		expect(puts.map(([url]) => url).sort()).toEqual([
+			'https://r2/part-1',
+			'https://r2/part-2',
+			'https://r2/part-3',
+		])
+		expect(puts.map(([, init]) => (init.body as Blob).size).sort()).toEqual([2, 4, 4])
+		expect(calledUrls().at(-1)).toBe('/api/uploads/multipart/complete/')
+		expect(progress).toHaveBeenLastCalledWith(10)
+		expect(localStorage.getItem(resumeKey)).toBeNull()
+	})
+
+	it('resumes a stored upload and sends only the missing parts', async () => {
+		localStorage.setItem(resumeKey, JSON.stringify(upload))
+		mockServer([{ part_number: 1, size: 4 }])
+
+		await uploadMultipart(makeFile())
+
+		expect(calledUrls()).not.toContain('/api/uploads/multipart/')
+		const puts = fetchMock.mock.calls.filter(([, init]) => init?.method === 'PUT')
+		expect(puts.map(([url]) => url).sort()).toEqual(['https://r2/part-2', 'https://r2/part-3'])
+	})
+
+	it('starts over when the stored upload no longer exists', async () => {
+		localStorage.setItem(resumeKey, JSON.stringify(upload))
+		mockServer(null)
+
+		await uploadMultipart(makeFile())
+
+		expect(calledUrls().slice(0, 2)).toEqual([
+			'/api/uploads/multipart/list/',
+			'/api/uploads/multipart/',
+		])
+	})
+
+	it('keeps the resume state when a part fails', async () => {
+		vi.useFakeTimers()
+		mockServer()
+		const server = fetchMock.getMockImplementation()
+		fetchMock.mockImplementation((url: string, init?: RequestInit) =>
+			url.startsWith('https://r2/') ? Promise.reject(new Error('offline')) : server?.(url, init)
+		)
+
+		const result = uploadMultipart(makeFile())
+		const assertion = expect(result).rejects.toThrow('offline')
+		await vi.runAllTimersAsync()
+		await assertion
+
+		expect(JSON.parse(localStorage.getItem(resumeKey) ?? 'null')).toEqual(upload)
+		vi.useRealTimers()
+	})
+})
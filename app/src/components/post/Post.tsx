@@ -109,7 +109,7 @@ export const Post: React.FC<PostProps> = ({
 	const imageDisplayUrl =
 		post.media?.media_type === 'image' && post.media.thumbnail ? post.media.thumbnail : mediaUrl
 	const mimeType = post.media
-		? getMimeTypeFromPath(post.media.file || post.media.s3_file_key)
+		? post.media.mime_type || getMimeTypeFromPath(post.media.file || post.media.s3_file_key)
 		: undefined
 	const mediaDuration = post.media ? parseDurationString(post.media.duration) : undefined
 
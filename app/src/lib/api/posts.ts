@@ -7,6 +7,7 @@ import type {
 } from '../../types/post'
 import { SERVER_API_URL, UPLOAD_FILES_TO_S3 } from '../constants'
 import { getFetchOptions } from '../utils/fetch'
+import { MULTIPART_UPLOAD_THRESHOLD, uploadMultipart } from './uploads'
 
 export interface PostsPage {
 	posts: Post[]
@@ -109,6 +110,34 @@ export const getPost = async (id: number): Promise<Post> => {
 	}
 }
 
+const uploadWithPresignedPut = async (file: File): Promise<string> => {
+	// Get presigned url from backend
+	const options = await getFetchOptions('POST', {
+		file_name: file.name,
+		content_type: file.type,
+	})
+	const response = await fetch(`${SERVER_API_URL}/uploads/presign/`, options)
+	if (!response.ok) {
+		throw new Error('Failed to get an upload URL')
+	}
+	const presignedUrl = (await response.json()) as { url: string; file_path: string }
+
+	// upload file to s3
+	// NOTE: Must edit CORS settings for the bucket, refer to project's server/config/s3-cors.json
+	// https://dash.cloudflare.com/<ACCOUNT_ID>/r2/default/buckets/<bucket_name>/cors/edit
+	const uploadResponse = await fetch(presignedUrl.url, {
+		method: 'PUT',
+		headers: {
+			'Content-Type': file.type,
+		},
+		body: file,
+	})
+	if (!uploadResponse.ok) {
+		throw new Error('Failed to upload media')
+	}
+	return presignedUrl.file_path
+}
+
 export const createPost = async (data: CreatePostRequest): Promise<Post> => {
 	try {
 		let response: Response
@@ -134,34 +163,17 @@ export const createPost = async (data: CreatePostRequest): Promise<Post> => {
 
 		// Check environment variable to see if we upload to S3 cloud-compatible storage or local storage
 		if (data.media && UPLOAD_FILES_TO_S3) {
-			// Get presigned url from backend
-			const options = await getFetchOptions('POST', {
-				file_name: data.media.name,
-				content_type: data.media.type,
-			})
-			response = await fetch(`${SERVER_API_URL}/uploads/presign/`, options)
-			if (!response.ok) {
-				throw new Error('Failed to get an upload URL')
-			}
-			const presignedUrl = (await response.json()) as { url: string; file_path: string }
-
-			// upload file to s3
-			// NOTE: Must edit CORS settings for the bucket, refer to project's server/config/s3-cors.json
-			// https://dash.cloudflare.com/<ACCOUNT_ID>/r2/default/buckets/<bucket_name>/cors/edit
-			const uploadResponse = await fetch(presignedUrl.url, {
-				method: 'PUT',
-				headers: {
-					'Content-Type': data.media.type,
-				},
-				body: data.media,
-			})
-			if (!uploadResponse.ok) {
-				throw new Error('Failed to upload media')
+			let filePath: string
+			if (data.media.size > MULTIPART_UPLOAD_THRESHOLD) {
+				// Large files upload in parallel parts and resume after interruptions
+				filePath = await uploadMultipart(data.media)
+			} else {
+				filePath = await uploadWithPresignedPut(data.media)
 			}
 
 			// create post with file url
 			formData.append('media_type', data.media_type || 'audio')
-			formData.append('s3_file_key', presignedUrl.file_path)
+			formData.append('s3_file_key', filePath)
 			const postOptions = await getFetchOptions('POST', formData)
 
 			response = await fetch(`${SERVER_API_URL}/posts/`, postOptions)
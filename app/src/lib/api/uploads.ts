@@ -0,0 +1,185 @@
+import { SERVER_API_URL } from '../constants'
+import { getFetchOptions } from '../utils/fetch'
+
+// Files above this size are sent as parallel, resumable multipart uploads
+// instead of one presigned PUT.
+export const MULTIPART_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+
+const PART_CONCURRENCY = 4
+const PART_ATTEMPTS = 4
+const SIGN_BATCH_SIZE = 100
+const RESUME_KEY_PREFIX = 'multipart-upload:'
+
+interface MultipartUpload {
+	upload_token: string
+	file_path: string
+	part_size: number
+	part_count: number
+}
+
+const MULTIPART_URL = `${SERVER_API_URL}/uploads/multipart`
+
+const postJson = async (path: string, body: Record<string, unknown>) => {
+	const options = await getFetchOptions('POST', body)
+	return fetch(`${MULTIPART_URL}${path}`, options)
+}
+
+// A file picked again after a reload or dropped connection maps to the same key.
+const resumeKey = (file: File) =>
+	`${RESUME_KEY_PREFIX}${file.name}:${file.size}:${file.lastModified}`
+
+const loadResumableUpload = (file: File): MultipartUpload | null => {
+	try {
+		const stored = localStorage.getItem(resumeKey(file))
+		return stored ? (JSON.parse(stored) as MultipartUpload) : null
+	} catch {
+		return null
+	}
+}
+
+const saveResumableUpload = (file: File, upload: MultipartUpload | null) => {
+	try {
+		if (upload) {
+			localStorage.setItem(resumeKey(file), JSON.stringify(upload))
+		} else {
+			localStorage.removeItem(resumeKey(file))
+		}
+	} catch {
+		// Resuming is best-effort; private browsing may refuse storage.
+	}
+}
+
+const partSize = (upload: MultipartUpload, file: File, partNumber: number) =>
+	Math.min(upload.part_size, file.size - (partNumber - 1) * upload.part_size)
+
+/** Return the part numbers the store already holds at their expected size. */
+const listUploadedParts = async (
+	upload: MultipartUpload,
+	file: File
+): Promise<Set<number> | null> => {
+	const response = await postJson('/list/', { upload_token: upload.upload_token })
+	if (!response.ok) {
+		return null
+	}
+	const { parts } = (await response.json()) as {
+		parts: { part_number: number; size: number }[]
+	}
+	return new Set(
+		parts
+			.filter((part) => part.size === partSize(upload, file, part.part_number))
+			.map((part) => part.part_number)
+	)
+}
+
+const initiateUpload = async (file: File): Promise<MultipartUpload> => {
+	const response = await postJson('/', {
+		file_name: file.name,
+		content_type: file.type,
+		size: file.size,
+	})
+	if (!response.ok) {
+		throw new Error('Failed to get an upload URL')
+	}
+	return (await response.json()) as MultipartUpload
+}
+
+const signParts = async (
+	upload: MultipartUpload,
+	partNumbers: number[]
+): Promise<Record<string, string>> => {
+	const urls: Record<string, string> = {}
+	for (let start = 0; start < partNumbers.length; start += SIGN_BATCH_SIZE) {
+		const response = await postJson('/parts/', {
+			upload_token: upload.upload_token,
+			part_numbers: partNumbers.slice(start, start + SIGN_BATCH_SIZE),
+		})
+		if (!response.ok) {
+			throw new Error('Failed to get an upload URL')
+		}
+		Object.assign(urls, ((await response.json()) as { urls: Record<string, string> }).urls)
+	}
+	return urls
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+const uploadPart = async (
+	upload: MultipartUpload,
+	file: File,
+	partNumber: number,
+	urls: Record<string, string>
+) => {
+	const start = (partNumber - 1) * upload.part_size
+	const body = file.slice(start, start + upload.part_size)
+	for (let attempt = 1; ; attempt++) {
+		try {
+			const response = await fetch(urls[partNumber], { method: 'PUT', body })
+			if (response.ok) {
+				return
+			}
+			if (response.status === 403) {
+				// The presigned URL expired while queued; sign this part again.
+				Object.assign(urls, await signParts(upload, [partNumber]))
+			}
+		} catch (error) {
+			if (attempt >= PART_ATTEMPTS) {
+				throw error
+			}
+		}
+		if (attempt >= PART_ATTEMPTS) {
+			throw new Error('Failed to upload media')
+		}
+		await sleep(500 * 2 ** attempt)
+	}
+}
+
+/**
+ * Upload a large file as parallel multipart parts and return its object key.
+ *
+ * Progress is kept in localStorage, so picking the same file again after an
+ * interruption re-sends only the parts the store does not already have.
+ */
+export const uploadMultipart = async (
+	file: File,
+	onProgress?: (uploadedBytes: number) => void
+): Promise<string> => {
+	let upload = loadResumableUpload(file)
+	let uploaded = upload ? await listUploadedParts(upload, file) : null
+	if (!upload || !uploaded) {
+		upload = await initiateUpload(file)
+		uploaded = new Set()
+		saveResumableUpload(file, upload)
+	}
+	const current = upload
+
+	let uploadedBytes = 0
+	for (const partNumber of uploaded) {
+		uploadedBytes += partSize(current, file, partNumber)
+	}
+	onProgress?.(uploadedBytes)
+
+	const pending: number[] = []
+	for (let partNumber = 1; partNumber <= current.part_count; partNumber++) {
+		if (!uploaded.has(partNumber)) {
+			pending.push(partNumber)
+		}
+	}
+	const urls = await signParts(current, pending)
+
+	const queue = [...pending]
+	const worker = async () => {
+		for (let partNumber = queue.shift(); partNumber; partNumber = queue.shift()) {
+			await uploadPart(current, file, partNumber, urls)
+			uploadedBytes += partSize(current, file, partNumber)
+			onProgress?.(uploadedBytes)
+		}
+	}
+	await Promise.all(Array.from({ length: Math.min(PART_CONCURRENCY, queue.length) }, worker))
+
+	const response = await postJson('/complete/', { upload_token: current.upload_token })
+	if (!response.ok) {
+		throw new Error('Failed to upload media')
+	}
+	saveResumableUpload(file, null)
+	return ((await response.json()) as { file_path: string }).file_path
+}
@@ -21,6 +21,10 @@ export interface Media {
 	transcript?: string
 	transcript_status?: '' | 'pending' | 'done' | 'error'
 	alt_text?: string
+	mime_type?: string
+	size?: number | null
+	width?: number | null
+	height?: number | null
 	created: Date
 	modified: Date
 }
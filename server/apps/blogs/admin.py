@@ -1,8 +1,12 @@
 """Admin registrations for blog posts and media."""
 
+from functools import partial
+
 from django.contrib import admin
+from django.db import transaction
 
-from .models import Media, Post
+from .models import Media, Post, StorageDeletion
+from .tasks import process_post_media
 
 
 @admin.register(Media)
@@ -13,6 +17,8 @@ class MediaAdmin(admin.ModelAdmin):
         'id',
         'file',
         'media_type',
+        'mime_type',
+        'size',
         'duration',
         'created',
         'modified',
@@ -20,8 +26,19 @@ class MediaAdmin(admin.ModelAdmin):
     readonly_fields = (
         'created',
         'modified',
+        'mime_type',
+        'size',
+        'width',
+        'height',
+        'sha256',
     )
 
+    def save_model(self, request, obj, form, change):
+        """Save the media and queue processing when a new file was uploaded."""
+        super().save_model(request, obj, form, change)
+        if 'file' in form.changed_data and obj.file:
+            transaction.on_commit(partial(process_post_media.enqueue, obj.pk))
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -33,12 +50,19 @@ class PostAdmin(admin.ModelAdmin):
         'head',
         'get_media_type',
         'get_media_duration',
+        'like_count',
+        'comment_count',
+        'view_count',
         'created',
         'modified',
     )
     readonly_fields = (
         'created',
         'modified',
+        # Maintained by Like/Comment/PostView writes and reconcile_post_counts.
+        'like_count',
+        'comment_count',
+        'view_count',
     )
 
     def get_media_type(self, obj):
@@ -52,3 +76,12 @@ class PostAdmin(admin.ModelAdmin):
         return obj.media.duration if obj.media else '-'
 
     get_media_duration.short_description = 'Media Duration'  # pyright: ignore [reportFunctionMemberAccess]
+
+
+@admin.register(StorageDeletion)
+class StorageDeletionAdmin(admin.ModelAdmin):
+    """Admin view of stored files queued for deletion, mainly to spot failures."""
+
+    list_display = ('id', 'target', 'name', 'attempts', 'last_error', 'created')
+    list_filter = ('target',)
+    readonly_fields = ('created', 'target', 'name', 'attempts', 'last_error')
@@ -1,21 +1,46 @@
 """URL extraction and server-side metadata fetching for post link previews."""
 
+import asyncio
+import codecs
+import contextlib
 import html
 import ipaddress
 import logging
 import re
 import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from contextvars import ContextVar
 from datetime import UTC, date, datetime, timedelta
 from html.parser import HTMLParser
 from io import BytesIO
-from urllib.parse import parse_qs, quote, urljoin, urlparse
-
+from urllib.parse import (
+    parse_qs,
+    parse_qsl,
+    quote,
+    urlencode,
+    urljoin,
+    urlparse,
+    urlsplit,
+    urlunsplit,
+)
+
+import httpcore
 import httpx
+from django.core.cache import cache, caches
 from django.core.files.base import ContentFile
 from django.utils import timezone
 from PIL import Image
 
-from .models import LinkPreview
+from .models import (
+    SHARED_PREVIEW_IMAGE_DIR,
+    LinkPreview,
+    LinkPreviewContent,
+    Post,
+    queue_storage_deletions,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +49,62 @@ FETCH_TIMEOUT = 8.0
 MAX_HTML_BYTES = 2_000_000
 MAX_IMAGE_BYTES = 5_000_000
 MAX_REDIRECTS = 5
+# Outbound requests in flight at once for one batch of previews, overall and
+# per host, so a post full of links to one site does not hammer it.
+MAX_CONCURRENT_FETCHES = 8
+MAX_CONCURRENT_FETCHES_PER_HOST = 2
+# The system resolver does not report record TTLs, so resolved addresses
+# are reused for this many seconds; short enough to follow DNS changes.
+DNS_CACHE_TTL = 60.0
+# Politeness toward each host: a burst of HOST_BURST requests, then
+# HOST_REQUESTS_PER_SECOND, shared by every batch in the process.
+HOST_REQUESTS_PER_SECOND = 2.0
+HOST_BURST = 4
+# After this many consecutive failures (429, 5xx, network errors) a host's
+# circuit breaker opens, and requests to it are refused instead of each
+# waiting out FETCH_TIMEOUT. A Retry-After header can lengthen the cooldown
+# up to BREAKER_MAX_COOLDOWN_SECONDS.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 120
+BREAKER_MAX_COOLDOWN_SECONDS = 15 * 60
+# A failure streak is forgotten this long after it started. Hosts with one
+# are listed for host_metrics, keeping at most BREAKER_MAX_TRACKED_HOSTS.
+BREAKER_STATE_TTL = 24 * 60 * 60
+BREAKER_MAX_TRACKED_HOSTS = 500
+BREAKER_HOSTS_CACHE_KEY = 'link-preview-breaker-hosts'
+# The cache alias holding breaker state, shared by every worker process.
+BREAKER_CACHE = 'link_preview_breakers'
+# How long fetched preview content is reused across posts before the URL is
+# fetched again; failures are remembered for a shorter time.
+PREVIEW_CONTENT_TTL = timedelta(days=1)
+PREVIEW_FAILURE_TTL = timedelta(hours=1)
+# Everything fetch_previews may change on a preview row.
+PREVIEW_UPDATE_FIELDS = [
+    'kind',
+    'status',
+    'title',
+    'description',
+    'site_name',
+    'author_name',
+    'author_handle',
+    'embed_id',
+    'extra',
+    'published_at',
+    'image',
+    'fetched_at',
+    'fetch_attempts',
+    'modified',
+]
+# Hacker News items are cached in two parts: the score and comment count,
+# which move while a thread is live, for HACKERNEWS_LIVE_TTL seconds, and
+# the rest (type, parent, author, title, text), which is settled once
+# posted, for HACKERNEWS_ITEM_TTL seconds. The story a comment belongs to is
+# cached as long, so comments in a thread already walked skip the walk.
+HACKERNEWS_ITEM_URL = 'https://hacker-news.firebaseio.com/v0/item/{}.json'
+HACKERNEWS_ITEM_TTL = 7 * 24 * 60 * 60
+HACKERNEWS_LIVE_TTL = 5 * 60
+HACKERNEWS_LIVE_FIELDS = ('score', 'descendants')
+HACKERNEWS_MAX_PARENT_HOPS = 8
 USER_AGENT = 'webframework-linkpreview/1.0 (+https://github.com/tam/webframework)'
 
 URL_RE = re.compile(r'(?:https?://|www\.)[^\s<>"\']+', re.IGNORECASE)
@@ -34,6 +115,22 @@ CHATGPT_SHARE_RE = re.compile(r'^/share/(?:e/)?([0-9a-fA-F-]{8,})/?$')
 TWEET_DATE_RE = re.compile(r'>\s*([A-Z][a-z]+ \d{1,2}, \d{4})\s*</a>\s*</blockquote>')
 TWITTER_SNOWFLAKE_EPOCH_MS = 1288834974657
 REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Returned by page fetchers when a conditional request finds the page unchanged.
+NOT_MODIFIED: dict[str, object] = {'not_modified': True}
+# Patterns searched in streamed HTML must match within this many characters.
+PATTERN_OVERLAP = 1024
+# The watch page embeds its player response as JSON, with or without
+# escaped slashes; both sit in the body, well after the head.
+YOUTUBE_HANDLE_RE = re.compile(r'"ownerProfileUrl":"https?:\\?/\\?/www\.youtube\.com\\?/@([^"]+)"')
+YOUTUBE_PUBLISH_DATE_RE = re.compile(r'"publishDate":"([^"]+)"')
+# Generic previews can stop reading early once every field they use is found.
+GENERIC_META_KEYS = (
+    'og:title',
+    'og:description',
+    'og:image',
+    'og:site_name',
+    'article:published_time',
+)
 
 
 class MetadataParser(HTMLParser):
@@ -44,11 +141,15 @@ class MetadataParser(HTMLParser):
         super().__init__(convert_charrefs=True)
         self.meta: dict[str, str] = {}
         self.title_parts: list[str] = []
+        self.head_closed = False
         self._in_title = False
 
     def handle_starttag(self, tag, attrs):
         """Record title/meta tag openings."""
         attrs_dict = {name.lower(): value for name, value in attrs if value is not None}
+        if tag.lower() == 'body':
+            self.head_closed = True
+            return
         if tag.lower() == 'title':
             self._in_title = True
             return
@@ -62,9 +163,11 @@ class MetadataParser(HTMLParser):
             self.meta[key.lower()] = content.strip()
 
     def handle_endtag(self, tag):
-        """Record title tag closings."""
+        """Record title and head tag closings."""
         if tag.lower() == 'title':
             self._in_title = False
+        elif tag.lower() == 'head':
+            self.head_closed = True
 
     def handle_data(self, data):
         """Collect text inside the title tag."""
@@ -240,88 +343,534 @@ def _url_is_safe(url: str) -> bool:
     hostname = parsed.hostname
     if not hostname:
         return False
+    return _vetted_addresses(hostname) is not None
+
+
+class DnsCache:
+    """Addresses resolved per hostname, reused for DNS_CACHE_TTL seconds."""
+
+    def __init__(self):
+        """Start with an empty cache."""
+        self._entries: dict[str, tuple[float, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, hostname: str) -> list[str]:
+        """Return the addresses hostname resolves to, raising OSError on failure."""
+        hostname = hostname.lower().rstrip('.')
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(hostname)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        infos = socket.getaddrinfo(hostname, 443, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[hostname] = (now + DNS_CACHE_TTL, addresses)
+        return addresses
+
+    def clear(self):
+        """Forget every cached hostname."""
+        with self._lock:
+            self._entries.clear()
+
+
+dns_cache = DnsCache()
+
 
+def _vetted_addresses(hostname: str) -> list[str] | None:
+    """Return the addresses hostname may be reached at, or None if any is unsafe.
+
+    Blocks on DNS when the cache has no fresh entry for hostname.
+    """
     try:
-        return _address_is_safe(hostname)
+        return [hostname] if _address_is_safe(hostname) else None
     except ValueError:
         pass
 
     try:
-        addresses = socket.getaddrinfo(hostname, port or 443, type=socket.SOCK_STREAM)
-    except OSError:
-        return False
+        addresses = dns_cache.resolve(hostname)
+    except (OSError, UnicodeError):
+        return None
+    try:
+        if not addresses or not all(_address_is_safe(address) for address in addresses):
+            return None
+    except (TypeError, ValueError):
+        return None
+    return addresses
 
-    for address in addresses:
-        try:
-            ip_address = address[4][0]
-        except (IndexError, TypeError):
-            return False
-        try:
-            if not _address_is_safe(ip_address):
-                return False
-        except ValueError:
-            return False
 
-    return True
+class PinnedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """Open connections only to the addresses vetted for a hostname.
+
+    httpcore would otherwise resolve the hostname again when it connects,
+    paying for a second lookup and leaving a window in which DNS rebinding
+    swaps in a private address after the check. The vetted addresses come
+    from the same cache the check used. TLS still gets the hostname for SNI
+    and certificate checks, and the Host header comes from the URL.
+    """
+
+    def __init__(self):
+        """Wrap httpcore's asyncio backend."""
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self, host, port, timeout=None, local_address=None, socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        """Connect to the first reachable vetted address for host."""
+        addresses = await asyncio.to_thread(_vetted_addresses, host)
+        if not addresses:
+            raise httpcore.ConnectError(f'Refusing to connect to {host}')
+
+        error = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as connect_error:
+                error = connect_error
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        """Refuse Unix sockets; previews only fetch over TCP."""
+        raise httpcore.ConnectError('Unix sockets are not allowed')
+
+    async def sleep(self, seconds: float) -> None:
+        """Sleep on the wrapped backend."""
+        await self._backend.sleep(seconds)
+
+
+class PinnedTransport(httpx.AsyncHTTPTransport):
+    """An HTTP transport whose connections go through PinnedNetworkBackend."""
+
+    def __init__(self, *, limits: httpx.Limits):
+        """Build the connection pool with the pinned backend."""
+        super().__init__(http2=True, limits=limits)
+        # httpx has no option for the network backend, so replace its pool.
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=True,
+            network_backend=PinnedNetworkBackend(),
+        )
+
+
+class HostUnavailableError(Exception):
+    """Raised instead of requesting a host whose circuit breaker is open."""
+
+    def __init__(self, host: str, retry_at: float):
+        """Record the host and the epoch time its breaker may close."""
+        super().__init__(f'{host} is unavailable until {retry_at:.0f}')
+        self.host = host
+        self.retry_at = retry_at
+
+
+def _breaker_cache_keys(host: str) -> tuple[str, str]:
+    return f'link-preview-breaker:{host}:failures', f'link-preview-breaker:{host}:open-until'
+
+
+def breaker_state(host: str) -> dict[str, float]:
+    """Return a host's consecutive failures and the epoch time its breaker is open until.
+
+    State lives in the BREAKER_CACHE cache, which every worker process
+    shares, so one worker's failures keep the others off the host too.
+    """
+    failures_key, open_until_key = _breaker_cache_keys(host)
+    values = caches[BREAKER_CACHE].get_many([failures_key, open_until_key])
+    return {
+        'failures': values.get(failures_key, 0),
+        'open_until': values.get(open_until_key, 0.0),
+    }
+
+
+def _check_breaker(host: str):
+    """Raise HostUnavailableError while host's breaker is open.
+
+    Once the cooldown passes the breaker is half-open: requests go out, and
+    the first failure opens it again.
+    """
+    open_until = breaker_state(host)['open_until']
+    if open_until > time.time():
+        raise HostUnavailableError(host, open_until)
+
+
+def _record_success(host: str):
+    cache = caches[BREAKER_CACHE]
+    failures_key, open_until_key = _breaker_cache_keys(host)
+    failures = cache.get(failures_key, 0)
+    if failures:
+        if failures >= BREAKER_FAILURE_THRESHOLD:
+            logger.info('Link preview circuit breaker for %s closed', host)
+        cache.delete_many([failures_key, open_until_key])
+        _track_breaker_host(host, failing=False)
+
+
+def _record_failure(host: str, retry_after: float | None = None):
+    # The file cache's incr reads then writes, so two processes failing at
+    # the same moment can lose a count; that only opens the breaker one
+    # failure later.
+    cache = caches[BREAKER_CACHE]
+    failures_key, open_until_key = _breaker_cache_keys(host)
+    cache.add(failures_key, 0, timeout=BREAKER_STATE_TTL)
+    try:
+        failures = cache.incr(failures_key)
+    except ValueError:
+        # The streak expired between add and incr.
+        cache.set(failures_key, 1, timeout=BREAKER_STATE_TTL)
+        failures = 1
+    if failures == 1:
+        _track_breaker_host(host, failing=True)
+
+    if failures >= BREAKER_FAILURE_THRESHOLD:
+        cooldown = min(
+            max(BREAKER_COOLDOWN_SECONDS, retry_after or 0), BREAKER_MAX_COOLDOWN_SECONDS
+        )
+        if cache.get(open_until_key, 0.0) <= time.time():
+            logger.warning(
+                'Link preview circuit breaker for %s opened for %ds after %d failures',
+                host,
+                cooldown,
+                failures,
+            )
+        cache.set(open_until_key, time.time() + cooldown, timeout=BREAKER_STATE_TTL)
+
+
+def _track_breaker_host(host: str, *, failing: bool):
+    """Add host to, or drop it from, the hosts host_metrics lists.
+
+    Hosts whose streak has expired are pruned, and only the
+    BREAKER_MAX_TRACKED_HOSTS most recent are kept.
+    """
+    cache = caches[BREAKER_CACHE]
+    now = time.time()
+    hosts = {
+        name: started
+        for name, started in cache.get(BREAKER_HOSTS_CACHE_KEY, {}).items()
+        if started > now - BREAKER_STATE_TTL and name != host
+    }
+    if failing:
+        hosts[host] = now
+    newest = sorted(hosts.items(), key=lambda item: item[1])[-BREAKER_MAX_TRACKED_HOSTS:]
+    cache.set(BREAKER_HOSTS_CACHE_KEY, dict(newest), timeout=BREAKER_STATE_TTL)
 
 
-def _safe_get(url: str, *, max_bytes: int) -> httpx.Response | None:
-    """Fetch a URL after SSRF checks, returning None for any refusal or failure."""
+def _record_response(host: str, response: httpx.Response):
+    """Count 429 and 5xx responses as failures and anything else as success."""
+    if response.status_code != 429 and response.status_code < 500:
+        _record_success(host)
+        return
     try:
-        current_url = url
-        with httpx.Client(
+        retry_after = float(response.headers.get('retry-after', ''))
+    except ValueError:
+        retry_after = None
+    _record_failure(host, retry_after)
+
+
+class HostScheduler:
+    """Per-host token buckets, plus how many requests wait on each host."""
+
+    def __init__(self):
+        """Start with full buckets."""
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.waiting: Counter[str] = Counter()
+
+    def reserve(self, host: str) -> float:
+        """Take a token for host and return how many seconds to wait before using it.
+
+        Tokens may go negative; each one below zero is a request already
+        scheduled for later, so concurrent callers are spaced out in turn.
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(host, (HOST_BURST, now))
+            tokens = min(HOST_BURST, tokens + (now - updated) * HOST_REQUESTS_PER_SECOND) - 1
+            self._buckets[host] = (tokens, now)
+        return max(0.0, -tokens / HOST_REQUESTS_PER_SECOND)
+
+    def clear(self):
+        """Refill every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+
+host_scheduler = HostScheduler()
+
+
+def host_metrics() -> dict[str, dict[str, object]]:
+    """Return breaker state and requests waiting in this process, per host.
+
+    Covers every host that has failed within the last day or has requests
+    waiting now.
+    """
+    hosts = set(caches[BREAKER_CACHE].get(BREAKER_HOSTS_CACHE_KEY, {})) | {
+        host for host, count in host_scheduler.waiting.items() if count
+    }
+    metrics = {}
+    now = time.time()
+    for host in sorted(hosts):
+        state = breaker_state(host)
+        if state['open_until'] > now:
+            breaker = 'open'
+        elif state['failures'] >= BREAKER_FAILURE_THRESHOLD:
+            breaker = 'half-open'
+        else:
+            breaker = 'closed'
+        metrics[host] = {
+            'breaker': breaker,
+            'failures': state['failures'],
+            'open_until': (
+                datetime.fromtimestamp(state['open_until'], tz=UTC)
+                if state['open_until'] > now
+                else None
+            ),
+            'waiting': host_scheduler.waiting[host],
+        }
+    return metrics
+
+
+class FetchSession:
+    """A pooled HTTP client and the request limits shared by one batch of fetches.
+
+    Every request made while the session is active, including redirects,
+    images, and each hop of the Hacker News parent walk, reuses the client's
+    keep-alive connections instead of paying for new TCP and TLS handshakes.
+    Connections go only to the addresses the SSRF check vetted.
+    """
+
+    def __init__(
+        self,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+        max_concurrency: int = MAX_CONCURRENT_FETCHES,
+    ):
+        """Create the client; transport replaces the network, e.g. in tests."""
+        limits = httpx.Limits(
+            max_connections=max_concurrency,
+            max_keepalive_connections=max_concurrency,
+        )
+        self.client = httpx.AsyncClient(
             follow_redirects=False,
             timeout=FETCH_TIMEOUT,
             headers={'User-Agent': USER_AGENT, 'Accept-Language': 'en'},
-        ) as client:
-            for _redirect_count in range(MAX_REDIRECTS + 1):
-                if not _url_is_safe(current_url):
+            transport=transport or PinnedTransport(limits=limits),
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(MAX_CONCURRENT_FETCHES_PER_HOST))
+        self._token = None
+
+    async def __aenter__(self):
+        """Make this the session _safe_get uses."""
+        self._token = _current_session.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        """Close the pooled connections."""
+        _current_session.reset(self._token)
+        await self.client.aclose()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, host: str):
+        """Wait for a free request slot and a token for host, then hold the slot."""
+        # The host slot comes first so requests queued behind a busy host
+        # do not tie up slots other hosts could use.
+        host_scheduler.waiting[host] += 1
+        queued = True
+        try:
+            async with self._host_slots[host]:
+                await asyncio.sleep(host_scheduler.reserve(host))
+                async with self._slots:
+                    host_scheduler.waiting[host] -= 1
+                    queued = False
+                    yield
+        finally:
+            if queued:
+                host_scheduler.waiting[host] -= 1
+
+
+_current_session: ContextVar[FetchSession] = ContextVar('link_preview_fetch_session')
+
+
+@contextlib.asynccontextmanager
+async def _safe_stream(url: str, headers: dict[str, str] | None = None):
+    """Open a GET for url, with extra headers, after SSRF checks on every redirect hop.
+
+    Yields the final response with its body still unread, or None when a hop
+    is refused, a redirect has no target, or there are too many redirects.
+    Raises HostUnavailableError for a host whose circuit breaker is open, and
+    feeds every response and network error into that host's breaker.
+    Must run inside a FetchSession, whose client and request slots it uses.
+    """
+    session = _current_session.get()
+    current_url = url
+    for _redirect_count in range(MAX_REDIRECTS + 1):
+        # Resolving the hostname blocks, so keep it off the event loop.
+        if not await asyncio.to_thread(_url_is_safe, current_url):
+            break
+
+        host = urlparse(current_url).hostname or ''
+        _check_breaker(host)
+        async with session.slot(host):
+            # The breaker may have opened while this request waited.
+            _check_breaker(host)
+            try:
+                async with session.client.stream('GET', current_url, headers=headers) as response:
+                    _record_response(host, response)
+                    if response.status_code not in REDIRECT_STATUSES:
+                        yield response
+                        return
+                    location = response.headers.get('location')
+                    if not location:
+                        break
+                    current_url = urljoin(str(response.url), location)
+            except httpx.TransportError:
+                _record_failure(host)
+                raise
+
+    yield None
+
+
+async def _safe_get(url: str, *, max_bytes: int) -> httpx.Response | None:
+    """Fetch a URL after SSRF checks, returning None for any refusal or failure.
+
+    HostUnavailableError propagates so the preview can be retried later rather
+    than marked failed.
+    """
+    try:
+        async with _safe_stream(url) as response:
+            if response is None:
+                return None
+
+            content = bytearray()
+            async for chunk in response.aiter_bytes():
+                content.extend(chunk)
+                if len(content) > max_bytes:
                     return None
 
-                with client.stream('GET', current_url) as response:
-                    if response.status_code in REDIRECT_STATUSES:
-                        location = response.headers.get('location')
-                        if not location:
-                            return None
-                        current_url = urljoin(str(response.url), location)
-                        continue
-
-                    content = bytearray()
-                    for chunk in response.iter_bytes():
-                        content.extend(chunk)
-                        if len(content) > max_bytes:
-                            return None
-
-                    # iter_bytes() already decompressed the body, so drop the
-                    # stale encoding headers or the rebuilt response decodes twice.
-                    headers = response.headers.copy()
-                    headers.pop('content-encoding', None)
-                    headers.pop('content-length', None)
-                    return httpx.Response(
-                        status_code=response.status_code,
-                        headers=headers,
-                        content=bytes(content),
-                        request=response.request,
-                    )
+            # aiter_bytes() already decompressed the body, so drop the
+            # stale encoding headers or the rebuilt response decodes twice.
+            headers = response.headers.copy()
+            headers.pop('content-encoding', None)
+            headers.pop('content-length', None)
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=headers,
+                content=bytes(content),
+                request=response.request,
+            )
+    except HostUnavailableError:
+        raise
     except Exception:
         logger.info('Failed to fetch link preview URL %s', url, exc_info=True)
         return None
 
-    return None
-
 
-def _decode_response(response: httpx.Response) -> str:
-    encoding = response.encoding or 'utf-8'
-    try:
-        return response.content.decode(encoding, errors='replace')
-    except LookupError:
-        return response.content.decode('utf-8', errors='replace')
+class HtmlScan:
+    """An HTML page decoded and parsed chunk by chunk as it downloads.
+
+    Regex patterns are searched as text arrives; only the last
+    PATTERN_OVERLAP characters are searched again, so a match may span two
+    chunks as long as it is shorter than that.
+    """
+
+    def __init__(self, url: str, encoding: str | None, patterns: dict[str, re.Pattern]):
+        """Start an empty scan of the page at url."""
+        self.url = url
+        self.parser = MetadataParser()
+        self.matches: dict[str, str] = {}
+        self.not_modified = False
+        self.etag = ''
+        self.last_modified = ''
+        self._patterns = patterns
+        self._parts: list[str] = []
+        self._window = ''
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
 
+    @property
+    def meta(self) -> dict[str, str]:
+        """Return the meta tags parsed so far."""
+        return self.parser.meta
 
-def _parse_html_metadata(text: str) -> MetadataParser:
-    parser = MetadataParser()
-    parser.feed(text)
-    return parser
+    @property
+    def text(self) -> str:
+        """Return the page text decoded so far."""
+        return ''.join(self._parts)
+
+    def feed(self, chunk: bytes):
+        """Decode and parse the next chunk of the body."""
+        text = self._decoder.decode(chunk)
+        self._parts.append(text)
+        self.parser.feed(text)
+
+        self._window = self._window[-PATTERN_OVERLAP:] + text
+        for name, pattern in self._patterns.items():
+            if name not in self.matches and (match := pattern.search(self._window)):
+                self.matches[name] = match.group(1)
+
+    def head_read(self) -> bool:
+        """Return whether the parser has reached the end of the document head."""
+        return self.parser.head_closed
+
+
+async def _scan_html(
+    url: str,
+    *,
+    patterns: dict[str, re.Pattern] | None = None,
+    done=HtmlScan.head_read,
+    max_bytes: int = MAX_HTML_BYTES,
+    validators: dict[str, str] | None = None,
+) -> HtmlScan | None:
+    """Stream an HTML page into an HtmlScan until done(scan) or max_bytes is read.
+
+    Most metadata lives in the head, so by default reading stops there and
+    the rest of the page is never downloaded. With validators (etag and
+    last_modified from an earlier scan) the request is conditional, and an
+    unchanged page comes back as an empty scan with not_modified set.
+    Returns None for refusals, failures, error statuses, and non-HTML
+    responses.
+    """
+    headers = {}
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    try:
+        async with _safe_stream(url, headers) as response:
+            if response is None:
+                return None
+            scan = HtmlScan(str(response.url), response.charset_encoding, patterns or {})
+            if response.status_code == 304 and headers:
+                scan.not_modified = True
+                return scan
+            if response.status_code >= 400:
+                return None
+            if 'text/html' not in response.headers.get('content-type', '').lower():
+                return None
+
+            scan.etag = response.headers.get('etag', '')[:200]
+            scan.last_modified = response.headers.get('last-modified', '')[:64]
+            remaining = max_bytes
+            async for chunk in response.aiter_bytes():
+                scan.feed(chunk[:remaining])
+                remaining -= len(chunk)
+                if remaining <= 0 or done(scan):
+                    break
+            return scan
+    except HostUnavailableError:
+        raise
+    except Exception:
+        logger.info('Failed to fetch link preview URL %s', url, exc_info=True)
+        return None
 
 
 def _parse_iso_date(value: str) -> date | None:
@@ -346,10 +895,18 @@ def _tweet_date_from_snowflake(url: str) -> date | None:
     return datetime.fromtimestamp(milliseconds / 1000, tz=UTC).date()
 
 
-def fetch_youtube(url: str, video_id: str) -> dict[str, object] | None:
+async def fetch_youtube(url: str, video_id: str) -> dict[str, object] | None:
     """Fetch YouTube oEmbed and best-effort page metadata."""
     oembed_url = f'https://www.youtube.com/oembed?url={quote(url, safe="")}&format=json'
-    oembed = _safe_get(oembed_url, max_bytes=MAX_HTML_BYTES)
+    page_url = f'https://www.youtube.com/watch?v={video_id}'
+    oembed, page = await asyncio.gather(
+        _safe_get(oembed_url, max_bytes=MAX_HTML_BYTES),
+        _scan_html(
+            page_url,
+            patterns={'handle': YOUTUBE_HANDLE_RE, 'publish_date': YOUTUBE_PUBLISH_DATE_RE},
+            done=_youtube_scan_done,
+        ),
+    )
     title = ''
     author_name = ''
     thumbnail_url = ''
@@ -367,26 +924,15 @@ def fetch_youtube(url: str, video_id: str) -> dict[str, object] | None:
     author_handle = ''
     page_title = ''
     published_at = None
-    page = _safe_get(f'https://www.youtube.com/watch?v={video_id}', max_bytes=MAX_HTML_BYTES)
-    if page is not None and page.status_code < 400:
-        page_text = _decode_response(page)
-        parser = _parse_html_metadata(page_text)
-        page_title = parser.meta.get('og:title', '')
-        description = parser.meta.get('og:description', '')
-        handle_match = re.search(
-            r'"ownerProfileUrl":"https?://www\.youtube\.com/@([^"]+)"', page_text
-        ) or re.search(
-            r'"ownerProfileUrl":"https?:\\?/\\?/www\.youtube\.com\\?/@([^"]+)"',
-            page_text,
+    if page is not None:
+        page_title = page.meta.get('og:title', '')
+        description = page.meta.get('og:description', '')
+        author_handle = page.matches.get('handle', '')
+        published_raw = (
+            page.meta.get('datepublished')
+            or page.meta.get('uploaddate')
+            or page.matches.get('publish_date', '')
         )
-        if handle_match:
-            author_handle = handle_match.group(1)
-
-        published_raw = parser.meta.get('datepublished') or parser.meta.get('uploaddate') or ''
-        if not published_raw:
-            publish_match = re.search(r'"publishDate":"([^"]+)"', page_text)
-            if publish_match:
-                published_raw = publish_match.group(1)
         published_at = _parse_iso_date(published_raw)
 
     if not title:
@@ -407,13 +953,26 @@ def fetch_youtube(url: str, video_id: str) -> dict[str, object] | None:
     }
 
 
-def fetch_twitter(url: str, handle: str) -> dict[str, object] | None:
+def _youtube_scan_done(scan: HtmlScan) -> bool:
+    """Return whether a watch page scan has every field fetch_youtube reads."""
+    dated = 'publish_date' in scan.matches or any(
+        key in scan.meta for key in ('datepublished', 'uploaddate')
+    )
+    return (
+        'og:title' in scan.meta
+        and 'og:description' in scan.meta
+        and 'handle' in scan.matches
+        and dated
+    )
+
+
+async def fetch_twitter(url: str, handle: str) -> dict[str, object] | None:
     """Fetch Twitter/X oEmbed metadata."""
     oembed_url = (
         f'https://publish.twitter.com/oembed?url={quote(url, safe="")}'
         '&omit_script=true&dnt=true&hide_thread=true&lang=en'
     )
-    response = _safe_get(oembed_url, max_bytes=MAX_HTML_BYTES)
+    response = await _safe_get(oembed_url, max_bytes=MAX_HTML_BYTES)
     if response is None or response.status_code >= 400:
         return None
 
@@ -451,50 +1010,54 @@ def fetch_twitter(url: str, handle: str) -> dict[str, object] | None:
     }
 
 
-def fetch_generic(url: str) -> dict[str, object] | None:
-    """Fetch generic OpenGraph metadata for a page."""
-    response = _safe_get(url, max_bytes=MAX_HTML_BYTES)
-    if response is None or response.status_code >= 400:
+async def fetch_generic(
+    url: str, validators: dict[str, str] | None = None
+) -> dict[str, object] | None:
+    """Fetch generic OpenGraph metadata for a page, or NOT_MODIFIED if validators still hold."""
+    scan = await _scan_html(url, done=_generic_scan_done, validators=validators)
+    if scan is None:
         return None
+    if scan.not_modified:
+        return NOT_MODIFIED
 
-    content_type = response.headers.get('content-type', '')
-    if 'text/html' not in content_type.lower():
-        return None
-
-    parser = _parse_html_metadata(_decode_response(response))
-    title = parser.meta.get('og:title') or parser.meta.get('twitter:title') or parser.title
+    meta = scan.meta
+    title = meta.get('og:title') or meta.get('twitter:title') or scan.parser.title
     description = (
-        parser.meta.get('og:description')
-        or parser.meta.get('twitter:description')
-        or parser.meta.get('description')
+        meta.get('og:description')
+        or meta.get('twitter:description')
+        or meta.get('description')
         or ''
     )
     if not title and not description:
         return None
 
-    image_url = parser.meta.get('og:image') or parser.meta.get('twitter:image') or ''
+    image_url = meta.get('og:image') or meta.get('twitter:image') or ''
     if image_url:
-        image_url = urljoin(str(response.url), image_url)
+        image_url = urljoin(scan.url, image_url)
 
     return {
         'kind': 'generic',
         'title': title,
         'description': description,
-        'site_name': parser.meta.get('og:site_name', ''),
+        'site_name': meta.get('og:site_name', ''),
         'author_name': '',
         'author_handle': '',
         'embed_id': '',
-        'published_at': _parse_iso_date(parser.meta.get('article:published_time', '')),
+        'published_at': _parse_iso_date(meta.get('article:published_time', '')),
         'image_url': image_url,
+        'etag': scan.etag,
+        'last_modified': scan.last_modified,
     }
 
 
-def _fetch_hackernews_item(item_id: object) -> dict[str, object] | None:
-    """Fetch and validate one Hacker News Firebase item."""
-    response = _safe_get(
-        f'https://hacker-news.firebaseio.com/v0/item/{item_id}.json',
-        max_bytes=MAX_HTML_BYTES,
-    )
+def _generic_scan_done(scan: HtmlScan) -> bool:
+    """Return whether a page scan has reached the body or found every OpenGraph field."""
+    return scan.head_read() or all(key in scan.meta for key in GENERIC_META_KEYS)
+
+
+async def _fetch_hackernews_item(item_id: str) -> dict[str, object] | None:
+    """Fetch one Hacker News Firebase item, or None when it is missing or unreadable."""
+    response = await _safe_get(HACKERNEWS_ITEM_URL.format(item_id), max_bytes=MAX_HTML_BYTES)
     if response is None or response.status_code >= 400:
         return None
 
@@ -502,10 +1065,74 @@ def _fetch_hackernews_item(item_id: object) -> dict[str, object] | None:
         item = response.json()
     except ValueError:
         return None
+    return item if isinstance(item, dict) else None
 
-    if not isinstance(item, dict) or item.get('deleted') or item.get('dead'):
-        return None
-    return item
+
+def _cache_hackernews_items(items: dict[str, dict[str, object]]) -> None:
+    """Cache items' settled fields and their live counts under their own TTLs."""
+    cache.set_many(
+        {
+            f'hn-item:{item_id}': {
+                key: value
+                for key, value in item.items()
+                if key not in HACKERNEWS_LIVE_FIELDS and key != 'kids'
+            }
+            for item_id, item in items.items()
+        },
+        timeout=HACKERNEWS_ITEM_TTL,
+    )
+    cache.set_many(
+        {
+            f'hn-item-live:{item_id}': {
+                field: item[field] for field in HACKERNEWS_LIVE_FIELDS if field in item
+            }
+            for item_id, item in items.items()
+            if item.get('type') != 'comment'
+        },
+        timeout=HACKERNEWS_LIVE_TTL,
+    )
+
+
+async def fetch_hackernews_items(
+    item_ids: Iterable[object], *, live: bool = False
+) -> dict[str, dict[str, object]]:
+    """Return the available Hacker News items among item_ids, keyed by id.
+
+    Cached items cost no request and the rest are fetched concurrently, so
+    one call is at most one round trip however many ids it is given. With
+    live, a story's score and comment count must be fresh too. Missing,
+    deleted, and dead items are left out and not cached.
+    """
+    item_ids = list(dict.fromkeys(str(item_id) for item_id in item_ids if item_id))
+    if not item_ids:
+        return {}
+
+    settled = cache.get_many([f'hn-item:{item_id}' for item_id in item_ids])
+    counts = cache.get_many([f'hn-item-live:{item_id}' for item_id in item_ids]) if live else {}
+    items = {}
+    missing = []
+    for item_id in item_ids:
+        item = settled.get(f'hn-item:{item_id}')
+        live_key = f'hn-item-live:{item_id}'
+        if item is None or (live and item.get('type') != 'comment' and live_key not in counts):
+            missing.append(item_id)
+        else:
+            items[item_id] = {**item, **counts.get(live_key, {})}
+
+    results = await asyncio.gather(
+        *(_fetch_hackernews_item(item_id) for item_id in missing), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    fetched = {
+        item_id: item
+        for item_id, item in zip(missing, results, strict=True)
+        if item is not None and not item.get('deleted') and not item.get('dead')
+    }
+    _cache_hackernews_items(fetched)
+    items.update(fetched)
+    return items
 
 
 def _hackernews_published_at(item: dict[str, object]) -> date | None:
@@ -527,25 +1154,51 @@ def _hackernews_integer(item: dict[str, object], key: str) -> int:
         return 0
 
 
-def _hackernews_parent_story_title(parent_id: object) -> str:
-    """Walk up to eight parents and return the enclosing story title when available."""
-    current_parent_id = parent_id
-    for _hop in range(8):
-        if not current_parent_id:
-            return ''
-        parent = _fetch_hackernews_item(current_parent_id)
-        if parent is None:
-            return ''
-        if parent.get('type') == 'story':
-            return str(parent.get('title') or '')
-        current_parent_id = parent.get('parent')
-    return ''
+async def _hackernews_story_titles(parents: dict[str, str]) -> dict[str, str]:
+    """Map comment ids to their parent ids; return each comment's story title, or ''.
+
+    Every thread is walked at once, one batch of ancestors per hop, for up
+    to HACKERNEWS_MAX_PARENT_HOPS hops. Each comment passed on the way is
+    cached as belonging to the story found, so a later walk that reaches
+    any of them jumps straight to the story.
+    """
+    titles = dict.fromkeys(parents, '')
+    current = dict(parents)
+    passed = {comment_id: [comment_id] for comment_id in parents}
+    for _hop in range(HACKERNEWS_MAX_PARENT_HOPS):
+        if not current:
+            break
+        known = cache.get_many([f'hn-story:{item_id}' for item_id in current.values()])
+        current = {
+            comment_id: known.get(f'hn-story:{item_id}', item_id)
+            for comment_id, item_id in current.items()
+        }
+        items = await fetch_hackernews_items(current.values())
+
+        following = {}
+        story_ids = {}
+        for comment_id, item_id in current.items():
+            item = items.get(item_id)
+            if item is None:
+                continue
+            if item.get('type') == 'story':
+                titles[comment_id] = str(item.get('title') or '')
+                story_ids.update(dict.fromkeys(passed[comment_id], item_id))
+            elif item.get('parent'):
+                passed[comment_id].append(item_id)
+                following[comment_id] = str(item['parent'])
+        cache.set_many(
+            {f'hn-story:{item_id}': story_id for item_id, story_id in story_ids.items()},
+            timeout=HACKERNEWS_ITEM_TTL,
+        )
+        current = following
+    return titles
 
 
-def fetch_hackernews(url: str, item_id: str) -> dict[str, object] | None:
-    """Fetch a Hacker News item from the official Firebase API."""
-    del url
-    item = _fetch_hackernews_item(item_id)
+def _hackernews_preview_data(
+    item_id: str, item: dict[str, object] | None, story_title: str
+) -> dict[str, object] | None:
+    """Build preview data for a Hacker News item; story_title is used for comments."""
     if item is None:
         return None
 
@@ -588,7 +1241,7 @@ def fetch_hackernews(url: str, item_id: str) -> dict[str, object] | None:
 
     return {
         'kind': 'hackernews',
-        'title': _hackernews_parent_story_title(item.get('parent')),
+        'title': story_title,
         'description': description,
         'site_name': 'Hacker News',
         'author_name': author_name,
@@ -599,7 +1252,36 @@ def fetch_hackernews(url: str, item_id: str) -> dict[str, object] | None:
     }
 
 
-def fetch_reddit(url: str) -> dict[str, object] | None:
+async def fetch_hackernews_previews(
+    item_ids: list[str],
+) -> dict[str, dict[str, object] | None]:
+    """Fetch preview data for many Hacker News items from the Firebase API, keyed by id.
+
+    The items are fetched as one batch and the comments' parent walks run
+    together, so previews from one busy thread share every request.
+    """
+    items = await fetch_hackernews_items(item_ids, live=True)
+    parents = {
+        item_id: str(item['parent'])
+        for item_id, item in items.items()
+        if item.get('type') == 'comment' and item.get('parent') and item.get('text')
+    }
+    titles = await _hackernews_story_titles(parents)
+    return {
+        str(item_id): _hackernews_preview_data(
+            str(item_id), items.get(str(item_id)), titles.get(str(item_id), '')
+        )
+        for item_id in item_ids
+    }
+
+
+async def fetch_hackernews(url: str, item_id: str) -> dict[str, object] | None:
+    """Fetch a Hacker News item from the official Firebase API."""
+    del url
+    return (await fetch_hackernews_previews([item_id]))[str(item_id)]
+
+
+async def fetch_reddit(url: str) -> dict[str, object] | None:
     """Fetch Reddit post metadata through its unauthenticated oEmbed endpoint."""
     path = urlparse(url).path
     match = REDDIT_POST_RE.match(path)
@@ -608,7 +1290,7 @@ def fetch_reddit(url: str) -> dict[str, object] | None:
 
     canonical = f'https://www.reddit.com{path}'
     oembed_url = f'https://www.reddit.com/oembed?url={quote(canonical, safe="")}'
-    response = _safe_get(oembed_url, max_bytes=MAX_HTML_BYTES)
+    response = await _safe_get(oembed_url, max_bytes=MAX_HTML_BYTES)
     if response is None or response.status_code >= 400:
         return None
 
@@ -674,15 +1356,22 @@ def _chatgpt_published_at(url: str) -> date | None:
     return created_at.date()
 
 
-def fetch_chatgpt(url: str) -> dict[str, object] | None:
+async def fetch_chatgpt(
+    url: str, validators: dict[str, str] | None = None
+) -> dict[str, object] | None:
     """Fetch a ChatGPT share title from the first OpenGraph title tag."""
-    response = _safe_get(url, max_bytes=MAX_HTML_BYTES)
-    if response is None or response.status_code >= 400:
-        return None
-    if 'text/html' not in response.headers.get('content-type', '').lower():
+    # Share pages carry megabytes of script after a head holding the title.
+    scan = await _scan_html(
+        url,
+        done=lambda scan: scan.head_read() or 'og:title' in scan.meta,
+        validators=validators,
+    )
+    if scan is None:
         return None
+    if scan.not_modified:
+        return NOT_MODIFIED
 
-    title = _first_meta_content(_decode_response(response), 'og:title')
+    title = _first_meta_content(scan.text, 'og:title')
     if not title.startswith('ChatGPT - '):
         return None
     title = title.removeprefix('ChatGPT - ').strip()
@@ -699,19 +1388,26 @@ def fetch_chatgpt(url: str) -> dict[str, object] | None:
         'embed_id': '',
         'published_at': _chatgpt_published_at(url),
         'extra': {},
+        'etag': scan.etag,
+        'last_modified': scan.last_modified,
     }
 
 
-def download_preview_image(preview: LinkPreview, image_url: str) -> None:
-    """Download, validate, normalize, and save a preview image."""
-    response = _safe_get(image_url, max_bytes=MAX_IMAGE_BYTES)
+async def fetch_preview_image(image_url: str) -> bytes | None:
+    """Download and validate a preview image, returning it as a normalized JPEG."""
+    response = await _safe_get(image_url, max_bytes=MAX_IMAGE_BYTES)
     if response is None:
-        return
+        return None
     if not response.headers.get('content-type', '').lower().startswith('image/'):
-        return
+        return None
+    # Decoding can take a while for large images; other fetches keep going.
+    return await asyncio.to_thread(_normalize_preview_image, response.content, image_url)
+
 
+def _normalize_preview_image(content: bytes, image_url: str) -> bytes | None:
+    """Shrink an image to fit 640x640 and re-encode it as JPEG on white."""
     try:
-        with Image.open(BytesIO(response.content)) as source_image:
+        with Image.open(BytesIO(content)) as source_image:
             source_image.thumbnail((640, 640))
             if source_image.mode in {'RGBA', 'LA'} or (
                 source_image.mode == 'P' and 'transparency' in source_image.info
@@ -726,62 +1422,298 @@ def download_preview_image(preview: LinkPreview, image_url: str) -> None:
             normalized.save(output, format='JPEG', quality=80)
     except Exception:
         logger.info('Failed to process link preview image %s', image_url, exc_info=True)
-        return
+        return None
 
-    preview.image.save(f'{preview.pk}.jpg', ContentFile(output.getvalue()), save=False)
+    return output.getvalue()
 
 
 def _truncate(value: object, max_length: int) -> str:
     return str(value or '')[:max_length]
 
 
-def fetch_preview_for(preview: LinkPreview, *, keep_existing_on_failure=False) -> bool:
-    """Fetch metadata for a link preview; return True when fresh data was applied."""
-    preview.fetch_attempts += 1
+async def _fetch_preview_data(
+    preview: LinkPreview, validators: dict[str, str] | None = None
+) -> tuple[dict[str, object] | None, bytes | None]:
+    """Fetch a preview's metadata and image without touching the database.
 
+    Kinds read from the linked page itself revalidate it when given
+    validators; an unchanged page returns NOT_MODIFIED and no image.
+    """
     if preview.kind == 'youtube':
-        data = fetch_youtube(preview.url, preview.embed_id)
+        data = await fetch_youtube(preview.url, preview.embed_id)
     elif preview.kind == 'twitter':
-        data = fetch_twitter(preview.url, preview.author_handle)
+        data = await fetch_twitter(preview.url, preview.author_handle)
     elif preview.kind == 'hackernews':
-        data = fetch_hackernews(preview.url, preview.embed_id)
+        data = await fetch_hackernews(preview.url, preview.embed_id)
     elif preview.kind == 'reddit':
-        data = fetch_reddit(preview.url)
+        data = await fetch_reddit(preview.url)
     elif preview.kind == 'chatgpt':
-        data = fetch_chatgpt(preview.url)
+        data = await fetch_chatgpt(preview.url, validators=validators)
     else:
-        data = fetch_generic(preview.url)
+        data = await fetch_generic(preview.url, validators=validators)
+
+    if data is not None and data.get('not_modified'):
+        return data, None
+    image = None
+    if data is not None and data.get('image_url'):
+        image = await fetch_preview_image(str(data['image_url']))
+    return data, image
+
+
+async def _fetch_all_preview_data(
+    requests: list[tuple[LinkPreview, dict[str, str] | None]], *, concurrency: int
+) -> list:
+    """Fetch every (preview, validators) pair concurrently over one pooled client.
+
+    Hacker News previews are fetched together as one batch, so items and
+    parent walks they have in common are requested once.
+    """
+    hackernews_ids = [preview.embed_id for preview, _ in requests if preview.kind == 'hackernews']
+    async with FetchSession(max_concurrency=concurrency):
+        hackernews, *results = await asyncio.gather(
+            fetch_hackernews_previews(hackernews_ids),
+            *(
+                _fetch_preview_data(preview, validators)
+                for preview, validators in requests
+                if preview.kind != 'hackernews'
+            ),
+            return_exceptions=True,
+        )
+
+    results = iter(results)
+    ordered = []
+    for preview, _ in requests:
+        if preview.kind != 'hackernews':
+            ordered.append(next(results))
+        elif isinstance(hackernews, Exception):
+            ordered.append(hackernews)
+        else:
+            ordered.append((hackernews[str(preview.embed_id)], None))
+    return ordered
+
+
+def fetch_previews(
+    previews: list[LinkPreview],
+    *,
+    keep_existing_on_failure=False,
+    concurrency: int = MAX_CONCURRENT_FETCHES,
+) -> int:
+    """Fill previews from the shared store, fetching the URLs it lacks, and save them.
+
+    Only URLs without a fresh LinkPreviewContent entry go to the network,
+    once per URL however many previews share it. An expired entry with
+    HTTP validators is revalidated with a conditional request, so an
+    unchanged page costs one small response and keeps its stored content
+    and image. Network work runs on one event loop, bounded by concurrency
+    overall and MAX_CONCURRENT_FETCHES_PER_HOST per host; the rows are then
+    written with one bulk update. A preview whose fetch raises is marked
+    failed, except that one needing a host whose circuit breaker is open is
+    left untouched so it can be fetched later. Returns how many previews
+    got fresh data.
+    """
+    if not previews:
+        return 0
+
+    keys = [preview_content_key(preview.url) for preview in previews]
+    entries = {
+        entry.key: entry for entry in LinkPreviewContent.objects.fresh().filter(key__in=keys)
+    }
+    to_fetch = {}
+    for preview, key in zip(previews, keys, strict=True):
+        if key not in entries:
+            to_fetch.setdefault(key, preview)
+
+    errors = {}
+    deferred = set()
+    if to_fetch:
+        expired = {
+            entry.key: entry
+            for entry in LinkPreviewContent.objects.filter(key__in=to_fetch, status='ok')
+        }
+        requests = [(preview, _validators(expired.get(key))) for key, preview in to_fetch.items()]
+        results = asyncio.run(_fetch_all_preview_data(requests, concurrency=concurrency))
+        for (key, preview), result in zip(to_fetch.items(), results, strict=True):
+            if isinstance(result, HostUnavailableError):
+                logger.info('Deferring link preview %s: %s', preview.pk, result)
+                deferred.add(key)
+                continue
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                data, image = result
+                if data is not None and data.get('not_modified'):
+                    entries[key] = _renew_preview_content(expired[key])
+                else:
+                    entries[key] = _store_preview_content(key, preview, data, image)
+            except Exception as error:
+                errors[key] = error
+
+    now = timezone.now()
+    updated = 0
+    saved = []
+    replaced_images = []
+    for preview, key in zip(previews, keys, strict=True):
+        if key in deferred:
+            continue
+        old_image_name = preview.image.name if preview.image else ''
+        try:
+            if key in errors:
+                raise errors[key]
+            updated += _apply_preview_content(
+                preview, entries[key], keep_existing_on_failure=keep_existing_on_failure
+            )
+        except Exception:
+            logger.exception('Error fetching link preview %s', preview.pk)
+            preview.status = 'failed'
+            preview.fetched_at = now
+        preview.modified = now
+        saved.append(preview)
+
+        new_image_name = preview.image.name if preview.image else ''
+        if (
+            old_image_name
+            and old_image_name != new_image_name
+            and not old_image_name.startswith(SHARED_PREVIEW_IMAGE_DIR)
+        ):
+            replaced_images.append((preview.image.storage, old_image_name))
+
+    LinkPreview.objects.bulk_update(saved, PREVIEW_UPDATE_FIELDS, batch_size=500)
+    Post.objects.filter(pk__in={preview.post_id for preview in saved}).bump_fragment_version()
+    for storage, name in replaced_images:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.error(f"Error deleting old link preview image {name}: {str(e)}")
+    return updated
+
+
+def fetch_preview_for(preview: LinkPreview, *, keep_existing_on_failure=False) -> bool:
+    """Fetch metadata for a link preview; return True when fresh data was applied."""
+    return fetch_previews([preview], keep_existing_on_failure=keep_existing_on_failure) == 1
+
+
+def preview_content_key(url: str) -> str:
+    """Return the shared-store key for a URL.
+
+    YouTube videos and Hacker News items are keyed by their id, so every URL
+    form of one item shares an entry. Other URLs are normalized: lowercase
+    scheme and host, no default port, fragment, or utm_* parameters, and
+    query parameters in sorted order.
+    """
+    kind, provider_id = detect_kind(url)
+    if kind in {'youtube', 'hackernews'}:
+        return f'{kind}:{provider_id}'
 
-    preview.fetched_at = timezone.now()
+    parsed = urlsplit(url)
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or '').lower().rstrip('.')
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    if port and port != {'http': 80, 'https': 443}.get(scheme):
+        netloc = f'{netloc}:{port}'
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not name.lower().startswith('utm_')
+        )
+    )
+    return urlunsplit((scheme, netloc, parsed.path or '/', query, ''))
+
+
+def _store_preview_content(
+    key: str,
+    preview: LinkPreview,
+    data: dict[str, object] | None,
+    image: bytes | None,
+) -> LinkPreviewContent:
+    """Record a fetch result in the shared store and return its entry."""
+    now = timezone.now()
+    entry = LinkPreviewContent.objects.filter(key=key).first() or LinkPreviewContent(key=key)
+    entry.url = preview.url
+    entry.fetched_at = now
     if data is None:
-        if keep_existing_on_failure and preview.status == 'ok':
-            preview.save(update_fields=['fetched_at', 'fetch_attempts'])
-            return False
-        preview.status = 'failed'
-        preview.save(update_fields=['status', 'fetched_at', 'fetch_attempts'])
+        entry.status = 'failed'
+        entry.expires_at = now + PREVIEW_FAILURE_TTL
+        entry.save()
+        return entry
+
+    entry.status = 'ok'
+    entry.expires_at = now + PREVIEW_CONTENT_TTL
+    entry.kind = _truncate(data.get('kind') or preview.kind, 16)
+    entry.title = _truncate(data.get('title'), 500)
+    entry.description = str(data.get('description') or '')
+    entry.site_name = _truncate(data.get('site_name'), 200)
+    entry.author_name = _truncate(data.get('author_name'), 200)
+    entry.author_handle = _truncate(data.get('author_handle'), 100)
+    entry.embed_id = _truncate(data.get('embed_id'), 100)
+    entry.extra = data.get('extra') or {}
+    published_at = data.get('published_at')
+    entry.published_at = published_at if isinstance(published_at, date) else None
+    entry.etag = str(data.get('etag') or '')
+    entry.last_modified = str(data.get('last_modified') or '')
+    if entry.pk is None:
+        # The image is named after the entry's id.
+        entry.save()
+
+    old_image_name = entry.image.name
+    if image is not None:
+        entry.image.save(f'{entry.pk}.jpg', ContentFile(image), save=False)
+    entry.save()
+
+    if old_image_name and entry.image.name != old_image_name:
+        # Move every preview showing the old thumbnail before deleting it.
+        moved = LinkPreview.objects.filter(image=old_image_name)
+        post_ids = list(moved.values_list('post_id', flat=True))
+        moved.update(image=entry.image.name)
+        Post.objects.filter(pk__in=post_ids).bump_fragment_version()
+        queue_storage_deletions(storage_names=[old_image_name])
+    return entry
+
+
+def _apply_preview_content(
+    preview: LinkPreview, entry: LinkPreviewContent, *, keep_existing_on_failure: bool
+) -> bool:
+    """Copy a store entry onto a preview without saving; return True if fresh data was applied."""
+    preview.fetch_attempts += 1
+    preview.fetched_at = entry.fetched_at
+    if entry.status != 'ok':
+        if not (keep_existing_on_failure and preview.status == 'ok'):
+            preview.status = 'failed'
         return False
 
-    old_image_name = preview.image.name if preview.image else ''
-    preview.kind = _truncate(data.get('kind') or preview.kind, 16)
-    preview.title = _truncate(data.get('title'), 500)
-    preview.description = str(data.get('description') or '')
-    preview.site_name = _truncate(data.get('site_name'), 200)
-    preview.author_name = _truncate(data.get('author_name'), 200)
-    preview.author_handle = _truncate(data.get('author_handle') or preview.author_handle, 100)
-    preview.embed_id = _truncate(data.get('embed_id') or preview.embed_id, 100)
-    preview.extra = data.get('extra') or {}
-    published_at = data.get('published_at')
-    preview.published_at = published_at if isinstance(published_at, date) else None
+    for field_name, value in _content_fields(entry).items():
+        setattr(preview, field_name, value)
+    # Providers do not always echo these back; keep what the URL gave us.
+    preview.author_handle = entry.author_handle or preview.author_handle
+    preview.embed_id = entry.embed_id or preview.embed_id
+    preview.status = 'ok'
+    return True
 
-    image_url = data.get('image_url')
-    if image_url:
-        download_preview_image(preview, str(image_url))
 
-    preview.status = 'ok'
-    preview.save(
-        update_fields=[
+def _validators(entry: LinkPreviewContent | None) -> dict[str, str] | None:
+    """Return an expired entry's HTTP validators, if it has any."""
+    if entry is None or not (entry.etag or entry.last_modified):
+        return None
+    return {'etag': entry.etag, 'last_modified': entry.last_modified}
+
+
+def _renew_preview_content(entry: LinkPreviewContent) -> LinkPreviewContent:
+    """Mark an entry whose page was unchanged as freshly fetched."""
+    entry.fetched_at = timezone.now()
+    entry.expires_at = entry.fetched_at + PREVIEW_CONTENT_TTL
+    entry.save(update_fields=['fetched_at', 'expires_at'])
+    return entry
+
+
+def _content_fields(entry: LinkPreviewContent) -> dict[str, object]:
+    """Return the preview fields an ok store entry provides."""
+    fields = {
+        field_name: getattr(entry, field_name)
+        for field_name in (
             'kind',
-            'status',
             'title',
             'description',
             'site_name',
@@ -790,37 +1722,39 @@ def fetch_preview_for(preview: LinkPreview, *, keep_existing_on_failure=False) -
             'embed_id',
             'extra',
             'published_at',
-            'image',
-            'fetched_at',
-            'fetch_attempts',
-        ]
-    )
-
-    new_image_name = preview.image.name if preview.image else ''
-    if old_image_name and new_image_name and old_image_name != new_image_name:
-        try:
-            preview.image.storage.delete(old_image_name)
-        except Exception as e:
-            logger.error(f"Error deleting old link preview image {old_image_name}: {str(e)}")
-
-    return True
+        )
+    }
+    if entry.image:
+        fields['image'] = entry.image.name
+    return fields
 
 
 def sync_link_previews(post) -> bool:
-    """Synchronize a post's LinkPreview rows with the URLs in its text."""
-    if not post.link_previews_enabled:
-        for preview in post.link_previews.all():
-            preview.delete()
-        return False
-
-    urls = extract_urls(f'{post.head}\n{post.body}')
-    stale_previews = post.link_previews.all()
-    if urls:
-        stale_previews = stale_previews.exclude(url__in=urls)
-    for preview in stale_previews:
-        preview.delete()
-
+    """Synchronize a post's LinkPreview rows with the URLs in its text.
+
+    The post's previews are read once, plus the shared store when there are
+    new URLs, and written with at most one delete, one bulk create, one bulk
+    update, and one fragment version bump. Deleted previews' own images are
+    queued for deletion once the transaction commits. Returns whether any
+    preview is pending.
+    """
+    urls = extract_urls(f'{post.head}\n{post.body}') if post.link_previews_enabled else []
     existing_previews = {preview.url: preview for preview in post.link_previews.all()}
+    stale_previews = [preview for url, preview in existing_previews.items() if url not in urls]
+
+    # URLs another post already fetched are filled from the shared store.
+    new_keys = {url: preview_content_key(url) for url in urls if url not in existing_previews}
+    stored = {}
+    if new_keys:
+        stored = {
+            entry.key: entry
+            for entry in LinkPreviewContent.objects.fresh().filter(key__in=new_keys.values())
+        }
+
+    now = timezone.now()
+    created = []
+    updated = []
+    current = []
     for position, url in enumerate(urls):
         preview = existing_previews.get(url)
         if preview is None:
@@ -835,25 +1769,56 @@ def sync_link_previews(post) -> bool:
                 create_kwargs['embed_id'] = provider_id
             if kind == 'twitter':
                 create_kwargs['author_handle'] = provider_id
-            LinkPreview.objects.create(**create_kwargs)
+            entry = stored.get(new_keys[url])
+            if entry is not None:
+                create_kwargs['status'] = entry.status
+                create_kwargs['fetched_at'] = entry.fetched_at
+                if entry.status == 'ok':
+                    content = _content_fields(entry)
+                    for field_name in ('author_handle', 'embed_id'):
+                        content[field_name] = content[field_name] or create_kwargs.get(
+                            field_name, ''
+                        )
+                    create_kwargs.update(content)
+            preview = LinkPreview(**create_kwargs)
+            created.append(preview)
+            current.append(preview)
             continue
 
-        update_fields = []
-        if preview.position != position:
-            preview.position = position
-            update_fields.append('position')
+        current.append(preview)
+        changed = preview.position != position
+        preview.position = position
 
         kind, provider_id = detect_kind(preview.url)
         if kind != preview.kind:
             preview.kind = kind
             preview.embed_id = provider_id if kind in {'youtube', 'hackernews'} else ''
             preview.status = 'pending'
-            update_fields.extend(['kind', 'embed_id', 'status'])
+            changed = True
         elif preview.status == 'failed':
             preview.status = 'pending'
-            update_fields.append('status')
-
-        if update_fields:
-            preview.save(update_fields=update_fields)
+            changed = True
+
+        if changed:
+            preview.modified = now
+            updated.append(preview)
+
+    if stale_previews:
+        queue_storage_deletions(
+            storage_names=[
+                preview.image.name
+                for preview in stale_previews
+                if preview.image and not preview.image.name.startswith(SHARED_PREVIEW_IMAGE_DIR)
+            ]
+        )
+        LinkPreview.objects.filter(pk__in=[preview.pk for preview in stale_previews]).delete()
+    if created:
+        LinkPreview.objects.bulk_create(created)
+    if updated:
+        LinkPreview.objects.bulk_update(
+            updated, ['position', 'kind', 'embed_id', 'status', 'modified']
+        )
+    if stale_previews or created or updated:
+        Post.objects.filter(pk=post.pk).bump_fragment_version()
 
-    return post.link_previews.filter(status='pending').exists()
+    return any(preview.status == 'pending' for preview in current)
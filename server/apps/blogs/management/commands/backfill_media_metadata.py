@@ -0,0 +1,54 @@
+"""Fill in media metadata for rows saved before it was recorded at ingest."""
+
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.blogs.models import Media
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Detect mime type, size, and dimensions for media that lack them.
+
+    Each row is downloaded (for S3 media) and probed once; rows that still
+    cannot be described are left as they are. Rows are walked in id order
+    from --after, and a run that stops at --limit prints the --after value
+    that continues past them, so undescribable rows never starve the rest.
+    """
+
+    help = 'Backfill Media mime_type, size, width, and height from the stored files.'
+
+    def add_arguments(self, parser):
+        """Add command-line options."""
+        parser.add_argument('--limit', type=int, default=500)
+        parser.add_argument(
+            '--after', type=int, default=0, help='Only check media with an id above this one.'
+        )
+
+    def handle(self, *args, **options):
+        """Record metadata for up to --limit incomplete media rows after --after."""
+        incomplete = Media.objects.filter(
+            Q(mime_type='')
+            | Q(size__isnull=True)
+            | Q(media_type__in=['image', 'video'], width__isnull=True),
+            pk__gt=options['after'],
+        ).order_by('pk')[: options['limit']]
+
+        checked = 0
+        updated = 0
+        last_id = None
+        for media in incomplete:
+            checked += 1
+            last_id = media.pk
+            try:
+                if media.record_file_metadata():
+                    updated += 1
+            except Exception:
+                logger.exception('Error recording file metadata for media %s', media.pk)
+
+        self.stdout.write(f'checked {checked} media, updated {updated}')
+        if checked == options['limit']:
+            self.stdout.write(f'more may remain; continue with --after {last_id}')
@@ -0,0 +1,165 @@
+"""Seed posts and report query plans and timings for each feed scope."""
+
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.blogs.models import (
+    VISIBILITY_PRIVATE,
+    VISIBILITY_PUBLIC,
+    VISIBILITY_UNLISTED,
+    Post,
+)
+from apps.blogs.pagination import PostCursorPagination
+
+User = get_user_model()
+
+BENCH_USERNAME_PREFIX = 'feedbench-'
+SEED_BATCH_SIZE = 5000
+
+
+class _RollbackError(Exception):
+    """Raised to discard seeded rows at the end of a run."""
+
+
+class Command(BaseCommand):
+    """Benchmark the cursor-paginated feed scopes against a seeded posts table.
+
+    Seeded rows are rolled back at the end unless --keep is passed, so a large
+    table can be seeded once and re-measured later with --posts 0.
+    """
+
+    help = 'Seed N posts and print EXPLAIN output and timings for each feed scope.'
+
+    def add_arguments(self, parser):
+        """Add command-line options."""
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--authors', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep seeded rows.')
+        parser.add_argument(
+            '--analyze', action='store_true', help='Refresh planner statistics after seeding.'
+        )
+
+    def handle(self, *args, **options):
+        """Seed, explain, and time every scope."""
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options['keep']:
+                    raise _RollbackError
+        except _RollbackError:
+            self.stdout.write('rolled back seeded rows (pass --keep to retain them)')
+
+    def _run(self, options):
+        authors = self._bench_authors(options['authors'])
+        if options['posts']:
+            started = time.perf_counter()
+            self._seed(authors, options['posts'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'seeded {options["posts"]} posts in {elapsed:.1f}s')
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        total = Post.objects.count()
+        self.stdout.write(f'{connection.vendor}: {total} posts in table\n')
+        for name, queryset in self._scopes(authors[0]):
+            self._report(name, queryset, options['repeat'])
+
+    def _bench_authors(self, count):
+        authors = []
+        for index in range(max(count, 1)):
+            author, _created = User.objects.get_or_create(
+                username=f'{BENCH_USERNAME_PREFIX}{index}'
+            )
+            authors.append(author)
+        return authors
+
+    def _seed(self, authors, count):
+        """Bulk insert posts with a realistic mix of drafts, privacy, and pins."""
+        batch = []
+        pinned_at = timezone.now()
+        for index in range(count):
+            author = authors[index % len(authors)]
+            # Vary the mix along each author's own sequence so every author
+            # gets the same proportions.
+            nth = index // len(authors)
+            if nth % 10 == 0:
+                visibility = VISIBILITY_UNLISTED
+            elif nth % 10 == 1:
+                visibility = VISIBILITY_PRIVATE
+            else:
+                visibility = VISIBILITY_PUBLIC
+            batch.append(
+                Post(
+                    author=author,
+                    head=f'Benchmark post {index}',
+                    visibility=visibility,
+                    is_draft=nth % 20 == 2,
+                    pinned_at=pinned_at if nth % 100 == 3 else None,
+                )
+            )
+            if len(batch) >= SEED_BATCH_SIZE:
+                Post.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Post.objects.bulk_create(batch)
+
+    def _scopes(self, author):
+        """Return (name, queryset) pairs mirroring PostViewSet.get_queryset."""
+        ordering = PostCursorPagination.ordering
+        page = PostCursorPagination.page_size + 1  # the paginator peeks one extra row
+        anonymous = AnonymousUser()
+
+        public = Post.objects.visible_to(anonymous).order_by(*ordering)
+        signed_in = Post.objects.visible_to(author).order_by(*ordering)
+        by_author = Post.objects.visible_to(anonymous).filter(author=author).order_by(*ordering)
+        drafts = Post.objects.filter(author=author, is_draft=True).order_by(*ordering)
+        pinned = (
+            Post.objects.visible_to(anonymous)
+            .filter(author=author, pinned_at__isnull=False)
+            .order_by('-pinned_at', '-id')
+        )
+
+        deep_scopes = []
+        midpoint = public.count() // 2
+        middle = public[midpoint : midpoint + 1].first()
+        if middle is not None:
+            # A later cursor page: the paginator adds a keyset filter on created.
+            deep_scopes.append(
+                ('public feed, deep page', public.filter(created__lt=middle.created)[:page])
+            )
+
+        return [
+            ('public feed', public[:page]),
+            *deep_scopes,
+            ('public feed, signed in', signed_in[:page]),
+            ('author feed', by_author[:page]),
+            ('drafts', drafts[:page]),
+            ('pinned', pinned[:page]),
+        ]
+
+    def _report(self, name, queryset, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        if connection.vendor == 'postgresql':
+            plan = queryset.explain(analyze=True, buffers=True)
+        else:
+            plan = queryset.explain()
+        for line in plan.splitlines():
+            self.stdout.write(f'  {line}')
+
+        timings = []
+        for _attempt in range(max(repeat, 1)):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'  median {statistics.median(timings):.2f} ms, '
+            f'min {min(timings):.2f} ms over {len(timings)} runs\n'
+        )
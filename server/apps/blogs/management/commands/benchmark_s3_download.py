@@ -0,0 +1,173 @@
+"""Benchmark S3 downloads with boto3 defaults against the tuned transfer layer."""
+
+import os
+import re
+import statistics
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.core.management.base import BaseCommand
+
+from apps.uploads.s3 import client_config, transfer_config
+
+BUCKET = 'benchmark'
+KEY = 'post/audio/1/benchmark.bin'
+RANGE_RE = re.compile(r'^bytes=(\d+)-(\d*)$')
+SEND_CHUNK_BYTES = 64 * 1024
+
+
+class _ObjectHandler(BaseHTTPRequestHandler):
+    """Serve one object path-style, with a first-byte delay and a per-connection rate cap."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):  # noqa: N802
+        """Answer HEAD with the object's metadata."""
+        self._respond(send_body=False)
+
+    def do_GET(self):  # noqa: N802
+        """Answer GET with the whole object or one byte range."""
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        content = self.server.content
+        time.sleep(self.server.latency)
+        start, end = 0, len(content) - 1
+        status = HTTPStatus.OK
+        match = RANGE_RE.match(self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), end)
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('ETag', '"benchmark"')
+        self.send_header('Last-Modified', formatdate(usegmt=True))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+        self.end_headers()
+        if not send_body:
+            return
+
+        # Pace each connection like a single TCP stream over the internet.
+        started = time.perf_counter()
+        sent = 0
+        for offset in range(start, end + 1, SEND_CHUNK_BYTES):
+            chunk = content[offset : min(offset + SEND_CHUNK_BYTES, end + 1)]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            ahead = sent / self.server.bytes_per_second - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Keep benchmark output quiet."""
+
+
+class _ObjectStore(ThreadingHTTPServer):
+    """A local S3-compatible stand-in holding a single object."""
+
+    daemon_threads = True
+
+    def __init__(self, content, latency, bytes_per_second):
+        """Listen on an ephemeral localhost port."""
+        super().__init__(('127.0.0.1', 0), _ObjectHandler)
+        self.content = content
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+
+
+def _client(endpoint_url, config):
+    return boto3.client(
+        's3',
+        aws_access_key_id='benchmark',
+        aws_secret_access_key='benchmark',
+        region_name='auto',
+        endpoint_url=endpoint_url,
+        config=config.merge(Config(s3={'addressing_style': 'path'})),
+    )
+
+
+class Command(BaseCommand):
+    """Download one object from a throttled local stand-in with each configuration.
+
+    The stand-in adds a first-byte delay to every request and caps each
+    connection's throughput, which is what makes concurrent ranged GETs pay
+    off against R2.
+    """
+
+    help = 'Compare S3 download time with boto3 defaults and the tuned transfer settings.'
+
+    def add_arguments(self, parser):
+        """Add command-line options."""
+        parser.add_argument(
+            '--sizes-mib',
+            type=int,
+            nargs='+',
+            default=[16, 48, 100],
+            help='Object sizes to download, in MiB.',
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=40,
+            help='Delay before each response, in milliseconds.',
+        )
+        parser.add_argument(
+            '--connection-mibps',
+            type=float,
+            default=16,
+            help='Throughput cap per connection, in MiB/s.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Downloads per configuration; the median is shown.',
+        )
+
+    def handle(self, *args, **options):
+        """Serve each object size and time every configuration against it."""
+        configurations = {
+            'defaults': (Config(signature_version='s3v4'), TransferConfig()),
+            'tuned': (client_config(), transfer_config()),
+        }
+
+        for size_mib in options['sizes_mib']:
+            server = _ObjectStore(
+                os.urandom(size_mib * 1024 * 1024),
+                options['latency_ms'] / 1000,
+                options['connection_mibps'] * 1024 * 1024,
+            )
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            endpoint_url = f'http://127.0.0.1:{server.server_port}'
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{size_mib} MiB object'))
+
+            try:
+                for name, (config, transfer) in configurations.items():
+                    s3 = _client(endpoint_url, config)
+                    timings = []
+                    for _ in range(options['repeat']):
+                        with tempfile.TemporaryFile() as target:
+                            started = time.perf_counter()
+                            s3.download_fileobj(BUCKET, KEY, target, Config=transfer)
+                            timings.append(time.perf_counter() - started)
+                    elapsed = statistics.median(timings)
+                    self.stdout.write(
+                        f'  {name:<9} {elapsed:7.2f} s  {size_mib / elapsed:7.1f} MiB/s'
+                    )
+            finally:
+                server.shutdown()
+                server.server_close()
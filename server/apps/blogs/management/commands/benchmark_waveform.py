@@ -0,0 +1,142 @@
+"""Compare the streaming waveform reducer with buffering the whole PCM decode."""
+
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from array import array
+
+from django.core.management.base import BaseCommand
+
+from apps.blogs.utils.media_processing import (
+    WAVEFORM_BUCKETS,
+    WAVEFORM_SAMPLE_RATE,
+    waveform_from_pcm,
+)
+
+DEFAULT_DURATIONS = (60, 3600, 4 * 3600)
+SYNTHETIC_GAIN_LEVELS = 16
+
+
+def _buffered_waveform(path):
+    """The previous approach: read every sample into memory, then scan per sample."""
+    with open(path, 'rb') as pcm_file:
+        pcm = pcm_file.read()
+    samples = array('h')
+    samples.frombytes(pcm[: len(pcm) - (len(pcm) % 2)])
+    if not samples:
+        return None
+
+    bucket_count = min(WAVEFORM_BUCKETS, len(samples))
+    peaks = []
+    for index in range(bucket_count):
+        start = index * len(samples) // bucket_count
+        end = (index + 1) * len(samples) // bucket_count
+        bucket = samples[start:end]
+        peaks.append(max(abs(sample) for sample in bucket) if bucket else 0)
+
+    loudest = max(peaks)
+    if loudest <= 0:
+        return None
+    return [min(100, round((peak / loudest) * 100)) for peak in peaks]
+
+
+def _streaming_waveform(path):
+    with open(path, 'rb') as pcm_file:
+        return waveform_from_pcm(pcm_file, os.path.getsize(path) // 2)
+
+
+REDUCERS = {
+    'streaming': _streaming_waveform,
+    'buffered': _buffered_waveform,
+}
+
+
+def _measure(reducer_name, path, conn):
+    """Run one reducer in a forked child and send back (seconds, peak RSS growth in KiB)."""
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    REDUCERS[reducer_name](path)
+    elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # macOS reports ru_maxrss in bytes rather than KiB.
+        start_rss, peak_rss = start_rss // 1024, peak_rss // 1024
+    conn.send((elapsed, peak_rss - start_rss))
+    conn.close()
+
+
+def _write_synthetic_pcm(path, seconds):
+    """Write mono s16le speech-like audio: a tone whose loudness drifts each second."""
+    tone = [
+        12000 * math.sin(2 * math.pi * 220 * index / WAVEFORM_SAMPLE_RATE)
+        for index in range(WAVEFORM_SAMPLE_RATE)
+    ]
+    # Precompute one second at a handful of gains so hours of input write quickly.
+    levels = []
+    for step in range(SYNTHETIC_GAIN_LEVELS):
+        gain = 0.2 + 0.8 * step / (SYNTHETIC_GAIN_LEVELS - 1)
+        level = array('h', (round(sample * gain) for sample in tone))
+        if sys.byteorder != 'little':
+            level.byteswap()
+        levels.append(level.tobytes())
+
+    with open(path, 'wb') as pcm_file:
+        for second in range(seconds):
+            step = round(abs(math.sin(second / 37)) * (SYNTHETIC_GAIN_LEVELS - 1))
+            pcm_file.write(levels[step])
+
+
+class Command(BaseCommand):
+    """Benchmark waveform generation on synthetic 8 kHz PCM of several lengths.
+
+    Each reducer runs in a forked child so its peak RSS is measured on its
+    own rather than against the high-water mark of earlier runs.
+    """
+
+    help = 'Compare wall time and peak RSS of streaming vs buffered waveform reduction.'
+
+    def add_arguments(self, parser):
+        """Add command-line options."""
+        parser.add_argument(
+            '--durations',
+            type=int,
+            nargs='+',
+            default=list(DEFAULT_DURATIONS),
+            help='Synthetic input lengths in seconds.',
+        )
+        parser.add_argument(
+            '--no-baseline',
+            action='store_true',
+            help='Skip the buffered reducer (it needs ~2x the PCM size in memory).',
+        )
+
+    def handle(self, *args, **options):
+        """Generate each input, run the reducers, and print a row per run."""
+        reducers = ['streaming'] if options['no_baseline'] else ['streaming', 'buffered']
+        context = multiprocessing.get_context('fork')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for seconds in options['durations']:
+                path = os.path.join(temp_dir, f'{seconds}.pcm')
+                _write_synthetic_pcm(path, seconds)
+                size_mib = os.path.getsize(path) / (1024 * 1024)
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(f'{seconds}s ({size_mib:.1f} MiB PCM)')
+                )
+
+                for reducer_name in reducers:
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(target=_measure, args=(reducer_name, path, sender))
+                    process.start()
+                    sender.close()
+                    elapsed, rss_kib = receiver.recv()
+                    process.join()
+                    self.stdout.write(
+                        f'  {reducer_name:<10} {elapsed:8.2f} s  '
+                        f'peak RSS +{rss_kib / 1024:.1f} MiB'
+                    )
+                os.remove(path)
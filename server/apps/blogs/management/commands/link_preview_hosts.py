@@ -0,0 +1,40 @@
+"""Show link preview circuit breakers and the preview backlog per host."""
+
+from collections import Counter
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand
+
+from apps.blogs.link_previews import host_metrics
+from apps.blogs.models import LinkPreview
+
+
+class Command(BaseCommand):
+    """Print each provider host's breaker state and how many previews wait on it.
+
+    Breaker state comes from the link_preview_breakers cache that every
+    worker writes to. Pending previews are counted by the host of the
+    linked URL.
+    """
+
+    help = 'Show link preview circuit breaker state and pending previews per host.'
+
+    def handle(self, *args, **options):
+        """Print one line per host that has failed recently or has pending previews."""
+        pending = Counter(
+            (urlparse(url).hostname or '').lower()
+            for url in LinkPreview.objects.filter(status='pending').values_list('url', flat=True)
+        )
+        metrics = host_metrics()
+        if not metrics and not pending:
+            self.stdout.write('no failing hosts and no pending previews')
+            return
+
+        for host in sorted(metrics.keys() | pending.keys()):
+            line = f'{host}: {pending[host]} pending'
+            if host in metrics:
+                host_state = metrics[host]
+                line += f', breaker {host_state["breaker"]} ({host_state["failures"]} failures)'
+                if host_state['open_until']:
+                    line += f' until {host_state["open_until"]:%Y-%m-%d %H:%M:%S} UTC'
+            self.stdout.write(line)
@@ -1,78 +1,114 @@
 """Refresh stale and failed link previews."""
 
-import logging
+import time
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from django.utils import timezone
 
-from apps.blogs.link_previews import fetch_preview_for
+from apps.blogs.link_previews import MAX_CONCURRENT_FETCHES, fetch_previews
 from apps.blogs.models import LinkPreview
 
-logger = logging.getLogger(__name__)
-
 
 class Command(BaseCommand):
-    """Refresh stale ok previews and retry eligible failed previews."""
+    """Work through every due preview in batches, once or continuously.
+
+    Failed previews are retried with exponential backoff: after
+    --min-retry-age-minutes, then twice that, and so on per attempt, until
+    --max-attempts. Stale ok previews are revalidated, which for pages that
+    sent HTTP validators is a conditional request. Each batch is fetched
+    concurrently by --workers request slots and written with one bulk update.
+    """
 
     help = 'Refresh stale link previews and retry eligible failed previews.'
 
     def add_arguments(self, parser):
         """Add command-line options."""
         parser.add_argument('--stale-days', type=int, default=30)
-        parser.add_argument('--min-retry-age-minutes', type=int, default=60)
+        parser.add_argument(
+            '--min-retry-age-minutes',
+            type=int,
+            default=60,
+            help='Wait before the first retry; doubles with each failed attempt.',
+        )
         parser.add_argument('--max-attempts', type=int, default=4)
-        parser.add_argument('--limit', type=int, default=200)
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=0,
+            help='Stop each pass after this many previews of each kind; 0 means all due.',
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=MAX_CONCURRENT_FETCHES)
+        parser.add_argument(
+            '--continuous',
+            action='store_true',
+            help='Keep running, starting a new pass every --interval-seconds.',
+        )
+        parser.add_argument('--interval-seconds', type=int, default=300)
 
     def handle(self, *args, **options):
-        """Run failed-preview retries and stale-preview refreshes."""
+        """Run passes of failed-preview retries and stale-preview refreshes."""
+        while True:
+            started = time.monotonic()
+            self._run_pass(options)
+            if not options['continuous']:
+                return
+            time.sleep(max(0, options['interval_seconds'] - (time.monotonic() - started)))
+
+    def _run_pass(self, options):
+        """Process every preview due now and print a summary line."""
         now = timezone.now()
-        limit = options['limit']
-        max_attempts = options['max_attempts']
-        retry_before = now - timedelta(minutes=options['min_retry_age_minutes'])
-        stale_before = now - timedelta(days=options['stale_days'])
+        base_backoff = timedelta(minutes=options['min_retry_age_minutes'])
+        due_retry = Q()
+        for attempts in range(options['max_attempts']):
+            backoff = base_backoff * 2 ** max(attempts - 1, 0)
+            due_retry |= Q(fetch_attempts=attempts, fetched_at__lt=now - backoff)
 
-        failed_previews = list(
-            LinkPreview.objects.filter(
-                post__link_previews_enabled=True,
-                status='failed',
-                fetch_attempts__lt=max_attempts,
-                fetched_at__lt=retry_before,
-            ).order_by('fetched_at')[:limit]
+        # Soft-deleted posts are never shown again, so their previews are left alone.
+        enabled = LinkPreview.objects.filter(
+            post__link_previews_enabled=True, post__deleted_at__isnull=True
         )
-        stale_previews = list(
-            LinkPreview.objects.filter(
-                post__link_previews_enabled=True,
-                status='ok',
-                fetched_at__lt=stale_before,
-            ).order_by('fetched_at')[:limit]
+        retried, retried_ok = self._process(
+            enabled.filter(due_retry, status='failed'), options, keep_existing_on_failure=False
+        )
+        refreshed, refreshed_updated = self._process(
+            enabled.filter(
+                status='ok', fetched_at__lt=now - timedelta(days=options['stale_days'])
+            ),
+            options,
+            keep_existing_on_failure=True,
         )
-
-        retried_ok = 0
-        for preview in failed_previews:
-            if self._fetch_preview(preview):
-                retried_ok += 1
-
-        refreshed_updated = 0
-        for preview in stale_previews:
-            if self._fetch_preview(preview, keep_existing_on_failure=True):
-                refreshed_updated += 1
 
         self.stdout.write(
-            f'retried {len(failed_previews)} ({retried_ok} now ok), '
-            f'refreshed {len(stale_previews)} ({refreshed_updated} updated)'
+            f'retried {retried} ({retried_ok} now ok), '
+            f'refreshed {refreshed} ({refreshed_updated} updated)'
         )
 
-    def _fetch_preview(self, preview, *, keep_existing_on_failure=False):
-        """Fetch one preview, converting unexpected exceptions into failed status.
+    def _process(self, due, options, *, keep_existing_on_failure):
+        """Fetch due previews batch by batch; return how many were processed and updated.
 
-        Returns True when fresh data was applied.
+        Batches walk the primary key, so previews a batch leaves due, such
+        as ones put off by an open circuit breaker, are not picked up again
+        in the same pass.
         """
-        try:
-            return fetch_preview_for(preview, keep_existing_on_failure=keep_existing_on_failure)
-        except Exception:
-            logger.exception('Error refreshing link preview %s', preview.pk)
-            preview.status = 'failed'
-            preview.fetched_at = timezone.now()
-            preview.save(update_fields=['status', 'fetched_at', 'fetch_attempts'])
-            return False
+        processed = 0
+        updated = 0
+        last_pk = 0
+        limit = options['limit']
+        while not limit or processed < limit:
+            size = options['batch_size']
+            if limit:
+                size = min(size, limit - processed)
+            batch = list(due.filter(pk__gt=last_pk).order_by('pk')[:size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            processed += len(batch)
+            updated += fetch_previews(
+                batch,
+                keep_existing_on_failure=keep_existing_on_failure,
+                concurrency=options['workers'],
+            )
+        return processed, updated
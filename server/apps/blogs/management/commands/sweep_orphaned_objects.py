@@ -0,0 +1,84 @@
+"""Queue deletion of bucket objects that no database row refers to."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.blogs.models import (
+    LinkPreview,
+    LinkPreviewContent,
+    Media,
+    StorageDeletion,
+    queue_storage_deletions,
+)
+from apps.uploads.s3 import DELETE_OBJECTS_MAX_KEYS, iter_objects
+
+# Every key the app writes lives under one of these.
+PREFIXES = ('post/', 'link_previews/')
+
+
+class Command(BaseCommand):
+    """List the bucket and queue objects older than the cutoff that nothing references.
+
+    Orphans come from presigned uploads that were never attached to a post and
+    from deletions that crashed before they were queued. The age cutoff keeps
+    uploads that are still being attached out of the sweep.
+    """
+
+    help = 'Queue unreferenced bucket objects for deletion.'
+
+    def add_arguments(self, parser):
+        """Add command-line options."""
+        parser.add_argument(
+            '--min-age-hours',
+            type=float,
+            default=24,
+            help='Only sweep objects last modified at least this long ago.',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        """Compare the bucket listing with the keys the database refers to."""
+        if settings.USE_LOCAL_FILE_STORAGE:
+            self.stdout.write('local file storage is in use; nothing to sweep')
+            return
+
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        dry_run = options['dry_run']
+        referenced = self._referenced_keys()
+
+        scanned = 0
+        queued = 0
+        orphans = []
+        for prefix in PREFIXES:
+            for entry in iter_objects(prefix):
+                scanned += 1
+                if entry['Key'] in referenced or entry['LastModified'] >= cutoff:
+                    continue
+                orphans.append(entry['Key'])
+                if len(orphans) == DELETE_OBJECTS_MAX_KEYS:
+                    queued += self._queue(orphans, dry_run)
+                    orphans = []
+        queued += self._queue(orphans, dry_run)
+
+        verb = 'would queue' if dry_run else 'queued'
+        self.stdout.write(f'scanned {scanned} objects, {verb} {queued} for deletion')
+
+    def _queue(self, keys, dry_run):
+        """Queue one batch of orphaned keys and return how many there were."""
+        if keys and not dry_run:
+            queue_storage_deletions(object_keys=keys)
+        return len(keys)
+
+    def _referenced_keys(self):
+        """Return every key a row points at, including ones already queued."""
+        referenced = set(StorageDeletion.objects.values_list('name', flat=True))
+        for values in Media.objects.values_list('s3_file_key', 'file', 'mp3_file', 'thumbnail'):
+            referenced.update(value for value in values if value)
+        referenced.update(LinkPreview.objects.exclude(image='').values_list('image', flat=True))
+        referenced.update(
+            LinkPreviewContent.objects.exclude(image='').values_list('image', flat=True)
+        )
+        return referenced
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18
+
+"""Add denormalized like, comment, and view counters to posts."""
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('like_count', 'Like'),
+    ('comment_count', 'Comment'),
+    ('view_count', 'PostView'),
+)
+
+
+def backfill_engagement_counts(apps, _schema_editor):
+    """Populate each counter from its related rows in one UPDATE per counter."""
+    post = apps.get_model('blogs', 'Post')
+    for field_name, model_name in COUNTERS:
+        related = apps.get_model('blogs', model_name)
+        total = Subquery(
+            related.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        )
+        post.objects.update(**{field_name: Coalesce(total, 0)})
+
+
+class Migration(migrations.Migration):
+    """Add post engagement counters and backfill them."""
+
+    dependencies = [
+        ('blogs', '0025_linkpreview_extra_alter_linkpreview_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_engagement_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:05
+
+"""Add partial composite indexes matching each feed pagination scope."""
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0026_post_engagement_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['visibility', '-created', '-id'], name='post_public_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['-created', '-id'], name='post_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['author', '-created', '-id'], name='post_author_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_draft', True)), fields=['author', '-created', '-id'], name='post_drafts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('pinned_at__isnull', False)), fields=['author', '-pinned_at', '-id'], name='post_pinned_idx'),
+        ),
+        # Without table statistics SQLite prefers the single-column visibility
+        # and author_id indexes and sorts; ANALYZE lets it pick the ordered ones.
+        migrations.RunSQL('ANALYZE', migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0027_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='fragment_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('blogs', '0031_storagedeletion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                condition=models.Q(('deleted_at__isnull', False)),
+                fields=['deleted_at'],
+                name='post_deleted_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0032_post_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkPreviewContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('key', models.CharField(max_length=2000, unique=True)),
+                ('url', models.URLField(max_length=2000)),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('failed', 'Failed')], max_length=16)),
+                ('fetched_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('kind', models.CharField(blank=True, max_length=16)),
+                ('title', models.CharField(blank=True, max_length=500)),
+                ('description', models.TextField(blank=True)),
+                ('site_name', models.CharField(blank=True, max_length=200)),
+                ('author_name', models.CharField(blank=True, max_length=200)),
+                ('author_handle', models.CharField(blank=True, max_length=100)),
+                ('embed_id', models.CharField(blank=True, max_length=100)),
+                ('extra', models.JSONField(blank=True, default=dict)),
+                ('published_at', models.DateField(blank=True, null=True)),
+                ('image', models.ImageField(blank=True, upload_to='link_previews/shared/')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0033_linkpreviewcontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linkpreviewcontent',
+            name='etag',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='linkpreviewcontent',
+            name='last_modified',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -7,12 +7,15 @@ import secrets
 import tempfile
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from django.utils.crypto import constant_time_compare
 
-from apps.uploads.s3 import delete_object, download_to_file
+from apps.uploads.object_cache import cached_object
+from apps.uploads.s3 import ALLOWED_CONTENT_TYPE_RE
 
-from .utils import get_field_file_duration
+from .utils import describe_media_file
 
 # Configure logging
 logger = logging.getLogger('server.apps.blogs')
@@ -23,6 +26,10 @@ def media_file_path(instance, filename):
     return f'post/{instance.id}/media/{filename}'
 
 
+# Thumbnails owned by LinkPreviewContent and shared by every preview of the
+# same URL; deleting one post's preview must leave them in place.
+SHARED_PREVIEW_IMAGE_DIR = 'link_previews/shared/'
+
 MEDIA_TYPE_CHOICES = [
     ('audio', 'Audio'),
     ('video', 'Video'),
@@ -50,6 +57,82 @@ def generate_share_token():
     return secrets.token_urlsafe(16)
 
 
+def adjust_post_counter(post_ids, field_name, delta):
+    """Atomically shift a denormalized engagement counter on one or more posts.
+
+    Counters never go below zero; rows that drifted are repaired in bulk by the
+    reconcile_post_counts command.
+    """
+    if isinstance(post_ids, int):
+        post_ids = [post_ids]
+    if not post_ids or not delta:
+        return
+    Post.objects.filter(pk__in=post_ids).update(
+        **{field_name: Greatest(models.F(field_name) + delta, 0)}
+    )
+
+
+def queue_storage_deletions(storage_names=(), object_keys=()):
+    """Record stored files to delete once the current transaction commits.
+
+    storage_names are names in the default file storage; object_keys are raw
+    object-storage keys such as presigned uploads. Rows are written in the
+    caller's transaction, so a rolled-back delete keeps its files, and
+    drain_storage_deletions removes them in batches afterwards.
+    """
+    rows = [
+        StorageDeletion(target=StorageDeletion.TARGET_STORAGE, name=name) for name in storage_names
+    ]
+    rows += [
+        StorageDeletion(target=StorageDeletion.TARGET_BUCKET, name=key) for key in object_keys
+    ]
+    if not rows:
+        return
+    StorageDeletion.objects.bulk_create(rows)
+    transaction.on_commit(_enqueue_storage_deletion_drain)
+
+
+def _enqueue_storage_deletion_drain():
+    # Imported here because tasks imports this module.
+    from .tasks import drain_storage_deletions
+
+    try:
+        drain_storage_deletions.enqueue()
+    except Exception:
+        logger.exception('Failed to enqueue draining queued storage deletions')
+
+
+def _enqueue_deleted_post_purge():
+    # Imported here because tasks imports this module.
+    from .tasks import purge_deleted_posts
+
+    try:
+        purge_deleted_posts.enqueue()
+    except Exception:
+        logger.exception('Failed to enqueue purging deleted posts')
+
+
+class StorageDeletion(models.Model):
+    """A stored file or object-storage key waiting to be deleted."""
+
+    TARGET_STORAGE = 'storage'
+    TARGET_BUCKET = 'bucket'
+    TARGET_CHOICES = [
+        (TARGET_STORAGE, 'Default file storage'),
+        (TARGET_BUCKET, 'Object storage key'),
+    ]
+
+    created = models.DateTimeField(auto_now_add=True)
+    target = models.CharField(max_length=16, choices=TARGET_CHOICES)
+    name = models.CharField(max_length=1024)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        """Return a readable queued deletion label."""
+        return f'Delete {self.target} {self.name}'
+
+
 class Media(models.Model):
     """A media asset attached to a post."""
 
@@ -67,6 +150,14 @@ class Media(models.Model):
         max_length=16, blank=True, default='', choices=TRANSCRIPT_STATUS_CHOICES
     )
     alt_text = models.TextField(blank=True)
+    # Detected once at ingest (see record_file_metadata) so serving and
+    # serializing media never has to sniff or stat the file.
+    mime_type = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    # Hashed while a direct upload streams to object storage; blank otherwise.
+    sha256 = models.CharField(max_length=64, blank=True)
 
     class Meta:
         """Model options for media."""
@@ -86,7 +177,12 @@ class Media(models.Model):
         return self.file.name or self.s3_file_key or f'Media {self.id}'
 
     def save(self, *args, **kwargs):
-        """Save media and populate duration when it can be probed."""
+        """Save media without inspecting the stored file.
+
+        Duration is probed by the create view from the upload before it is
+        stored, and anything still missing is filled in by
+        process_post_media, so saving never reads the file back from storage.
+        """
         # If this is a new record with file and we don't yet have id for media_file_path def
         if self.id is None and self.file:  # pyright: ignore [reportAttributeAccessIssue]
             # Store file temporarily outside of record
@@ -101,59 +197,72 @@ class Media(models.Model):
             if 'force_insert' in kwargs:
                 kwargs.pop('force_insert')
 
-        # Save the record first to ensure file is on disk
         super().save(*args, **kwargs)
 
-        # Set duration if file is present and duration is not set
-        if self.file and not self.duration:
-            try:
-                logger.info(f"Attempting to extract duration for {self.file.name}")
-                duration = get_field_file_duration(self.file)
-                if duration:
-                    logger.info(f"Extracted duration: {duration} for {self.file.name}")
-                    self.duration = duration
-                    # Save again with duration
-                    super().save(update_fields=['duration'])
-                else:
-                    logger.warning(f"Could not extract duration for {self.file.name}")
-            except Exception as e:
-                logger.error(f"Error extracting duration for {self.file.name}: {str(e)}")
+        Post.objects.filter(media=self.pk).bump_fragment_version()
 
     def delete(self, *args, **kwargs):
-        """Delete stored media files, object-storage keys, and the database row."""
-        media_dir = None
-        if settings.USE_LOCAL_FILE_STORAGE and self.file:
-            try:
-                media_dir = os.path.dirname(self.file.path)
-            except Exception as e:
-                logger.error(f"Error getting media directory for {self.file.name}: {str(e)}")
+        """Delete the database row and queue its stored files for deletion."""
+        queue_storage_deletions(
+            storage_names=[
+                field.name for field in (self.file, self.mp3_file, self.thumbnail) if field
+            ],
+            object_keys=[self.s3_file_key] if self.s3_file_key else [],
+        )
 
-        for field_name in ('file', 'mp3_file', 'thumbnail'):
-            field = getattr(self, field_name)
-            if not field:
-                continue
-            try:
-                field.storage.delete(field.name)
-            except Exception as e:
-                logger.error(f"Error deleting {field_name} {field.name}: {str(e)}")
-
-        if self.s3_file_key:
-            delete_object(self.s3_file_key)
-
-        # Delete the media directory if it exists
-        if media_dir and os.path.exists(media_dir):
-            try:
-                os.rmdir(media_dir)
-            except Exception as e:
-                logger.error(f"Error deleting media directory {media_dir}: {str(e)}")
+        # Post.media is SET_NULL, which updates the post without saving it.
+        Post.objects.filter(media=self.pk).bump_fragment_version()
 
         # Delete the record
         return super().delete(*args, **kwargs)
 
+    def record_file_metadata(self):
+        """Detect and save any missing mime type, size, dimensions, and duration.
+
+        Returns the names of the fields that were filled in.
+        """
+        with self.local_copy(original=True) as path:
+            updated = self.apply_file_metadata(describe_media_file(path, self.media_type))
+        if updated:
+            self.save(update_fields=updated)
+        return updated
+
+    def apply_file_metadata(self, detected):
+        """Copy detected values onto fields that are still empty, without saving.
+
+        Returns the names of the fields that were set.
+        """
+        updated = [
+            field_name
+            for field_name, value in detected.items()
+            if value not in (None, '') and getattr(self, field_name) in (None, '')
+        ]
+        for field_name in updated:
+            setattr(self, field_name, detected[field_name])
+        return updated
+
+    def apply_sniffed_mime_type(self, mime_type):
+        """Replace the client-declared mime_type with one sniffed from the bytes, without saving.
+
+        Sniffed types outside audio, video and image (such as
+        application/octet-stream for an unrecognized container) are ignored.
+        Returns the names of the fields that were set.
+        """
+        if not ALLOWED_CONTENT_TYPE_RE.match(mime_type) or mime_type == self.mime_type:
+            return []
+        self.mime_type = mime_type
+        return ['mime_type']
+
     @contextlib.contextmanager
-    def local_copy(self):
-        """Yield a local filesystem path for this media's bytes."""
-        for field_file in (self.mp3_file, self.file):
+    def local_copy(self, original=False):
+        """Yield a local filesystem path for this media's bytes.
+
+        The speech-ready mp3_file is preferred when present, since that is
+        what transcription wants; pass original=True for the uploaded bytes.
+        S3-only media is served from the shared download cache.
+        """
+        field_files = (self.file,) if original else (self.mp3_file, self.file)
+        for field_file in field_files:
             if not field_file:
                 continue
 
@@ -185,35 +294,40 @@ class Media(models.Model):
                 return
 
         if self.s3_file_key:
-            temp_path = None
-            suffix = os.path.splitext(self.s3_file_key)[1]
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                    temp_path = temp_file.name
-                    download_to_file(self.s3_file_key, temp_file)
-
-                yield temp_path
-                return
-            finally:
-                if temp_path:
-                    try:
-                        os.unlink(temp_path)
-                    except FileNotFoundError:
-                        pass
+            with cached_object(self.s3_file_key) as path:
+                yield path
+            return
 
         raise FileNotFoundError("No media file found")
 
 
 class PostQuerySet(models.QuerySet):
-    """Query helpers for post visibility."""
+    """Query helpers for post visibility and serializer caching."""
 
     def visible_to(self, user):
         """Return published posts visible in feeds for the given user."""
-        queryset = self.filter(is_draft=False)
+        queryset = self.filter(is_draft=False, deleted_at__isnull=True)
         if user is not None and user.is_authenticated:
-            return queryset.filter(models.Q(visibility=VISIBILITY_PUBLIC) | models.Q(author=user))
+            # A bare OR of two indexed equalities lets the planner collect
+            # every public post through both single-column indexes and sort
+            # them (SQLite's MULTI-INDEX OR, PostgreSQL's BitmapOr). Inside a
+            # CASE the test is opaque, so the feed walks post_feed_idx in
+            # order and stops after one page.
+            visible = models.Case(
+                models.When(
+                    models.Q(visibility=VISIBILITY_PUBLIC) | models.Q(author=user),
+                    then=models.Value(True),
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            )
+            return queryset.filter(visible)
         return queryset.filter(visibility=VISIBILITY_PUBLIC)
 
+    def bump_fragment_version(self):
+        """Invalidate cached serializer fragments for these posts."""
+        return self.update(fragment_version=models.F('fragment_version') + 1)
+
 
 class Post(models.Model):
     """A micro-blog post."""
@@ -231,7 +345,23 @@ class Post(models.Model):
     is_draft = models.BooleanField(default=False, db_index=True)
     link_previews_enabled = models.BooleanField(default=True)
     pinned_at = models.DateTimeField(null=True, blank=True)
+    # Set by soft_delete; the post is hidden everywhere until
+    # purge_deleted_posts removes it.
+    deleted_at = models.DateTimeField(null=True, blank=True)
     share_token = models.CharField(max_length=32, default=generate_share_token)
+    # Denormalized so feed pages read counts from the row instead of running
+    # a correlated COUNT per post; see adjust_post_counter.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    view_count = models.PositiveIntegerField(default=0)
+    # Part of the PostSerializer fragment cache key; bumped whenever anything
+    # in the cached representation (post, media, link previews) changes.
+    fragment_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Changed by atomic UPDATEs, so a save writes them only when it names
+    # them in update_fields; fragment_version is never written from the instance.
+    COUNTER_FIELDS = frozenset({'like_count', 'comment_count', 'view_count'})
+    ATOMIC_FIELDS = frozenset({'fragment_version'})
 
     objects = PostQuerySet.as_manager()
 
@@ -239,13 +369,80 @@ class Post(models.Model):
         """Model options for posts."""
 
         ordering = ['-created']
+        # Each index matches one PostCursorPagination scope (filter columns,
+        # then the cursor ordering) so pages are an index range scan instead
+        # of a sort over every matching row. Conditions are compiled from the
+        # same Q objects the feed filters use, so SQLite can match them.
+        indexes = [
+            # Anonymous public feed (visibility=public).
+            models.Index(
+                fields=['visibility', '-created', '-id'],
+                condition=models.Q(is_draft=False),
+                name='post_public_feed_idx',
+            ),
+            # Signed-in feed (visibility=public OR own posts).
+            models.Index(
+                fields=['-created', '-id'],
+                condition=models.Q(is_draft=False),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-created', '-id'],
+                condition=models.Q(is_draft=False),
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-created', '-id'],
+                condition=models.Q(is_draft=True),
+                name='post_drafts_idx',
+            ),
+            models.Index(
+                fields=['author', '-pinned_at', '-id'],
+                condition=models.Q(pinned_at__isnull=False),
+                name='post_pinned_idx',
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='post_deleted_idx',
+            ),
+        ]
 
     def __str__(self):
         """Return the post headline."""
         return self.head
 
+    def save(self, *args, **kwargs):
+        """Save the post and invalidate its cached serializer fragment.
+
+        Updates leave ATOMIC_FIELDS out and bump fragment_version in the
+        database, so a bump made since this instance was loaded is kept. A
+        save without update_fields also leaves COUNTER_FIELDS out, so likes,
+        comments, and views counted meanwhile are not lost.
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        kwargs['update_fields'] = [
+            name for name in update_fields if name not in self.ATOMIC_FIELDS
+        ]
+        result = super().save(*args, **kwargs)
+        Post.objects.filter(pk=self.pk).bump_fragment_version()
+        self.refresh_from_db(fields=['fragment_version'])
+        return result
+
     def is_visible_to(self, user, token=None):
         """Return whether this post can be viewed by the given user and share token."""
+        if self.deleted_at is not None:
+            return False
+
         if user is not None and user.is_authenticated:
             if self.author_id == user.id or user.is_superuser:
                 return True
@@ -261,13 +458,29 @@ class Post(models.Model):
 
         return False
 
+    def soft_delete(self):
+        """Hide the post now and leave removing it to purge_deleted_posts.
+
+        A popular post can have many view, like, and comment rows; deleting
+        them in the request would hold SQLite's single write lock for the
+        whole cascade.
+        """
+        self.deleted_at = timezone.now()
+        self.pinned_at = None
+        self.save(update_fields=['deleted_at', 'pinned_at'])
+        transaction.on_commit(_enqueue_deleted_post_purge)
+
     def delete(self, *args, **kwargs):
-        """Delete the post and its associated media row."""
-        for preview in self.link_previews.all():
-            try:
-                preview.delete()
-            except Exception as e:
-                logger.error(f"Error deleting link preview {preview.id}: {str(e)}")
+        """Delete the post and its associated media row.
+
+        Link preview rows go with the cascade; their images are queued for
+        deletion in one insert rather than deleted one preview at a time.
+        """
+        queue_storage_deletions(
+            storage_names=self.link_previews.exclude(image='')
+            .exclude(image__startswith=SHARED_PREVIEW_IMAGE_DIR)
+            .values_list('image', flat=True)
+        )
 
         # Delete the media record
         if self.media:
@@ -280,6 +493,51 @@ class Post(models.Model):
         return super().delete(*args, **kwargs)
 
 
+class LinkPreviewContentQuerySet(models.QuerySet):
+    """Query helpers for the shared preview store."""
+
+    def fresh(self):
+        """Return entries that have not expired yet."""
+        return self.filter(expires_at__gt=timezone.now())
+
+
+class LinkPreviewContent(models.Model):
+    """Fetched preview metadata shared by every post that links the same URL.
+
+    Keyed by the normalized URL (see link_previews.preview_content_key).
+    Failed fetches are stored too, with a shorter lifetime, so a dead link
+    is not refetched for every post that mentions it.
+    """
+
+    STATUS_CHOICES = [('ok', 'OK'), ('failed', 'Failed')]
+
+    created = models.DateTimeField(auto_now_add=True)
+    key = models.CharField(max_length=2000, unique=True)
+    url = models.URLField(max_length=2000)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES)
+    fetched_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    kind = models.CharField(max_length=16, blank=True)
+    title = models.CharField(max_length=500, blank=True)
+    description = models.TextField(blank=True)
+    site_name = models.CharField(max_length=200, blank=True)
+    author_name = models.CharField(max_length=200, blank=True)
+    author_handle = models.CharField(max_length=100, blank=True)
+    embed_id = models.CharField(max_length=100, blank=True)
+    extra = models.JSONField(default=dict, blank=True)
+    published_at = models.DateField(null=True, blank=True)
+    image = models.ImageField(upload_to=SHARED_PREVIEW_IMAGE_DIR, blank=True)
+    # HTTP validators from the page at url, sent back when revalidating it.
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+
+    objects = LinkPreviewContentQuerySet.as_manager()
+
+    def __str__(self):
+        """Return a readable shared preview label."""
+        return f'{self.status} preview content for {self.key}'
+
+
 class LinkPreview(models.Model):
     """Fetched rich-card metadata for a URL mentioned in a post."""
 
@@ -326,14 +584,17 @@ class LinkPreview(models.Model):
         """Return a readable preview label."""
         return f'{self.kind} preview for post {self.post_id}'
 
+    def save(self, *args, **kwargs):
+        """Save the preview and invalidate the post's cached serializer fragment."""
+        super().save(*args, **kwargs)
+        Post.objects.filter(pk=self.post_id).bump_fragment_version()
+
     def delete(self, *args, **kwargs):
-        """Delete the stored preview image and the database row."""
-        if self.image:
-            try:
-                self.image.storage.delete(self.image.name)
-            except Exception as e:
-                logger.error(f"Error deleting link preview image {self.image.name}: {str(e)}")
+        """Delete the database row and queue the preview's own image for deletion."""
+        if self.image and not self.image.name.startswith(SHARED_PREVIEW_IMAGE_DIR):
+            queue_storage_deletions(storage_names=[self.image.name])
 
+        Post.objects.filter(pk=self.post_id).bump_fragment_version()
         return super().delete(*args, **kwargs)
 
 
@@ -355,6 +616,23 @@ class PostView(models.Model):
         """Return a readable post view label."""
         return f'{self.viewer_key} viewed post {self.post_id}'
 
+    def save(self, *args, **kwargs):
+        """Save the view and count it on the post when newly created."""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                adjust_post_counter(self.post_id, 'view_count', 1)
+
+    def delete(self, *args, **kwargs):
+        """Delete the view and uncount it on the post."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            # A concurrent delete of the same row already uncounted it.
+            if result[1].get(self._meta.label):
+                adjust_post_counter(self.post_id, 'view_count', -1)
+        return result
+
 
 class Like(models.Model):
     """A user's like for a post."""
@@ -376,6 +654,23 @@ class Like(models.Model):
         """Return a readable like label."""
         return f'{self.user} likes post {self.post_id}'
 
+    def save(self, *args, **kwargs):
+        """Save the like and count it on the post when newly created."""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                adjust_post_counter(self.post_id, 'like_count', 1)
+
+    def delete(self, *args, **kwargs):
+        """Delete the like and uncount it on the post."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            # A concurrent delete of the same row already uncounted it.
+            if result[1].get(self._meta.label):
+                adjust_post_counter(self.post_id, 'like_count', -1)
+        return result
+
 
 class Comment(models.Model):
     """A comment on a post."""
@@ -394,3 +689,20 @@ class Comment(models.Model):
     def __str__(self):
         """Return a readable comment label."""
         return f'Comment by {self.author} on post {self.post_id}'
+
+    def save(self, *args, **kwargs):
+        """Save the comment and count it on the post when newly created."""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                adjust_post_counter(self.post_id, 'comment_count', 1)
+
+    def delete(self, *args, **kwargs):
+        """Delete the comment and uncount it on the post."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            # A concurrent delete of the same row already uncounted it.
+            if result[1].get(self._meta.label):
+                adjust_post_counter(self.post_id, 'comment_count', -1)
+        return result
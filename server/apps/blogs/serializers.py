@@ -1,12 +1,14 @@
 """Serializers for blog API resources."""
 
+import hashlib
 import logging
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.urls import reverse
 from rest_framework import serializers
 
-from apps.uploads.s3 import generate_presigned_get_url
+from apps.uploads.s3 import generate_presigned_get_url, generate_presigned_get_urls
 from apps.users.utils import get_avatar_url
 
 from .models import Comment, LinkPreview, Media, Post
@@ -15,6 +17,38 @@ logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+POST_FRAGMENT_CACHE = 'post_fragments'
+
+# Fields that depend on the viewer or change without a fragment_version bump.
+# They are left out of cached fragments and filled in on every request.
+POST_OVERLAY_FIELDS = frozenset(
+    {'post_set', 'liked', 'share_token', 'like_count', 'comment_count', 'view_count'}
+)
+
+# Media fields whose storage URLs may be relative in a cached fragment.
+MEDIA_FILE_URL_FIELDS = ('file', 'mp3_file', 'thumbnail')
+
+
+def post_fragment_key(post):
+    """Return the fragment cache key for a post and its current author details.
+
+    The author part is a digest of the embedded author fields, so renames and
+    avatar changes miss the cache without touching every post row.
+    """
+    author = post.author
+    avatar = getattr(author, 'avatar', None)
+    author_fields = '\x1f'.join(
+        [
+            str(author.pk),
+            author.username,
+            author.first_name,
+            author.last_name,
+            avatar.name if avatar else '',
+        ]
+    )
+    digest = hashlib.blake2b(author_fields.encode(), digest_size=8).hexdigest()
+    return f'post:{post.pk}:{post.fragment_version}:{digest}'
+
 
 class UserNameSerializer(serializers.ModelSerializer):
     """Compact user serializer for embedded author data."""
@@ -69,12 +103,16 @@ class MediaSerializer(serializers.ModelSerializer):
             'transcript',
             'transcript_status',
             'alt_text',
+            'mime_type',
+            'size',
+            'width',
+            'height',
             'signed_url',
         ]
 
     def get_signed_url(self, obj):
         """Return a presigned object URL for S3-backed media."""
-        if not obj.s3_file_key:
+        if not obj.s3_file_key or not self.context.get('sign_urls', True):
             return None
         try:
             return generate_presigned_get_url(obj.s3_file_key)
@@ -131,16 +169,54 @@ class LinkPreviewSerializer(serializers.ModelSerializer):
         return url
 
 
+class PostListSerializer(serializers.ListSerializer):
+    """List serializer that reads post fragments from the cache in one batch."""
+
+    def to_representation(self, data):
+        """Serialize posts, rebuilding only fragments missing from the cache."""
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        cache = caches[POST_FRAGMENT_CACHE]
+        keys = [post_fragment_key(post) for post in posts]
+        cached = cache.get_many(keys)
+        signed_urls = self._sign_media_urls(posts)
+
+        missing = {}
+        results = []
+        for post, key in zip(posts, keys, strict=True):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = missing[key] = self.child.build_fragment(post)
+            results.append(self.child.overlay(post, fragment, signed_urls))
+        if missing:
+            cache.set_many(missing)
+        return results
+
+    def _sign_media_urls(self, posts):
+        """Sign every S3 media key on the page in one batch."""
+        keys = {post.media.s3_file_key for post in posts if post.media and post.media.s3_file_key}
+        if not keys:
+            return {}
+        try:
+            return generate_presigned_get_urls(keys)
+        except Exception:
+            # overlay() falls back to signing, and logging, one key at a time.
+            logger.exception('Failed to batch sign %d media URLs', len(keys))
+            return {}
+
+
 class PostSerializer(serializers.HyperlinkedModelSerializer):
-    """Serializer for post read responses."""
+    """Serializer for post read responses.
+
+    Everything except POST_OVERLAY_FIELDS is cached per post under
+    post_fragment_key; signed media URLs and absolute media file and preview
+    image URLs are also rebuilt per request since they expire or depend on
+    the host.
+    """
 
     author = UserNameSerializer(read_only=True)
     media = MediaSerializer(read_only=True)
     link_previews = serializers.SerializerMethodField()
     post_set = serializers.SerializerMethodField()
-    like_count = serializers.SerializerMethodField()
-    comment_count = serializers.SerializerMethodField()
-    view_count = serializers.SerializerMethodField()
     liked = serializers.SerializerMethodField()
     share_token = serializers.SerializerMethodField()
 
@@ -168,24 +244,79 @@ class PostSerializer(serializers.HyperlinkedModelSerializer):
             'view_count',
             'liked',
         ]
-        read_only_fields = ['is_draft', 'pinned_at']
-
-    def get_like_count(self, obj):
-        """Return the annotated or computed like count."""
-        # Prefer the queryset annotation; fall back to a query for
-        # instances serialized outside the annotated queryset (e.g. create responses).
-        count = getattr(obj, 'like_count', None)
-        return count if count is not None else obj.likes.count()
+        read_only_fields = [
+            'is_draft',
+            'pinned_at',
+            'like_count',
+            'comment_count',
+            'view_count',
+        ]
+        list_serializer_class = PostListSerializer
+
+    def to_representation(self, instance):
+        """Serialize a post from its cached fragment plus per-request fields."""
+        cache = caches[POST_FRAGMENT_CACHE]
+        key = post_fragment_key(instance)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = self.build_fragment(instance)
+            cache.set(key, fragment)
+        return self.overlay(instance, fragment)
+
+    def build_fragment(self, instance):
+        """Serialize the cacheable, viewer-independent fields of a post."""
+        fragment = {}
+        for field in self._readable_fields:
+            if field.field_name in POST_OVERLAY_FIELDS:
+                continue
+            attribute = field.get_attribute(instance)
+            if attribute is None:
+                fragment[field.field_name] = None
+            elif field.field_name == 'media':
+                # Signed URLs expire and file URLs depend on the host, so
+                # overlay() signs and absolutizes them per request.
+                fragment['media'] = MediaSerializer(attribute, context={'sign_urls': False}).data
+            else:
+                fragment[field.field_name] = field.to_representation(attribute)
+        return fragment
+
+    def overlay(self, instance, fragment, signed_urls=None):
+        """Combine a cached fragment with the fields computed per request.
+
+        Args:
+            instance: The post being serialized.
+            fragment: The post's cached fragment from build_fragment().
+            signed_urls: Optional presigned media URLs keyed by S3 object key.
+        """
+        data = {}
+        for field_name in self.Meta.fields:
+            if field_name in POST_OVERLAY_FIELDS:
+                field = self.fields[field_name]
+                data[field_name] = field.to_representation(field.get_attribute(instance))
+            else:
+                data[field_name] = fragment[field_name]
 
-    def get_comment_count(self, obj):
-        """Return the annotated or computed comment count."""
-        count = getattr(obj, 'comment_count', None)
-        return count if count is not None else obj.comments.count()
+        request = self.context.get('request')
+        if data['media'] is not None:
+            signed_url = (signed_urls or {}).get(instance.media.s3_file_key)
+            if signed_url is None:
+                signed_url = self.fields['media'].get_signed_url(instance.media)
+            data['media'] = {**data['media'], 'signed_url': signed_url}
+            if request:
+                for field_name in MEDIA_FILE_URL_FIELDS:
+                    if data['media'][field_name]:
+                        data['media'][field_name] = request.build_absolute_uri(
+                            data['media'][field_name]
+                        )
 
-    def get_view_count(self, obj):
-        """Return the annotated or computed view count."""
-        count = getattr(obj, 'view_count', None)
-        return count if count is not None else obj.views.count()
+        if request:
+            data['link_previews'] = [
+                {**preview, 'image': request.build_absolute_uri(preview['image'])}
+                if preview['image']
+                else preview
+                for preview in data['link_previews']
+            ]
+        return data
 
     def get_liked(self, obj):
         """Return whether the request user has liked the post."""
@@ -215,7 +346,9 @@ class PostSerializer(serializers.HyperlinkedModelSerializer):
     def get_link_previews(self, obj):
         """Return successfully fetched link previews in stored order."""
         previews = [preview for preview in obj.link_previews.all() if preview.status == 'ok']
-        return LinkPreviewSerializer(previews, many=True, context=self.context).data
+        # No request in context: image URLs stay relative in the cached
+        # fragment and are made absolute in overlay().
+        return LinkPreviewSerializer(previews, many=True).data
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
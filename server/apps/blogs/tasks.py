@@ -1,19 +1,29 @@
 """Background tasks for the blogs app."""
 
+import contextlib
 import logging
 import os
+import tempfile
+from datetime import timedelta
 
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from django_tasks import task
 
-from .link_previews import fetch_preview_for
-from .models import Media, Post
+from apps.uploads.s3 import DELETE_OBJECTS_MAX_KEYS, delete_objects
+
+from .link_previews import BREAKER_COOLDOWN_SECONDS, fetch_previews
+from .models import Comment, Like, Media, Post, PostView, StorageDeletion
 from .transcription import transcribe_audio
 from .utils import (
+    analyze_media,
     convert_to_mp3,
-    generate_audio_waveform,
+    describe_media_file,
     generate_image_rendition,
-    generate_video_poster,
     save_media_thumbnail,
 )
 
@@ -33,6 +43,17 @@ WHISPER_FORMATS = {
     '.webm',
 }
 
+# Queued deletions that keep failing stay in the table for inspection.
+MAX_STORAGE_DELETION_ATTEMPTS = 5
+
+# Rows removed per DELETE when purging a deleted post, so other writers
+# only ever wait for one short transaction.
+PURGE_BATCH_SIZE = 500
+
+# Times a post's previews are put off while a provider's circuit breaker is
+# open before they are given up on as failed.
+MAX_PREVIEW_DEFERRALS = 5
+
 
 @task()
 def transcribe_post_media(media_id: int) -> None:
@@ -62,6 +83,7 @@ def transcribe_post_media(media_id: int) -> None:
         # Leave a visible failure marker for the author, then let the task
         # framework record the exception.
         Media.objects.filter(pk=media_id).update(transcript_status='error')
+        Post.objects.filter(media=media_id).bump_fragment_version()
         raise
 
     media.transcript = transcript
@@ -89,49 +111,171 @@ def process_post_media(media_id: int) -> None:
 
 
 @task()
-def fetch_link_previews(post_id: int) -> None:
-    """Fetch pending link previews for a post."""
+def fetch_link_previews(post_id: int, deferrals: int = 0) -> None:
+    """Fetch a post's pending link previews concurrently.
+
+    Previews left pending because a provider's circuit breaker is open are
+    retried after the breaker cooldown, up to MAX_PREVIEW_DEFERRALS times.
+    After that, or when the task backend cannot run tasks later, they are
+    marked failed for refresh_link_previews to retry.
+    """
     post = Post.objects.filter(pk=post_id).first()
     if post is None:
         return
 
-    for preview in post.link_previews.filter(status='pending'):
-        try:
-            fetch_preview_for(preview)
-        except Exception:
-            logger.exception('Error fetching link preview %s for post %s', preview.pk, post_id)
-            preview.status = 'failed'
-            preview.fetched_at = timezone.now()
-            preview.save(update_fields=['status', 'fetched_at', 'fetch_attempts'])
+    fetch_previews(list(post.link_previews.filter(status='pending')))
+
+    deferred = post.link_previews.filter(status='pending')
+    if not deferred.exists():
+        return
+    if deferrals < MAX_PREVIEW_DEFERRALS and fetch_link_previews.get_backend().supports_defer:
+        run_after = timezone.now() + timedelta(seconds=BREAKER_COOLDOWN_SECONDS)
+        fetch_link_previews.using(run_after=run_after).enqueue(post_id, deferrals + 1)
+    else:
+        deferred.update(status='failed', fetched_at=timezone.now())
+
+
+@task()
+def drain_storage_deletions() -> None:
+    """Delete queued stored files, up to DELETE_OBJECTS_MAX_KEYS per request.
+
+    Object-storage keys go out in DeleteObjects batches; files in local
+    storage are removed one by one along with emptied media directories.
+    Deleted rows leave the queue; failed ones record the error and are
+    retried by the next drain.
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            StorageDeletion.objects.filter(
+                pk__gt=last_id, attempts__lt=MAX_STORAGE_DELETION_ATTEMPTS
+            ).order_by('pk')[:DELETE_OBJECTS_MAX_KEYS]
+        )
+        if not batch:
+            return
+        last_id = batch[-1].pk
+
+        errors = _delete_stored_files(batch)
+        StorageDeletion.objects.filter(
+            pk__in=[row.pk for row in batch if row.pk not in errors]
+        ).delete()
+        for row_id, error in errors.items():
+            StorageDeletion.objects.filter(pk=row_id).update(
+                attempts=F('attempts') + 1, last_error=error
+            )
+        if errors:
+            logger.warning('Failed to delete %d of %d stored files', len(errors), len(batch))
+
+
+@task()
+def purge_deleted_posts() -> None:
+    """Remove soft-deleted posts along with their views, likes, and comments.
+
+    Dependent rows go PURGE_BATCH_SIZE at a time, each chunk in its own
+    transaction; the post row itself is deleted last, which queues its
+    media and preview files for drain_storage_deletions.
+    """
+    post_ids = list(Post.objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+    for post_id in post_ids:
+        for model in (PostView, Like, Comment):
+            while True:
+                batch = list(
+                    model.objects.filter(post_id=post_id).values_list('pk', flat=True)[
+                        :PURGE_BATCH_SIZE
+                    ]
+                )
+                if not batch:
+                    break
+                # A queryset delete skips the per-row counter updates.
+                model.objects.filter(pk__in=batch).delete()
+
+        with transaction.atomic():
+            post = (
+                Post.objects.select_related('media')
+                .filter(pk=post_id, deleted_at__isnull=False)
+                .first()
+            )
+            if post is not None:
+                post.delete()
 
 
-def _process_video_media(media: Media) -> None:
-    with media.local_copy() as path:
-        poster = generate_video_poster(path)
+def _delete_stored_files(rows: list[StorageDeletion]) -> dict[int, str]:
+    """Delete each row's file and return an error message per failed row id."""
+    object_rows = {}
+    errors = {}
+    for row in rows:
+        if row.target == StorageDeletion.TARGET_BUCKET or not settings.USE_LOCAL_FILE_STORAGE:
+            # Default storage is the same bucket, keyed by file name.
+            object_rows.setdefault(row.name, []).append(row.pk)
+            continue
+        try:
+            default_storage.delete(row.name)
+        except Exception as error:
+            errors[row.pk] = str(error)
+            continue
+        if row.name.startswith('post/'):
+            # Media files live in post/<id>/media/; drop the directory once empty.
+            with contextlib.suppress(OSError):
+                os.rmdir(os.path.dirname(default_storage.path(row.name)))
+
+    if object_rows:
+        for key, error in delete_objects(object_rows).items():
+            errors.update(dict.fromkeys(object_rows[key], error))
+    return errors
 
-    if poster is not None:
-        save_media_thumbnail(media, poster, 'poster.jpg')
 
+def _process_time_based_media(media: Media) -> None:
+    """Analyze audio or video with a single decode and write the results in one update."""
+    replaced_names = []
+    with (
+        media.local_copy(original=True) as path,
+        tempfile.TemporaryDirectory() as output_dir,
+    ):
+        detected = describe_media_file(path, media.media_type, probe=False)
+        updated = media.apply_sniffed_mime_type(detected['mime_type'])
+        updated += media.apply_file_metadata(detected)
+        analysis = analyze_media(path, media.media_type, output_dir)
+        if analysis is not None:
+            updated += media.apply_file_metadata(
+                {key: analysis[key] for key in ('duration', 'width', 'height')}
+            )
+            if analysis['waveform'] is not None:
+                media.waveform = analysis['waveform']
+                updated.append('waveform')
+            if analysis['poster'] is not None:
+                replaced_names.append(media.thumbnail.name)
+                media.thumbnail.save('poster.jpg', analysis['poster'], save=False)
+                updated.append('thumbnail')
+            if analysis['speech_path']:
+                replaced_names.append(media.mp3_file.name)
+                with open(analysis['speech_path'], 'rb') as speech_file:
+                    media.mp3_file.save('speech.mp3', File(speech_file), save=False)
+                updated.append('mp3_file')
 
-def _process_audio_media(media: Media) -> None:
-    with media.local_copy() as path:
-        waveform = generate_audio_waveform(path)
+        if updated:
+            media.save(update_fields=updated)
 
-    if waveform is not None:
-        media.waveform = waveform
-        media.save(update_fields=['waveform'])
+    current_names = {media.thumbnail.name, media.mp3_file.name}
+    for name in replaced_names:
+        if name and name not in current_names:
+            media.thumbnail.storage.delete(name)
 
 
 def _process_image_media(media: Media) -> None:
-    with media.local_copy() as path:
+    with media.local_copy(original=True) as path:
+        detected = describe_media_file(path, media.media_type)
+        updated = media.apply_sniffed_mime_type(detected['mime_type'])
+        updated += media.apply_file_metadata(detected)
         rendition = generate_image_rendition(path)
 
     if rendition is not None:
-        save_media_thumbnail(media, rendition, 'rendition.jpg')
+        save_media_thumbnail(media, rendition, 'rendition.jpg', update_fields=updated)
+    elif updated:
+        media.save(update_fields=updated)
 
 
 MEDIA_PROCESSORS = {
-    'video': _process_video_media,
-    'audio': _process_audio_media,
+    'video': _process_time_based_media,
+    'audio': _process_time_based_media,
     'image': _process_image_media,
 }
@@ -1,12 +1,15 @@
 """Test suite for the blogs app."""
 
 import os
+import shutil
 import tempfile
 
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.test import TestCase, override_settings
 
+from ..link_previews import dns_cache, host_scheduler
+
 
 # Tests must run tasks inline regardless of the env's TASKS_IMMEDIATE.
 @override_settings(
@@ -21,6 +24,32 @@ class BaseTestCase(TestCase):
         # Rate-limit counters live in the shared cache; clear it so requests
         # made by earlier tests don't trip throttles in later ones.
         cache.clear()
+        # Test transactions roll back, so post ids and fragment versions repeat.
+        caches['post_fragments'].clear()
+        # Tests patch DNS answers, so resolve every hostname afresh.
+        dns_cache.clear()
+        host_scheduler.clear()
+        # Downloaded S3 objects are cached on disk across calls; start empty.
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        download_cache = override_settings(MEDIA_DOWNLOAD_CACHE_DIR=cache_dir)
+        download_cache.enable()
+        self.addCleanup(download_cache.disable)
+        # Breaker state is kept on disk for every process on the host; give
+        # each test its own directory so breakers start closed.
+        breaker_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, breaker_dir, ignore_errors=True)
+        breaker_cache = override_settings(
+            CACHES={
+                **settings.CACHES,
+                'link_preview_breakers': {
+                    **settings.CACHES['link_preview_breakers'],
+                    'LOCATION': breaker_dir,
+                },
+            }
+        )
+        breaker_cache.enable()
+        self.addCleanup(breaker_cache.disable)
 
 
 class ViewTestCase(BaseTestCase):
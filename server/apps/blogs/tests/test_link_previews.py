@@ -1,44 +1,95 @@
 """Tests for post link preview extraction, fetching, API serialization, and images."""
 
+import asyncio
+import contextlib
 import gzip
+import ipaddress
 import json
 import os
 import socket
 import tempfile
+import threading
 from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import BytesIO, StringIO
 from unittest import mock
 
+import httpcore
 import httpx
 from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.files.base import ContentFile
 from django.core.management import call_command
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from PIL import Image
 from rest_framework.test import APIClient
 
 from ..link_previews import (
+    BREAKER_CACHE,
+    BREAKER_COOLDOWN_SECONDS,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HOSTS_CACHE_KEY,
+    DNS_CACHE_TTL,
+    HOST_BURST,
+    HOST_REQUESTS_PER_SECOND,
+    MAX_CONCURRENT_FETCHES_PER_HOST,
+    FetchSession,
+    HostUnavailableError,
+    PinnedNetworkBackend,
+    PinnedTransport,
+    _breaker_cache_keys,
+    _record_failure,
+    _record_success,
     _safe_get,
+    _url_is_safe,
+    breaker_state,
     detect_kind,
     extract_urls,
     fetch_chatgpt,
     fetch_generic,
     fetch_hackernews,
+    fetch_hackernews_previews,
     fetch_preview_for,
     fetch_reddit,
     fetch_twitter,
     fetch_youtube,
+    host_metrics,
+    host_scheduler,
+    preview_content_key,
     sync_link_previews,
 )
-from ..models import VISIBILITY_PRIVATE, VISIBILITY_UNLISTED, LinkPreview, Post
-from ..tasks import fetch_link_previews
+from ..models import (
+    SHARED_PREVIEW_IMAGE_DIR,
+    VISIBILITY_PRIVATE,
+    VISIBILITY_UNLISTED,
+    LinkPreview,
+    LinkPreviewContent,
+    Post,
+    StorageDeletion,
+    _enqueue_storage_deletion_drain,
+)
+from ..tasks import MAX_PREVIEW_DEFERRALS, fetch_link_previews
 from . import BaseTestCase, ViewTestCase
 
 User = get_user_model()
 
 
+def serve_pages(*responses):
+    """Patch the streaming fetch so successive page scans read the given responses."""
+    queue = list(responses)
+
+    @contextlib.asynccontextmanager
+    async def stream(url, headers=None):
+        yield queue.pop(0)
+
+    return mock.patch('apps.blogs.link_previews._safe_stream', side_effect=stream)
+
+
 class LinkPreviewExtractionTests(BaseTestCase):
     """Tests for URL extraction and provider detection."""
 
@@ -120,45 +171,29 @@ class LinkPreviewExtractionTests(BaseTestCase):
 class LinkPreviewSsrfTests(BaseTestCase):
     """Tests for the SSRF guard around outbound fetches."""
 
-    class FakeStream:
-        """Context manager returning a tiny successful HTTPX response."""
-
-        def __init__(self, url):
-            """Store a canned response for the URL."""
-            self.response = httpx.Response(
-                200,
-                headers={'content-type': 'text/html'},
-                content=b'ok',
-                request=httpx.Request('GET', url),
-            )
-
-        def __enter__(self):
-            """Enter the fake context."""
-            return self.response
-
-        def __exit__(self, exc_type, exc, traceback):
-            """Exit without suppressing exceptions."""
-            return False
+    def setUp(self):
+        """Record requests that reach the stand-in network."""
+        super().setUp()
+        self.requests = []
 
-    class FakeClient:
-        """Minimal stand-in for httpx.Client."""
+    def _ok(self, request):
+        self.requests.append(request)
+        return httpx.Response(200, headers={'content-type': 'text/html'}, content=b'ok')
 
-        def __init__(self):
-            """Initialize call tracking."""
-            self.stream_calls = []
+    def _get(self, url, handler=None, max_bytes=16):
+        """Run _safe_get in a session whose client answers with handler."""
 
-        def __enter__(self):
-            """Enter the fake context."""
-            return self
+        async def get():
+            async with FetchSession(transport=httpx.MockTransport(handler or self._ok)):
+                return await _safe_get(url, max_bytes=max_bytes)
 
-        def __exit__(self, exc_type, exc, traceback):
-            """Exit without suppressing exceptions."""
-            return False
+        return asyncio.run(get())
 
-        def stream(self, method, url):
-            """Record the call and return a fake stream."""
-            self.stream_calls.append((method, url))
-            return LinkPreviewSsrfTests.FakeStream(url)
+    def _resolve_to(self, address):
+        return mock.patch(
+            'apps.blogs.link_previews.socket.getaddrinfo',
+            return_value=[(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 443))],
+        )
 
     def test_safe_get_refuses_local_and_invalid_targets(self):
         """Unsafe schemes, literals, and local hostnames should never be requested."""
@@ -169,95 +204,351 @@ class LinkPreviewSsrfTests(BaseTestCase):
             'ftp://example.com/file',
         ]:
             with self.subTest(url=url):
-                self.assertIsNone(_safe_get(url, max_bytes=16))
+                self.assertIsNone(self._get(url))
+        self.assertEqual(self.requests, [])
 
     def test_safe_get_refuses_hostname_resolving_to_private_address(self):
         """Any private resolved address should stop the fetch."""
-        fake_client = self.FakeClient()
-        with (
-            mock.patch(
-                'apps.blogs.link_previews.socket.getaddrinfo',
-                return_value=[
-                    (
-                        socket.AF_INET,
-                        socket.SOCK_STREAM,
-                        6,
-                        '',
-                        ('10.0.0.5', 443),
-                    )
-                ],
-            ),
-            mock.patch('apps.blogs.link_previews.httpx.Client', return_value=fake_client),
-        ):
-            self.assertIsNone(_safe_get('https://example.com/', max_bytes=16))
+        with self._resolve_to('10.0.0.5'):
+            self.assertIsNone(self._get('https://example.com/'))
 
-        self.assertEqual(fake_client.stream_calls, [])
+        self.assertEqual(self.requests, [])
 
     def test_safe_get_allows_public_resolution_and_reads_response(self):
         """A public resolved address should pass the gate and call the HTTP client."""
-        fake_client = self.FakeClient()
-        with (
-            mock.patch(
-                'apps.blogs.link_previews.socket.getaddrinfo',
-                return_value=[
-                    (
-                        socket.AF_INET,
-                        socket.SOCK_STREAM,
-                        6,
-                        '',
-                        ('93.184.216.34', 443),
-                    )
-                ],
-            ),
-            mock.patch('apps.blogs.link_previews.httpx.Client', return_value=fake_client),
-        ):
-            response = _safe_get('https://example.com/', max_bytes=16)
+        with self._resolve_to('93.184.216.34'):
+            response = self._get('https://example.com/')
 
         self.assertIsNotNone(response)
         self.assertEqual(response.content, b'ok')
-        self.assertEqual(fake_client.stream_calls, [('GET', 'https://example.com/')])
+        self.assertEqual([str(request.url) for request in self.requests], ['https://example.com/'])
+
+    def test_safe_get_checks_every_redirect_target(self):
+        """A redirect to a private address is refused before it is requested."""
+
+        def redirect(request):
+            self.requests.append(request)
+            return httpx.Response(302, headers={'location': 'http://10.0.0.5/admin'})
+
+        with self._resolve_to('93.184.216.34'):
+            self.assertIsNone(self._get('https://example.com/', redirect))
+
+        self.assertEqual([str(request.url) for request in self.requests], ['https://example.com/'])
 
     def test_safe_get_does_not_double_decode_gzip_responses(self):
         """Streamed bodies are already decompressed; rebuilding must not decode again."""
 
-        class GzipStream:
-            """Context manager returning a gzip-encoded streaming response."""
+        def gzipped(request):
+            return httpx.Response(
+                200,
+                headers={'content-type': 'text/html', 'content-encoding': 'gzip'},
+                content=gzip.compress(b'<html>ok</html>'),
+            )
 
-            def __enter__(self):
-                """Enter the fake context."""
-                return httpx.Response(
-                    200,
-                    headers={'content-type': 'text/html', 'content-encoding': 'gzip'},
-                    stream=httpx.ByteStream(gzip.compress(b'<html>ok</html>')),
-                    request=httpx.Request('GET', 'https://example.com/'),
-                )
+        with self._resolve_to('93.184.216.34'):
+            response = self._get('https://example.com/', gzipped, max_bytes=1024)
 
-            def __exit__(self, exc_type, exc, traceback):
-                """Exit without suppressing exceptions."""
-                return False
+        self.assertIsNotNone(response)
+        self.assertEqual(response.content, b'<html>ok</html>')
+        self.assertNotIn('content-encoding', response.headers)
 
-        fake_client = self.FakeClient()
-        fake_client.stream = lambda method, url: GzipStream()
+    def test_dns_answers_are_reused_until_the_cache_ttl_passes(self):
+        """Each redirect hop and the connection itself share one lookup per TTL."""
+        now = 1000.0
         with (
+            self._resolve_to('93.184.216.34') as mock_resolve,
+            mock.patch('apps.blogs.link_previews.time.monotonic', side_effect=lambda: now),
+        ):
+            self.assertTrue(_url_is_safe('https://example.com/a'))
+            self.assertTrue(_url_is_safe('https://EXAMPLE.com/b'))
+            self.assertEqual(mock_resolve.call_count, 1)
+
+            now += DNS_CACHE_TTL + 1
+            self.assertTrue(_url_is_safe('https://example.com/a'))
+            self.assertEqual(mock_resolve.call_count, 2)
+
+    def test_pinned_transport_connects_to_the_vetted_address_with_the_original_host(self):
+        """The connection goes to the resolved address while Host names the site."""
+        hosts = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                hosts.append(self.headers['Host'])
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_port
+
+        async def get():
+            transport = PinnedTransport(limits=httpx.Limits())
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await client.get(f'http://pinned.test:{port}/')
+
+        # Loopback stands in for a public address here.
+        with (
+            self._resolve_to('127.0.0.1') as mock_resolve,
             mock.patch(
-                'apps.blogs.link_previews.socket.getaddrinfo',
-                return_value=[
-                    (
-                        socket.AF_INET,
-                        socket.SOCK_STREAM,
-                        6,
-                        '',
-                        ('93.184.216.34', 443),
-                    )
-                ],
+                'apps.blogs.link_previews._address_is_safe',
+                side_effect=lambda address: bool(ipaddress.ip_address(address)),
             ),
-            mock.patch('apps.blogs.link_previews.httpx.Client', return_value=fake_client),
         ):
-            response = _safe_get('https://example.com/', max_bytes=1024)
+            response = asyncio.run(get())
 
-        self.assertIsNotNone(response)
-        self.assertEqual(response.content, b'<html>ok</html>')
-        self.assertNotIn('content-encoding', response.headers)
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(hosts, [f'pinned.test:{port}'])
+        self.assertEqual(mock_resolve.call_args_list[0].args[0], 'pinned.test')
+
+    def test_pinned_backend_refuses_a_rebound_private_address(self):
+        """A hostname that now resolves privately is never connected to."""
+        with (
+            self._resolve_to('10.0.0.5'),
+            mock.patch.object(httpcore.AnyIOBackend, 'connect_tcp') as mock_connect,
+        ):
+            with self.assertRaises(httpcore.ConnectError):
+                asyncio.run(PinnedNetworkBackend().connect_tcp('rebind.example.com', 443))
+
+        mock_connect.assert_not_called()
+
+    def test_session_bounds_concurrent_requests_per_host(self):
+        """Previews fetched together share the client but respect the per-host limit."""
+        in_flight = {'now': 0, 'peak': 0}
+
+        async def slow(request):
+            in_flight['now'] += 1
+            in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+            await asyncio.sleep(0.01)
+            in_flight['now'] -= 1
+            return httpx.Response(200, content=b'ok')
+
+        async def fetch_many():
+            async with FetchSession(transport=httpx.MockTransport(slow)):
+                return await asyncio.gather(
+                    *(_safe_get(f'https://example.com/{n}', max_bytes=16) for n in range(6))
+                )
+
+        with self._resolve_to('93.184.216.34'):
+            responses = asyncio.run(fetch_many())
+
+        self.assertTrue(all(response is not None for response in responses))
+        self.assertEqual(in_flight['peak'], MAX_CONCURRENT_FETCHES_PER_HOST)
+
+
+class LinkPreviewStreamingTests(BaseTestCase):
+    """Tests for reading only as much of an HTML page as the metadata needs."""
+
+    def setUp(self):
+        """Record the body chunks the stand-in server actually sends."""
+        super().setUp()
+        self.sent = []
+
+    def _page(self, chunks, filler_chunks=50):
+        async def body():
+            for chunk in [*chunks, *[b'<p>filler</p>' * 100] * filler_chunks]:
+                self.sent.append(chunk)
+                yield chunk
+
+        return httpx.Response(
+            200, headers={'content-type': 'text/html; charset=utf-8'}, content=body()
+        )
+
+    def _run(self, fetcher, handler):
+        async def run():
+            async with FetchSession(transport=httpx.MockTransport(handler)):
+                return await fetcher
+
+        with mock.patch('apps.blogs.link_previews._url_is_safe', return_value=True):
+            return asyncio.run(run())
+
+    def test_generic_scan_stops_at_the_end_of_the_head(self):
+        """The body after </head> is never downloaded."""
+        chunks = [
+            b'<html><head><title>Fallback</title><meta property="og:title" content="Caf\xc3',
+            b'\xa9 story"><meta name="description" content="Split">',
+            b'</head><body>',
+        ]
+        data = self._run(
+            fetch_generic('https://example.com/story'), lambda request: self._page(chunks)
+        )
+
+        self.assertEqual(data['title'], 'Café story')
+        self.assertEqual(data['description'], 'Split')
+        self.assertEqual(len(self.sent), 3)
+
+    def test_youtube_scan_stops_once_body_patterns_match(self):
+        """The watch page is read only until the handle and publish date are found."""
+        chunks = [
+            b'<html><head><meta property="og:title" content="Video">'
+            b'<meta property="og:description" content="About"></head><body>',
+            b'{"ownerProfileUrl":"http://www.youtube.com/@chan',
+            b'nel","publishDate":"2020-01-15T00:00:00-08:00"}',
+        ]
+
+        def handler(request):
+            if request.url.path == '/oembed':
+                return httpx.Response(200, json={'title': 'Video', 'author_name': 'Channel'})
+            return self._page(chunks)
+
+        data = self._run(
+            fetch_youtube('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ'), handler
+        )
+
+        self.assertEqual(data['author_handle'], 'channel')
+        self.assertEqual(data['published_at'], date(2020, 1, 15))
+        self.assertEqual(len(self.sent), 3)
+
+
+class LinkPreviewHostPolicyTests(BaseTestCase):
+    """Tests for per-host pacing and circuit breakers."""
+
+    def setUp(self):
+        """Let every URL through the SSRF check and record requests sent."""
+        super().setUp()
+        self.requests = []
+        patcher = mock.patch('apps.blogs.link_previews._url_is_safe', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_many(self, count, status_code=503, headers=None):
+        """Fetch example.com count times in a row, returning each result or exception."""
+
+        def handler(request):
+            self.requests.append(request)
+            return httpx.Response(status_code, headers=headers)
+
+        async def get_many():
+            results = []
+            async with FetchSession(transport=httpx.MockTransport(handler)):
+                for _ in range(count):
+                    try:
+                        results.append(await _safe_get('https://example.com/', max_bytes=16))
+                    except HostUnavailableError as error:
+                        results.append(error)
+            return results
+
+        return asyncio.run(get_many())
+
+    def test_token_bucket_allows_a_burst_then_spaces_requests(self):
+        """Requests beyond the burst wait their turn at the host's rate."""
+        delays = [host_scheduler.reserve('example.com') for _ in range(HOST_BURST + 2)]
+
+        self.assertEqual(delays[:HOST_BURST], [0.0] * HOST_BURST)
+        self.assertAlmostEqual(delays[HOST_BURST], 1 / HOST_REQUESTS_PER_SECOND, places=2)
+        self.assertAlmostEqual(delays[HOST_BURST + 1], 2 / HOST_REQUESTS_PER_SECOND, places=2)
+        self.assertEqual(host_scheduler.reserve('other.example.com'), 0.0)
+
+    def test_breaker_opens_after_repeated_failures_and_refuses_requests(self):
+        """Once open, requests to the host fail fast without reaching it."""
+        with mock.patch('apps.blogs.link_previews.HOST_BURST', 100):
+            results = self._get_many(BREAKER_FAILURE_THRESHOLD + 2)
+
+        self.assertEqual(len(self.requests), BREAKER_FAILURE_THRESHOLD)
+        self.assertTrue(all(isinstance(error, HostUnavailableError) for error in results[-2:]))
+        metrics = host_metrics()['example.com']
+        self.assertEqual(metrics['breaker'], 'open')
+        self.assertEqual(metrics['failures'], BREAKER_FAILURE_THRESHOLD)
+
+        # After the cooldown one request goes out, and success closes the breaker.
+        later = breaker_state('example.com')['open_until'] + 1
+        with mock.patch('apps.blogs.link_previews.time.time', return_value=later):
+            self.assertEqual(host_metrics()['example.com']['breaker'], 'half-open')
+            [response] = self._get_many(1, status_code=200)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(breaker_state('example.com')['failures'], 0)
+
+    def test_retry_after_lengthens_the_cooldown(self):
+        """A 429 with Retry-After keeps the breaker open at least that long."""
+        before = timezone.now().timestamp()
+        self._get_many(BREAKER_FAILURE_THRESHOLD, status_code=429, headers={'retry-after': '600'})
+
+        open_for = breaker_state('example.com')['open_until'] - before
+        self.assertGreater(open_for, BREAKER_COOLDOWN_SECONDS)
+        self.assertAlmostEqual(open_for, 600, delta=5)
+
+    def test_breaker_hosts_are_capped_and_dropped_when_their_breaker_closes(self):
+        """Only the newest failing hosts are listed, and a success removes a host."""
+        with mock.patch('apps.blogs.link_previews.BREAKER_MAX_TRACKED_HOSTS', 2):
+            for host in ('a.example.com', 'b.example.com', 'c.example.com'):
+                _record_failure(host)
+                _record_failure(host)
+
+        self.assertEqual(list(host_metrics()), ['b.example.com', 'c.example.com'])
+        self.assertEqual(host_metrics()['c.example.com']['failures'], 2)
+
+        _record_success('c.example.com')
+
+        self.assertEqual(list(host_metrics()), ['b.example.com'])
+        self.assertEqual(breaker_state('c.example.com')['failures'], 0)
+
+    def test_breaker_state_is_visible_to_other_processes(self):
+        """A cache built afresh from settings, as another worker would, sees the breaker."""
+        for _failure in range(BREAKER_FAILURE_THRESHOLD):
+            _record_failure('example.com')
+
+        other_process = caches.create_connection(BREAKER_CACHE)
+        self.assertNotIsInstance(other_process, LocMemCache)
+        failures_key, open_until_key = _breaker_cache_keys('example.com')
+        self.assertEqual(other_process.get(failures_key), BREAKER_FAILURE_THRESHOLD)
+        self.assertGreater(other_process.get(open_until_key), timezone.now().timestamp())
+        self.assertIn('example.com', other_process.get(BREAKER_HOSTS_CACHE_KEY))
+
+    def test_previews_behind_an_open_breaker_are_rescheduled(self):
+        """The task leaves them pending and runs again once the cooldown has passed."""
+        user = User.objects.create_user(username='breaker_author', password='testpass123')
+        post = Post.objects.create(author=user, body='https://example.com/story')
+        preview = LinkPreview.objects.create(post=post, url='https://example.com/story')
+        unavailable = HostUnavailableError('example.com', timezone.now().timestamp() + 60)
+
+        with (
+            override_settings(
+                TASKS={'default': {'BACKEND': 'django_tasks.backends.dummy.DummyBackend'}}
+            ),
+            mock.patch(
+                'apps.blogs.link_previews._fetch_preview_data', side_effect=unavailable
+            ) as mock_fetch,
+        ):
+            fetch_link_previews.call(post.pk)
+            [result] = fetch_link_previews.get_backend().results
+
+        mock_fetch.assert_called_once()
+        preview.refresh_from_db()
+        self.assertEqual(preview.status, 'pending')
+        self.assertEqual(preview.fetch_attempts, 0)
+        self.assertEqual(result.args, [post.pk, 1])
+        self.assertGreater(result.task.run_after, timezone.now())
+        self.assertFalse(LinkPreviewContent.objects.exists())
+
+        # Without deferred tasks, or after too many deferrals, the preview is failed.
+        with mock.patch('apps.blogs.link_previews._fetch_preview_data', side_effect=unavailable):
+            fetch_link_previews.call(post.pk, MAX_PREVIEW_DEFERRALS)
+
+        preview.refresh_from_db()
+        self.assertEqual(preview.status, 'failed')
+
+    def test_hosts_command_reports_breakers_and_pending_previews(self):
+        """The command lists breaker state next to each host's pending previews."""
+        self._get_many(BREAKER_FAILURE_THRESHOLD)
+        user = User.objects.create_user(username='hosts_author', password='testpass123')
+        post = Post.objects.create(author=user, body='Links')
+        LinkPreview.objects.create(post=post, url='https://example.com/a')
+        LinkPreview.objects.create(post=post, url='https://other.example.org/b', position=1)
+        output = StringIO()
+
+        call_command('link_preview_hosts', stdout=output)
+
+        lines = output.getvalue().strip().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertRegex(lines[0], r'^example\.com: 1 pending, breaker open \(5 failures\) until ')
+        self.assertEqual(lines[1], 'other.example.org: 1 pending')
 
 
 class LinkPreviewFetchTests(BaseTestCase):
@@ -346,8 +637,8 @@ class LinkPreviewFetchTests(BaseTestCase):
 
         with (
             mock.patch(
-                'apps.blogs.link_previews.fetch_hackernews',
-                return_value={**metadata, 'kind': 'hackernews', 'extra': {'score': 1}},
+                'apps.blogs.link_previews.fetch_hackernews_previews',
+                return_value={'123': {**metadata, 'kind': 'hackernews', 'extra': {'score': 1}}},
             ) as mock_hackernews,
             mock.patch(
                 'apps.blogs.link_previews.fetch_reddit',
@@ -362,9 +653,9 @@ class LinkPreviewFetchTests(BaseTestCase):
             fetch_preview_for(reddit)
             fetch_preview_for(chatgpt)
 
-        mock_hackernews.assert_called_once_with(hackernews.url, '123')
+        mock_hackernews.assert_any_call(['123'])
         mock_reddit.assert_called_once_with(reddit.url)
-        mock_chatgpt.assert_called_once_with(chatgpt.url)
+        mock_chatgpt.assert_called_once_with(chatgpt.url, validators=None)
         hackernews.refresh_from_db()
         reddit.refresh_from_db()
         chatgpt.refresh_from_db()
@@ -475,7 +766,9 @@ class LinkPreviewFetchTests(BaseTestCase):
             kind='generic',
         )
 
-        with mock.patch('apps.blogs.tasks.fetch_preview_for', side_effect=RuntimeError('boom')):
+        with mock.patch(
+            'apps.blogs.link_previews.fetch_generic', side_effect=RuntimeError('boom')
+        ):
             fetch_link_previews.call(self.post.pk)
 
         preview.refresh_from_db()
@@ -483,6 +776,178 @@ class LinkPreviewFetchTests(BaseTestCase):
         self.assertIsNotNone(preview.fetched_at)
 
 
+class SyncLinkPreviewsQueryTests(BaseTestCase):
+    """Tests for the fixed number of queries a link preview sync takes."""
+
+    def setUp(self):
+        """Create a user for posts."""
+        super().setUp()
+        self.user = User.objects.create_user(username='sync_author', password='testpass123')
+
+    def test_new_post_sync_takes_a_fixed_number_of_queries(self):
+        """0 URLs read the previews; 1 or 3 also read the store, bulk create, and bump once."""
+        cases = [
+            (0, 1),
+            (1, 4),
+            (3, 4),
+        ]
+        for url_count, queries in cases:
+            with self.subTest(url_count=url_count):
+                body = ' '.join(f'https://example.com/{number}' for number in range(url_count))
+                post = Post.objects.create(author=self.user, body=body)
+
+                with self.assertNumQueries(queries):
+                    pending = sync_link_previews(post)
+
+                self.assertEqual(pending, bool(url_count))
+                self.assertEqual(
+                    list(post.link_previews.values_list('url', 'position')),
+                    [(f'https://example.com/{number}', number) for number in range(url_count)],
+                )
+
+    def test_edit_sync_deletes_creates_and_updates_in_bulk(self):
+        """An edit that drops, adds, and moves URLs still takes one query per kind of write."""
+        post = Post.objects.create(
+            author=self.user, body='https://example.com/a https://example.com/b'
+        )
+        dropped = LinkPreview.objects.create(
+            post=post,
+            url='https://example.com/a',
+            status='ok',
+            image='link_previews/2026/01/own.jpg',
+        )
+        kept = LinkPreview.objects.create(
+            post=post, url='https://example.com/b', position=1, status='failed'
+        )
+        post.body = 'https://example.com/new https://example.com/b'
+        post.save(update_fields=['body'])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            # Read previews and store, queue the image, delete, create, update, bump.
+            with self.assertNumQueries(7):
+                self.assertTrue(sync_link_previews(post))
+
+        self.assertEqual(callbacks, [_enqueue_storage_deletion_drain])
+        self.assertFalse(LinkPreview.objects.filter(pk=dropped.pk).exists())
+        self.assertEqual(StorageDeletion.objects.get().name, 'link_previews/2026/01/own.jpg')
+        kept.refresh_from_db()
+        self.assertEqual((kept.position, kept.status), (1, 'pending'))
+        self.assertEqual(
+            list(post.link_previews.values_list('url', flat=True)),
+            ['https://example.com/new', 'https://example.com/b'],
+        )
+
+    def test_disabling_previews_deletes_every_row_at_once(self):
+        """Turning previews off deletes all rows with one query and leaves nothing pending."""
+        post = Post.objects.create(author=self.user, body='https://example.com/a')
+        sync_link_previews(post)
+        post.link_previews_enabled = False
+        post.save(update_fields=['link_previews_enabled'])
+
+        with self.assertNumQueries(3):
+            self.assertFalse(sync_link_previews(post))
+
+        self.assertFalse(post.link_previews.exists())
+
+
+class LinkPreviewContentStoreTests(BaseTestCase):
+    """Tests for preview content shared across posts linking the same URL."""
+
+    def setUp(self):
+        """Create a user for posts."""
+        super().setUp()
+        self.user = User.objects.create_user(username='shared_author', password='testpass123')
+
+    def _post(self, body):
+        post = Post.objects.create(author=self.user, body=body)
+        sync_link_previews(post)
+        return post
+
+    def test_content_key_normalizes_urls(self):
+        """Equivalent URL spellings share one key; provider items are keyed by id."""
+        self.assertEqual(
+            preview_content_key('HTTPS://Example.COM:443?b=2&utm_source=feed&a=1#section'),
+            'https://example.com/?a=1&b=2',
+        )
+        self.assertEqual(
+            preview_content_key('http://example.com:8080/Path'), 'http://example.com:8080/Path'
+        )
+        self.assertEqual(
+            preview_content_key('https://youtu.be/dQw4w9WgXcQ'),
+            preview_content_key('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10'),
+        )
+
+    def test_second_post_reuses_stored_content_and_image(self):
+        """A URL fetched for one post fills another post's preview without a fetch."""
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
+                first = self._post('https://example.com/story?utm_medium=social')
+                buffer = BytesIO()
+                Image.new('RGB', (2, 2), color='blue').save(buffer, format='JPEG')
+
+                with mock.patch(
+                    'apps.blogs.link_previews._fetch_preview_data',
+                    return_value=({'title': 'Shared story'}, buffer.getvalue()),
+                ):
+                    fetch_link_previews.call(first.pk)
+
+                with mock.patch('apps.blogs.link_previews._fetch_preview_data') as mock_fetch:
+                    second = self._post('Also https://example.com/story')
+                    fetch_link_previews.call(second.pk)
+                mock_fetch.assert_not_called()
+
+                first_preview = first.link_previews.get()
+                second_preview = second.link_previews.get()
+                self.assertEqual(second_preview.status, 'ok')
+                self.assertEqual(second_preview.title, 'Shared story')
+                self.assertEqual(second_preview.image.name, first_preview.image.name)
+                self.assertTrue(first_preview.image.name.startswith(SHARED_PREVIEW_IMAGE_DIR))
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    first.delete()
+                self.assertTrue(os.path.exists(second_preview.image.path))
+
+    def test_failed_fetch_is_not_repeated_until_it_expires(self):
+        """A dead URL is remembered briefly, then fetched again."""
+        with mock.patch(
+            'apps.blogs.link_previews._fetch_preview_data', return_value=(None, None)
+        ) as mock_fetch:
+            first = self._post('https://dead.example.com')
+            fetch_link_previews.call(first.pk)
+            second = self._post('https://dead.example.com/')
+            fetch_link_previews.call(second.pk)
+            self.assertEqual(mock_fetch.call_count, 1)
+            self.assertEqual(second.link_previews.get().status, 'failed')
+
+            LinkPreviewContent.objects.update(expires_at=timezone.now())
+            LinkPreview.objects.filter(post=first).update(status='pending')
+            fetch_link_previews.call(first.pk)
+        self.assertEqual(mock_fetch.call_count, 2)
+
+    def test_one_fetch_per_url_within_a_batch(self):
+        """Previews sharing a key in one batch cause a single fetch."""
+        post = Post.objects.create(author=self.user, body='Links')
+        previews = [
+            LinkPreview.objects.create(post=post, url=url, position=position)
+            for position, url in enumerate(
+                ['https://example.com/a?x=1&y=2', 'https://EXAMPLE.com/a?y=2&x=1']
+            )
+        ]
+
+        with mock.patch(
+            'apps.blogs.link_previews._fetch_preview_data',
+            return_value=({'title': 'Once'}, None),
+        ) as mock_fetch:
+            fetch_link_previews.call(post.pk)
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        for preview in previews:
+            preview.refresh_from_db()
+            self.assertEqual(preview.title, 'Once')
+        self.assertEqual(LinkPreviewContent.objects.get().key, 'https://example.com/a?x=1&y=2')
+        self.assertFalse(StorageDeletion.objects.exists())
+
+
 class LinkPreviewDateParsingTests(BaseTestCase):
     """Tests for publication-date extraction in the per-kind fetchers."""
 
@@ -510,7 +975,7 @@ class LinkPreviewDateParsingTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(oembed).encode(), 'application/json'),
         ):
-            data = fetch_twitter('https://x.com/jack/status/20', 'jack')
+            data = asyncio.run(fetch_twitter('https://x.com/jack/status/20', 'jack'))
 
         self.assertIsNotNone(data)
         self.assertEqual(data['description'], 'just setting up my twttr')
@@ -523,7 +988,9 @@ class LinkPreviewDateParsingTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(oembed).encode(), 'application/json'),
         ):
-            data = fetch_twitter('https://x.com/user/status/1585841080431321088', 'user')
+            data = asyncio.run(
+                fetch_twitter('https://x.com/user/status/1585841080431321088', 'user')
+            )
 
         self.assertIsNotNone(data)
         self.assertEqual(data['published_at'], date(2022, 10, 28))
@@ -535,7 +1002,7 @@ class LinkPreviewDateParsingTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(oembed).encode(), 'application/json'),
         ):
-            data = fetch_twitter('https://x.com/jack/status/20', 'jack')
+            data = asyncio.run(fetch_twitter('https://x.com/jack/status/20', 'jack'))
 
         self.assertIsNotNone(data)
         self.assertIsNone(data['published_at'])
@@ -549,14 +1016,16 @@ class LinkPreviewDateParsingTests(BaseTestCase):
             '<meta property="og:description" content="A classic.">'
             '</head></html>'
         )
-        with mock.patch(
-            'apps.blogs.link_previews._safe_get',
-            side_effect=[
-                self._response(json.dumps(oembed).encode(), 'application/json'),
-                self._response(page.encode(), 'text/html'),
-            ],
+        with (
+            mock.patch(
+                'apps.blogs.link_previews._safe_get',
+                return_value=self._response(json.dumps(oembed).encode(), 'application/json'),
+            ),
+            serve_pages(self._response(page.encode(), 'text/html')),
         ):
-            data = fetch_youtube('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ')
+            data = asyncio.run(
+                fetch_youtube('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ')
+            )
 
         self.assertIsNotNone(data)
         self.assertEqual(data['published_at'], date(2009, 10, 24))
@@ -565,14 +1034,16 @@ class LinkPreviewDateParsingTests(BaseTestCase):
         """Without meta tags, the player-response publishDate JSON should be used."""
         oembed = {'title': 'Video', 'author_name': 'Channel', 'thumbnail_url': ''}
         page = '<html><body>"publishDate":"2020-01-15T00:00:00-08:00"</body></html>'
-        with mock.patch(
-            'apps.blogs.link_previews._safe_get',
-            side_effect=[
-                self._response(json.dumps(oembed).encode(), 'application/json'),
-                self._response(page.encode(), 'text/html'),
-            ],
+        with (
+            mock.patch(
+                'apps.blogs.link_previews._safe_get',
+                return_value=self._response(json.dumps(oembed).encode(), 'application/json'),
+            ),
+            serve_pages(self._response(page.encode(), 'text/html')),
         ):
-            data = fetch_youtube('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ')
+            data = asyncio.run(
+                fetch_youtube('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ')
+            )
 
         self.assertIsNotNone(data)
         self.assertEqual(data['published_at'], date(2020, 1, 15))
@@ -585,11 +1056,8 @@ class LinkPreviewDateParsingTests(BaseTestCase):
             '<meta property="article:published_time" content="2024-05-01T12:00:00+00:00">'
             '</head></html>'
         )
-        with mock.patch(
-            'apps.blogs.link_previews._safe_get',
-            return_value=self._response(page.encode(), 'text/html'),
-        ):
-            data = fetch_generic('https://example.com/story')
+        with serve_pages(self._response(page.encode(), 'text/html')):
+            data = asyncio.run(fetch_generic('https://example.com/story'))
 
         self.assertIsNotNone(data)
         self.assertEqual(data['published_at'], date(2024, 5, 1))
@@ -623,7 +1091,7 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(item).encode()),
         ) as mock_get:
-            data = fetch_hackernews('https://news.ycombinator.com/item?id=123', '123')
+            data = asyncio.run(fetch_hackernews('https://news.ycombinator.com/item?id=123', '123'))
 
         self.assertEqual(
             data,
@@ -659,7 +1127,7 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(item).encode()),
         ):
-            data = fetch_hackernews('https://news.ycombinator.com/item?id=124', '124')
+            data = asyncio.run(fetch_hackernews('https://news.ycombinator.com/item?id=124', '124'))
 
         self.assertIsNotNone(data)
         self.assertEqual(data['description'], 'Hello & world Next line')
@@ -672,7 +1140,7 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(item).encode()),
         ):
-            data = fetch_hackernews('https://news.ycombinator.com/item?id=128', '128')
+            data = asyncio.run(fetch_hackernews('https://news.ycombinator.com/item?id=128', '128'))
 
         self.assertIsNotNone(data)
         self.assertIsNone(data['published_at'])
@@ -692,7 +1160,9 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
                     return_value=self._response(body),
                 ):
                     self.assertIsNone(
-                        fetch_hackernews('https://news.ycombinator.com/item?id=125', '125')
+                        asyncio.run(
+                            fetch_hackernews('https://news.ycombinator.com/item?id=125', '125')
+                        )
                     )
 
     def test_fetch_hackernews_comment_walks_to_its_story(self):
@@ -712,7 +1182,7 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
                 self._response(json.dumps(story).encode()),
             ],
         ):
-            data = fetch_hackernews('https://news.ycombinator.com/item?id=126', '126')
+            data = asyncio.run(fetch_hackernews('https://news.ycombinator.com/item?id=126', '126'))
 
         self.assertIsNotNone(data)
         self.assertEqual(data['title'], 'The parent story')
@@ -726,11 +1196,65 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
         responses = [self._response(json.dumps(comment).encode())]
         responses.extend(self._response(json.dumps(parent).encode()) for parent in parents)
         with mock.patch('apps.blogs.link_previews._safe_get', side_effect=responses):
-            data = fetch_hackernews('https://news.ycombinator.com/item?id=127', '127')
+            data = asyncio.run(fetch_hackernews('https://news.ycombinator.com/item?id=127', '127'))
 
         self.assertIsNotNone(data)
         self.assertEqual(data['title'], '')
 
+    def _serve_hackernews(self, items):
+        """Patch _safe_get to serve Firebase items by id and return the requested ids."""
+        requested = []
+
+        async def fake_get(url, *, max_bytes):
+            item_id = url.rsplit('/', 1)[1].removesuffix('.json')
+            requested.append(item_id)
+            return self._response(json.dumps(items.get(item_id)).encode())
+
+        patcher = mock.patch('apps.blogs.link_previews._safe_get', side_effect=fake_get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return requested
+
+    def test_hackernews_items_are_cached_with_short_lived_counts(self):
+        """A cached story is reused; only its expired score and comment count cause a refetch."""
+        items = {'123': {'type': 'story', 'title': 'Story', 'score': 5, 'descendants': 1}}
+        requested = self._serve_hackernews(items)
+        url = 'https://news.ycombinator.com/item?id=123'
+
+        asyncio.run(fetch_hackernews(url, '123'))
+        asyncio.run(fetch_hackernews(url, '123'))
+        self.assertEqual(requested, ['123'])
+
+        items['123'] = {**items['123'], 'score': 9}
+        cache.delete('hn-item-live:123')
+        data = asyncio.run(fetch_hackernews(url, '123'))
+
+        self.assertEqual(requested, ['123', '123'])
+        self.assertEqual(data['extra'], {'score': 9, 'comments': 1})
+
+    def test_hackernews_comments_in_one_thread_share_the_parent_walk(self):
+        """Comments are walked together, and later ones in the thread jump to the story."""
+        requested = self._serve_hackernews(
+            {
+                '1': {'type': 'comment', 'text': 'First', 'parent': 10},
+                '2': {'type': 'comment', 'text': 'Second', 'parent': 10},
+                '3': {'type': 'comment', 'text': 'Third', 'parent': 10},
+                '10': {'type': 'comment', 'text': 'Reply', 'parent': 100},
+                '100': {'type': 'story', 'title': 'Busy thread'},
+            }
+        )
+
+        data = asyncio.run(fetch_hackernews_previews(['1', '2']))
+
+        self.assertEqual(sorted(requested), ['1', '10', '100', '2'])
+        self.assertEqual([data['1']['title'], data['2']['title']], ['Busy thread'] * 2)
+
+        requested.clear()
+        third = asyncio.run(fetch_hackernews('https://news.ycombinator.com/item?id=3', '3'))
+
+        self.assertEqual(requested, ['3'])
+        self.assertEqual(third['title'], 'Busy thread')
+
     def test_fetch_reddit_uses_a_canonical_www_oembed_url(self):
         """Reddit oEmbed requests should canonicalize old hostnames and drop URL queries."""
         oembed = {'title': 'A post title', 'author_name': 'ChemicalRascal'}
@@ -738,8 +1262,10 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             'apps.blogs.link_previews._safe_get',
             return_value=self._response(json.dumps(oembed).encode()),
         ) as mock_get:
-            data = fetch_reddit(
-                'https://old.reddit.com/r/programming/comments/abc123/a-post/?context=3'
+            data = asyncio.run(
+                fetch_reddit(
+                    'https://old.reddit.com/r/programming/comments/abc123/a-post/?context=3'
+                )
             )
 
         self.assertEqual(
@@ -772,7 +1298,9 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             with self.subTest(response=response):
                 with mock.patch('apps.blogs.link_previews._safe_get', return_value=response):
                     self.assertIsNone(
-                        fetch_reddit('https://www.reddit.com/r/python/comments/abc123/a-post')
+                        asyncio.run(
+                            fetch_reddit('https://www.reddit.com/r/python/comments/abc123/a-post')
+                        )
                     )
 
     def test_fetch_chatgpt_uses_the_first_share_open_graph_title(self):
@@ -782,11 +1310,10 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             '<meta property="og:description" content="Marketing copy">'
             '<meta content="https://chatgpt.com" property="og:url">'
         )
-        with mock.patch(
-            'apps.blogs.link_previews._safe_get',
-            return_value=self._response(page.encode(), 'text/html'),
-        ):
-            data = fetch_chatgpt('https://chatgpt.com/share/67681bfe-1234-5678-90ab-cdef12345678')
+        with serve_pages(self._response(page.encode(), 'text/html')):
+            data = asyncio.run(
+                fetch_chatgpt('https://chatgpt.com/share/67681bfe-1234-5678-90ab-cdef12345678')
+            )
 
         self.assertEqual(
             data,
@@ -800,6 +1327,8 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
                 'embed_id': '',
                 'published_at': date(2024, 12, 22),
                 'extra': {},
+                'etag': '',
+                'last_modified': '',
             },
         )
 
@@ -810,24 +1339,22 @@ class LinkPreviewSourceFetchTests(BaseTestCase):
             '<meta content="ChatGPT" property="og:title">',
         ):
             with self.subTest(page=page):
-                with mock.patch(
-                    'apps.blogs.link_previews._safe_get',
-                    return_value=self._response(page.encode(), 'text/html'),
-                ):
+                with serve_pages(self._response(page.encode(), 'text/html')):
                     self.assertIsNone(
-                        fetch_chatgpt(
-                            'https://chatgpt.com/share/67681bfe-1234-5678-90ab-cdef12345678'
+                        asyncio.run(
+                            fetch_chatgpt(
+                                'https://chatgpt.com/share/67681bfe-1234-5678-90ab-cdef12345678'
+                            )
                         )
                     )
 
     def test_fetch_chatgpt_keeps_a_valid_title_when_uuid_timestamp_is_implausible(self):
         """An implausible UUID timestamp should omit only the derived publication date."""
         page = '<meta property="og:title" content="ChatGPT - Still a valid share">'
-        with mock.patch(
-            'apps.blogs.link_previews._safe_get',
-            return_value=self._response(page.encode(), 'text/html'),
-        ):
-            data = fetch_chatgpt('https://chatgpt.com/share/00000000-1234-5678-90ab-cdef12345678')
+        with serve_pages(self._response(page.encode(), 'text/html')):
+            data = asyncio.run(
+                fetch_chatgpt('https://chatgpt.com/share/00000000-1234-5678-90ab-cdef12345678')
+            )
 
         self.assertIsNotNone(data)
         self.assertIsNone(data['published_at'])
@@ -1011,10 +1538,11 @@ class LinkPreviewApiTests(ViewTestCase):
                 preview.image.save('toggle.jpg', ContentFile(b'image bytes'), save=True)
                 image_path = preview.image.path
 
-                response = self.client.patch(
-                    reverse('post-detail', args=[post.id]),
-                    {'link_previews_enabled': 'false'},
-                )
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.patch(
+                        reverse('post-detail', args=[post.id]),
+                        {'link_previews_enabled': 'false'},
+                    )
 
                 self.assertEqual(response.status_code, 200)
                 self.assertFalse(response.data['link_previews_enabled'])
@@ -1074,7 +1602,7 @@ class LinkPreviewApiTests(ViewTestCase):
                 )
 
         self.assertEqual(response.status_code, 200)
-        mock_fetch.assert_called_once_with('https://retry.example.com')
+        mock_fetch.assert_called_once_with('https://retry.example.com', validators=None)
         preview.refresh_from_db()
         self.assertEqual(preview.status, 'ok')
         self.assertEqual(preview.title, 'Retried')
@@ -1149,18 +1677,12 @@ class RefreshLinkPreviewsCommandTests(BaseTestCase):
         )
         output = StringIO()
 
-        def fake_fetch(preview, *, keep_existing_on_failure=False):
-            """Mark the preview as fetched without making network requests."""
-            preview.fetch_attempts += 1
-            preview.fetched_at = timezone.now()
-            preview.title = 'Refreshed' if keep_existing_on_failure else 'Retried'
-            preview.status = 'ok'
-            preview.save(update_fields=['fetch_attempts', 'fetched_at', 'title', 'status'])
-            return True
+        async def fake_fetch(preview, validators=None):
+            """Return fresh metadata without making network requests."""
+            return {'title': 'Refreshed' if preview.status == 'ok' else 'Retried'}, None
 
         with mock.patch(
-            'apps.blogs.management.commands.refresh_link_previews.fetch_preview_for',
-            side_effect=fake_fetch,
+            'apps.blogs.link_previews._fetch_preview_data', side_effect=fake_fetch
         ) as mock_fetch:
             call_command('refresh_link_previews', stdout=output)
 
@@ -1204,17 +1726,8 @@ class RefreshLinkPreviewsCommandTests(BaseTestCase):
         )
         output = StringIO()
 
-        def fake_fetch(preview, *, keep_existing_on_failure=False):
-            """Simulate a dead source: keep existing data, report nothing applied."""
-            preview.fetch_attempts += 1
-            preview.fetched_at = timezone.now()
-            preview.save(update_fields=['fetch_attempts', 'fetched_at'])
-            return False
-
-        with mock.patch(
-            'apps.blogs.management.commands.refresh_link_previews.fetch_preview_for',
-            side_effect=fake_fetch,
-        ):
+        # A dead source: the existing data is kept but nothing was applied.
+        with mock.patch('apps.blogs.link_previews._fetch_preview_data', return_value=(None, None)):
             call_command('refresh_link_previews', stdout=output)
 
         self.assertEqual(
@@ -1222,6 +1735,154 @@ class RefreshLinkPreviewsCommandTests(BaseTestCase):
             'retried 0 (0 now ok), refreshed 1 (0 updated)',
         )
 
+    def test_command_skips_previews_of_soft_deleted_posts(self):
+        """Previews on a post awaiting purge are neither retried nor refreshed."""
+        old_time = self.now - timedelta(days=45)
+        for status in ('failed', 'ok'):
+            LinkPreview.objects.create(
+                post=self.post,
+                url=f'https://{status}.example.com',
+                status=status,
+                fetch_attempts=1,
+                fetched_at=old_time,
+            )
+        self.post.soft_delete()
+        output = StringIO()
+
+        with mock.patch('apps.blogs.link_previews._fetch_preview_data') as mock_fetch:
+            call_command('refresh_link_previews', stdout=output)
+
+        mock_fetch.assert_not_called()
+        self.assertEqual(
+            output.getvalue().strip(),
+            'retried 0 (0 now ok), refreshed 0 (0 updated)',
+        )
+
+
+class RefreshLinkPreviewsSchedulingTests(BaseTestCase):
+    """Tests for refresh backoff, batching, bulk writes, and conditional revalidation."""
+
+    def setUp(self):
+        """Create a post to hang previews on."""
+        super().setUp()
+        self.user = User.objects.create_user(username='scheduler_author', password='testpass123')
+        self.post = Post.objects.create(author=self.user, body='Links')
+        self.now = timezone.now()
+
+    def _failed(self, url, attempts, minutes_ago):
+        return LinkPreview.objects.create(
+            post=self.post,
+            url=url,
+            status='failed',
+            fetch_attempts=attempts,
+            fetched_at=self.now - timedelta(minutes=minutes_ago),
+        )
+
+    def test_failed_previews_back_off_exponentially_and_run_in_batches(self):
+        """Each failed attempt doubles the wait; every due row is processed, batch by batch."""
+        due = [
+            self._failed('https://one.example.com', 1, 90),
+            self._failed('https://two.example.com', 2, 150),
+            self._failed('https://three.example.com', 3, 250),
+        ]
+        self._failed('https://waiting.example.com', 2, 90)
+        self._failed('https://waiting-longer.example.com', 3, 200)
+        output = StringIO()
+
+        with (
+            mock.patch(
+                'apps.blogs.link_previews._fetch_preview_data',
+                return_value=({'title': 'Back'}, None),
+            ) as mock_fetch,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            call_command('refresh_link_previews', '--batch-size', '2', stdout=output)
+
+        self.assertEqual(
+            output.getvalue().strip(), 'retried 3 (3 now ok), refreshed 0 (0 updated)'
+        )
+        self.assertEqual(
+            sorted(call.args[0].pk for call in mock_fetch.call_args_list),
+            [preview.pk for preview in due],
+        )
+        preview_updates = [
+            query['sql']
+            for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "blogs_linkpreview"')
+        ]
+        self.assertEqual(len(preview_updates), 2)
+
+    def test_stale_page_is_revalidated_with_a_conditional_request(self):
+        """A 304 renews the stored content without a download or image re-host."""
+        old = self.now - timedelta(days=45)
+        preview = LinkPreview.objects.create(
+            post=self.post,
+            url='https://example.com/story',
+            status='ok',
+            title='Kept title',
+            image='link_previews/shared/1.jpg',
+            fetch_attempts=1,
+            fetched_at=old,
+        )
+        entry = LinkPreviewContent.objects.create(
+            key='https://example.com/story',
+            url='https://example.com/story',
+            status='ok',
+            fetched_at=old,
+            expires_at=old + timedelta(days=1),
+            kind='generic',
+            title='Kept title',
+            image='link_previews/shared/1.jpg',
+            etag='"v1"',
+            last_modified='Mon, 01 Jan 2024 00:00:00 GMT',
+        )
+        sent_headers = []
+
+        @contextlib.asynccontextmanager
+        async def stream(url, headers=None):
+            sent_headers.append(headers)
+            yield httpx.Response(304, request=httpx.Request('GET', url))
+
+        output = StringIO()
+        with (
+            mock.patch('apps.blogs.link_previews._safe_stream', side_effect=stream),
+            mock.patch('apps.blogs.link_previews.fetch_preview_image') as mock_image,
+        ):
+            call_command('refresh_link_previews', stdout=output)
+
+        self.assertEqual(
+            output.getvalue().strip(), 'retried 0 (0 now ok), refreshed 1 (1 updated)'
+        )
+        self.assertEqual(
+            sent_headers,
+            [{'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}],
+        )
+        mock_image.assert_not_called()
+        entry.refresh_from_db()
+        preview.refresh_from_db()
+        self.assertGreater(entry.expires_at, self.now)
+        self.assertEqual(preview.status, 'ok')
+        self.assertEqual(preview.title, 'Kept title')
+        self.assertEqual(preview.image.name, 'link_previews/shared/1.jpg')
+        self.assertGreater(preview.fetched_at, old)
+
+    def test_changed_page_stores_its_new_validators(self):
+        """A full fetch records the page's ETag for the next revalidation."""
+        page = httpx.Response(
+            200,
+            headers={'content-type': 'text/html', 'etag': '"v2"'},
+            content=b'<html><head><meta property="og:title" content="New"></head></html>',
+            request=httpx.Request('GET', 'https://example.com/story'),
+        )
+        preview = LinkPreview.objects.create(post=self.post, url='https://example.com/story')
+
+        with serve_pages(page):
+            fetch_preview_for(preview)
+
+        entry = LinkPreviewContent.objects.get()
+        self.assertEqual(entry.title, 'New')
+        self.assertEqual(entry.etag, '"v2"')
+
 
 class LinkPreviewImageEndpointTests(ViewTestCase):
     """Tests for protected preview image serving."""
@@ -1312,7 +1973,7 @@ class LinkPreviewDeletionTests(BaseTestCase):
         )
 
     def test_post_delete_removes_preview_rows_and_image_files(self):
-        """Post.delete() should call each preview delete override before cascading."""
+        """Post.delete() should cascade to previews and delete their images afterwards."""
         with tempfile.TemporaryDirectory() as media_root:
             with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
                 post = Post.objects.create(author=self.user, body='Delete')
@@ -1327,7 +1988,8 @@ class LinkPreviewDeletionTests(BaseTestCase):
 
                 self.assertTrue(os.path.exists(image_path))
 
-                post.delete()
+                with self.captureOnCommitCallbacks(execute=True):
+                    post.delete()
 
                 self.assertFalse(LinkPreview.objects.filter(id=preview_id).exists())
                 self.assertFalse(os.path.exists(image_path))
@@ -1,30 +1,48 @@
 """Tests for media upload validation, S3-backed media, and signed URLs."""
 
+import hashlib
+import json
 import os
 import subprocess
 import tempfile
 from array import array
 from datetime import timedelta
-from io import BytesIO
+from io import BytesIO, StringIO
 from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.db import IntegrityError, transaction
-from django.test import override_settings
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
 from PIL import Image
 from rest_framework.test import APIClient
 
-from ..models import Media, Post
+from apps.uploads.s3 import generate_presigned_get_url, generate_presigned_get_urls
+
+from ..models import Media, Post, StorageDeletion
 from ..serializers import PostSerializer
-from ..utils import MediaProbeError
+from ..utils import IMAGE_HEADER_BYTES, MediaProbeError
+from ..utils.get_file_mimetype import get_file_mime_type
+from ..utils.media_processing import WAVEFORM_BUCKETS, waveform_from_pcm
+from ..views import stream_post_media
 from . import ViewTestCase
 
 User = get_user_model()
 
 
+def queued_object_keys():
+    """Return the object-storage keys queued for deletion, oldest first."""
+    return list(
+        StorageDeletion.objects.filter(target=StorageDeletion.TARGET_BUCKET)
+        .order_by('pk')
+        .values_list('name', flat=True)
+    )
+
+
 class MediaPipelineTests(ViewTestCase):
     """Tests for direct and presigned media handling."""
 
@@ -76,8 +94,14 @@ class MediaPipelineTests(ViewTestCase):
 
         with (
             mock.patch('apps.blogs.views.head_object', return_value=head),
-            mock.patch('apps.blogs.views.download_to_file'),
-            mock.patch('apps.blogs.views.probe_media_duration', return_value=expected_duration),
+            mock.patch('apps.uploads.object_cache.download_to_file') as mock_download,
+            mock.patch(
+                'apps.blogs.views.generate_presigned_get_url',
+                return_value='https://example.com/signed-get',
+            ),
+            mock.patch(
+                'apps.blogs.views.probe_media_duration', return_value=expected_duration
+            ) as mock_probe,
             mock.patch(
                 'apps.blogs.serializers.generate_presigned_get_url',
                 return_value='https://example.com/signed-get',
@@ -86,11 +110,16 @@ class MediaPipelineTests(ViewTestCase):
             response = self._post_with_s3_key()
 
         self.assertEqual(response.status_code, 201)
+        # Probed over HTTP range reads rather than downloaded.
+        mock_probe.assert_called_once_with('https://example.com/signed-get')
+        mock_download.assert_not_called()
         post = Post.objects.get(id=response.data['id'])
         self.assertIsNotNone(post.media)
         self.assertEqual(post.media.s3_file_key, self.key)
         self.assertEqual(post.media.duration, expected_duration)
         self.assertEqual(response.data['media']['signed_url'], 'https://example.com/signed-get')
+        self.assertEqual(response.data['media']['mime_type'], 'audio/mpeg')
+        self.assertEqual(response.data['media']['size'], 512)
         # The frontend derives MIME type and download extension from the key.
         self.assertEqual(response.data['media']['s3_file_key'], self.key)
 
@@ -173,33 +202,94 @@ class MediaPipelineTests(ViewTestCase):
 
         with (
             mock.patch('apps.blogs.views.head_object', return_value=head),
-            mock.patch('apps.blogs.views.download_to_file'),
+            mock.patch('apps.uploads.object_cache.download_to_file'),
+            mock.patch(
+                'apps.blogs.views.generate_presigned_get_url',
+                return_value='https://example.com/signed-get',
+            ),
             mock.patch('apps.blogs.views.probe_media_duration', return_value=None),
-            mock.patch('apps.blogs.views.delete_object') as mock_delete,
         ):
             response = self._post_with_s3_key()
 
         self.assertEqual(response.status_code, 400)
-        mock_delete.assert_called_once_with(self.key)
+        self.assertEqual(queued_object_keys(), [self.key])
         self.assertEqual(Post.objects.count(), 0)
 
+    def test_upload_that_is_not_visible_yet_is_kept(self):
+        """A key whose object cannot be found is rejected without queueing its deletion."""
+        with mock.patch('apps.blogs.views.head_object', return_value=None):
+            response = self._post_with_s3_key()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(queued_object_keys(), [])
+
+    def test_rejected_anonymous_upload_is_not_queued_for_deletion(self):
+        """Anonymous uploads share a prefix, so a rejected anonymous key is left in place."""
+        anonymous = User.objects.get(username='anonymous')
+        key = f'post/audio/{anonymous.id}/pixel.png'
+        self.client.force_authenticate(user=None)
+
+        with (
+            mock.patch(
+                'apps.blogs.views.head_object',
+                return_value={'ContentLength': 12, 'ContentType': 'image/png'},
+            ),
+            mock.patch('apps.blogs.views.get_object_range', return_value=b'not an image'),
+        ):
+            response = self._post_with_s3_key(key=key, media_type='image')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(queued_object_keys(), [])
+
+    def test_failed_url_probe_falls_back_to_probing_the_downloaded_object(self):
+        """A URL probe failure is confirmed against the full object before rejecting it."""
+        head = {'ContentLength': 512, 'ContentType': 'audio/mpeg'}
+        expected_duration = timedelta(seconds=3)
+
+        with (
+            mock.patch('apps.blogs.views.head_object', return_value=head),
+            mock.patch('apps.uploads.object_cache.download_to_file') as mock_download,
+            mock.patch(
+                'apps.blogs.views.generate_presigned_get_url',
+                return_value='https://example.com/signed-get',
+            ),
+            mock.patch(
+                'apps.blogs.views.probe_media_duration',
+                side_effect=[None, expected_duration],
+            ) as mock_probe,
+            mock.patch(
+                'apps.blogs.serializers.generate_presigned_get_url',
+                return_value='https://example.com/signed-get',
+            ),
+        ):
+            response = self._post_with_s3_key()
+
+        self.assertEqual(response.status_code, 201)
+        mock_download.assert_called_once()
+        self.assertFalse(mock_probe.call_args_list[1].args[0].startswith('https://'))
+        self.assertEqual(queued_object_keys(), [])
+        self.assertEqual(Post.objects.get().media.duration, expected_duration)
+
     def test_probe_environment_failure_returns_500_and_keeps_object(self):
         """A broken probing environment must not delete the upload or blame the file."""
         head = {'ContentLength': 512, 'ContentType': 'audio/mpeg'}
 
         with (
             mock.patch('apps.blogs.views.head_object', return_value=head),
-            mock.patch('apps.blogs.views.download_to_file'),
+            mock.patch('apps.uploads.object_cache.download_to_file'),
+            mock.patch(
+                'apps.blogs.views.generate_presigned_get_url',
+                return_value='https://example.com/signed-get',
+            ),
             mock.patch(
                 'apps.blogs.views.probe_media_duration',
                 side_effect=MediaProbeError('ffprobe could not run'),
             ),
-            mock.patch('apps.blogs.views.delete_object') as mock_delete,
         ):
             response = self._post_with_s3_key()
 
         self.assertEqual(response.status_code, 500)
-        mock_delete.assert_not_called()
+        self.assertEqual(queued_object_keys(), [])
         self.assertEqual(Post.objects.count(), 0)
 
     def test_direct_upload_rejects_plain_text_content_type(self):
@@ -251,37 +341,72 @@ class MediaPipelineTests(ViewTestCase):
                 self.assertIsNotNone(post.media)
                 self.assertGreater(post.media.file.size, 0)
 
+    def test_direct_audio_upload_probes_duration_before_storing(self):
+        """Direct audio uploads are probed from the upload, not read back from storage."""
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True),
+            mock.patch(
+                'apps.blogs.views.probe_media_duration', return_value=timedelta(seconds=7)
+            ) as mock_probe,
+            mock.patch('subprocess.run') as mock_run,
+        ):
+            response = self.client.post(
+                reverse('post-list'),
+                {'head': 'Audio', 'media': self._audio_file(), 'media_type': 'audio'},
+                format='multipart',
+            )
+
+            self.assertEqual(response.status_code, 201)
+            probed_path = mock_probe.call_args.args[0]
+            self.assertFalse(probed_path.startswith(media_root))
+
+        mock_run.assert_not_called()
+        self.assertEqual(Post.objects.get().media.duration, timedelta(seconds=7))
+
+    def test_direct_image_upload_does_not_probe_duration(self):
+        """Images have no duration, so ffprobe is never run for them at ingest."""
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True),
+            mock.patch('apps.blogs.views.probe_media_duration') as mock_probe,
+        ):
+            response = self.client.post(
+                reverse('post-list'),
+                {'head': 'Image', 'media': self._image_file(), 'media_type': 'image'},
+                format='multipart',
+            )
+
+        self.assertEqual(response.status_code, 201)
+        mock_probe.assert_not_called()
+        self.assertIsNone(Post.objects.get().media.duration)
+
     def test_s3_image_upload_rejects_invalid_image_bytes_and_deletes_object(self):
         """S3 image uploads should reject undecodable bytes and delete the object."""
         key = f'post/audio/{self.user.id}/pixel.png'
-        head = {'ContentLength': 512, 'ContentType': 'image/png'}
-
-        def fake_download(_key, fileobj):
-            fileobj.write(b'not an image')
+        head = {'ContentLength': 12, 'ContentType': 'image/png'}
 
         with (
             mock.patch('apps.blogs.views.head_object', return_value=head),
-            mock.patch('apps.blogs.views.download_to_file', side_effect=fake_download),
-            mock.patch('apps.blogs.views.delete_object') as mock_delete,
+            mock.patch('apps.blogs.views.get_object_range', return_value=b'not an image'),
+            mock.patch('apps.uploads.object_cache.download_to_file') as mock_download,
         ):
             response = self._post_with_s3_key(key=key, media_type='image')
 
         self.assertEqual(response.status_code, 400)
-        mock_delete.assert_called_once_with(key)
+        self.assertEqual(queued_object_keys(), [key])
+        mock_download.assert_not_called()
         self.assertEqual(Post.objects.count(), 0)
 
     def test_s3_image_upload_accepts_valid_image_bytes(self):
         """S3 image uploads should save valid images without setting duration."""
         key = f'post/audio/{self.user.id}/pixel.png'
-        head = {'ContentLength': 512, 'ContentType': 'image/png'}
         png_bytes = self._png_bytes()
-
-        def fake_download(_key, fileobj):
-            fileobj.write(png_bytes)
+        head = {'ContentLength': len(png_bytes), 'ContentType': 'image/png'}
 
         with (
             mock.patch('apps.blogs.views.head_object', return_value=head),
-            mock.patch('apps.blogs.views.download_to_file', side_effect=fake_download),
+            mock.patch('apps.blogs.views.get_object_range', return_value=png_bytes),
             mock.patch(
                 'apps.blogs.serializers.generate_presigned_get_url',
                 return_value='https://example.com/signed-image',
@@ -295,15 +420,40 @@ class MediaPipelineTests(ViewTestCase):
         self.assertEqual(post.media.s3_file_key, key)
         self.assertIsNone(post.media.duration)
 
+    def test_s3_image_upload_validates_large_images_from_the_header_only(self):
+        """A large image is accepted from a ranged GET of its header, without a download."""
+        key = f'post/audio/{self.user.id}/photo.jpg'
+        head = {'ContentLength': 50 * 1024 * 1024, 'ContentType': 'image/jpeg'}
+        header = self._image_bytes(width=4000, height=3000, image_format='JPEG')[:2048]
+
+        with (
+            mock.patch('apps.blogs.views.head_object', return_value=head),
+            mock.patch('apps.blogs.views.get_object_range', return_value=header) as mock_range,
+            mock.patch('apps.uploads.object_cache.download_to_file') as mock_download,
+            mock.patch(
+                'apps.blogs.serializers.generate_presigned_get_url',
+                return_value='https://example.com/signed-image',
+            ),
+        ):
+            response = self._post_with_s3_key(key=key, media_type='image')
+
+        self.assertEqual(response.status_code, 201)
+        mock_range.assert_called_once_with(key, 0, IMAGE_HEADER_BYTES - 1)
+        mock_download.assert_not_called()
+
     def test_deleting_post_with_s3_media_deletes_s3_object(self):
         """Deleting an S3-backed media post should delete the object key."""
         media = Media.objects.create(s3_file_key=self.key, media_type='audio')
         post = Post.objects.create(author=self.user, head='Delete me', media=media)
 
-        with mock.patch('apps.blogs.models.delete_object') as mock_delete:
+        with (
+            mock.patch('apps.blogs.tasks.delete_objects', return_value={}) as mock_delete,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
             post.delete()
 
-        mock_delete.assert_called_once_with(self.key)
+        self.assertEqual(list(mock_delete.call_args.args[0]), [self.key])
+        self.assertFalse(StorageDeletion.objects.exists())
 
     def test_stream_post_media_returns_404_without_media(self):
         """The media streaming endpoint should 404 for posts without media."""
@@ -327,6 +477,44 @@ class MediaPipelineTests(ViewTestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response['Location'], 'https://example.com/signed-stream')
 
+    def test_presigned_get_urls_are_reused_until_close_to_expiry(self):
+        """Signed GET URLs come from the cache, and only uncached keys are signed."""
+        client = mock.Mock()
+        client.generate_presigned_url.side_effect = lambda _op, **kwargs: (
+            f'https://example.com/{kwargs["Params"]["Key"]}'
+            f'?n={client.generate_presigned_url.call_count}'
+        )
+
+        with mock.patch('apps.uploads.s3.get_s3_client', return_value=client):
+            first = generate_presigned_get_url('a.mp3')
+            urls = generate_presigned_get_urls(['a.mp3', 'b.mp3'])
+            short_lived = generate_presigned_get_url('a.mp3', expires_in=60)
+
+        self.assertEqual(urls['a.mp3'], first)
+        self.assertEqual(urls['b.mp3'], 'https://example.com/b.mp3?n=2')
+        # Too short-lived to cache: signed fresh, and not stored for reuse.
+        self.assertEqual(short_lived, 'https://example.com/a.mp3?n=3')
+        self.assertEqual(client.generate_presigned_url.call_count, 3)
+
+    def test_feed_signs_a_page_of_media_urls_in_one_batch(self):
+        """The post list signs every S3 media key on the page with one call."""
+        for index in range(3):
+            media = Media.objects.create(s3_file_key=f'{self.key}.{index}', media_type='audio')
+            Post.objects.create(author=self.user, head=f'Clip {index}', media=media)
+
+        with mock.patch(
+            'apps.blogs.serializers.generate_presigned_get_urls',
+            side_effect=lambda keys: {key: f'https://example.com/{key}' for key in keys},
+        ) as mock_sign:
+            response = self.client.get(reverse('post-list'))
+
+        self.assertEqual(response.status_code, 200)
+        mock_sign.assert_called_once()
+        self.assertEqual(
+            {item['media']['signed_url'] for item in response.data['results']},
+            {f'https://example.com/{self.key}.{index}' for index in range(3)},
+        )
+
     def test_local_file_media_serializer_signed_url_is_none(self):
         """Local-file media should not include a signed URL."""
         with tempfile.TemporaryDirectory() as media_root:
@@ -419,17 +607,39 @@ class MediaPipelineTests(ViewTestCase):
                     with Image.open(media.thumbnail) as image:
                         self.assertLessEqual(image.width, 1280)
 
-    def test_process_post_media_audio_generates_waveform(self):
-        """Audio processing should store normalized waveform peaks."""
+    def _fake_media_tools(self, *, ffmpeg_returncode=0, pcm=b''):
+        """Return a subprocess.run stand-in for file, ffprobe, and ffmpeg.
+
+        ffmpeg writes the given PCM to its s16le output and a stub to every
+        other output, and records each command it was asked to run.
+        """
+        commands = []
+        probe = {'format': {'duration': '1.0'}, 'streams': [{'codec_type': 'audio'}]}
+
+        def run(command, **kwargs):
+            commands.append(command)
+            if command[0] == 'file':
+                return subprocess.CompletedProcess(command, 0, 'audio/mpeg\n', '')
+            if command[0] == 'ffprobe':
+                return subprocess.CompletedProcess(command, 0, json.dumps(probe), '')
+            if ffmpeg_returncode == 0:
+                for index, arg in enumerate(command):
+                    if arg == '-f' and command[index + 1] == 's16le':
+                        with open(command[index + 2], 'wb') as output:
+                            output.write(pcm)
+                    elif arg.endswith('.mp3') and command[index - 1] != '-i':
+                        with open(arg, 'wb') as output:
+                            output.write(b'speech')
+            return subprocess.CompletedProcess(command, ffmpeg_returncode, b'', b'bad audio')
+
+        return run, commands
+
+    def test_process_post_media_audio_analyzes_in_one_decode(self):
+        """Audio processing decodes once for the waveform and speech track."""
         from ..tasks import process_post_media
 
         samples = array('h', [0, 1000, -2000, 4000] * 100)
-        completed = subprocess.CompletedProcess(
-            args=[],
-            returncode=0,
-            stdout=samples.tobytes(),
-            stderr=b'',
-        )
+        run, commands = self._fake_media_tools(pcm=samples.tobytes())
 
         with tempfile.TemporaryDirectory() as media_root:
             with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
@@ -439,29 +649,25 @@ class MediaPipelineTests(ViewTestCase):
                     duration=timedelta(seconds=1),
                 )
 
-                with mock.patch(
-                    'apps.blogs.utils.media_processing.subprocess.run',
-                    return_value=completed,
-                ):
+                with mock.patch('subprocess.run', side_effect=run):
                     process_post_media.call(media.pk)
 
                 media.refresh_from_db()
+                with media.mp3_file.open('rb'):
+                    self.assertEqual(media.mp3_file.read(), b'speech')
 
+        self.assertEqual([command[0] for command in commands].count('ffmpeg'), 1)
         self.assertIsNotNone(media.waveform)
         self.assertLessEqual(len(media.waveform), 120)
         self.assertTrue(all(0 <= peak <= 100 for peak in media.waveform))
         self.assertEqual(max(media.waveform), 100)
+        self.assertEqual(media.mime_type, 'audio/mpeg')
 
     def test_process_post_media_audio_decode_failure_leaves_waveform_null(self):
         """Audio decode failure should not raise or write waveform data."""
         from ..tasks import process_post_media
 
-        completed = subprocess.CompletedProcess(
-            args=[],
-            returncode=1,
-            stdout=b'',
-            stderr=b'bad audio',
-        )
+        run, _commands = self._fake_media_tools(ffmpeg_returncode=1)
 
         with tempfile.TemporaryDirectory() as media_root:
             with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
@@ -471,15 +677,56 @@ class MediaPipelineTests(ViewTestCase):
                     duration=timedelta(seconds=1),
                 )
 
-                with mock.patch(
-                    'apps.blogs.utils.media_processing.subprocess.run',
-                    return_value=completed,
-                ):
+                with mock.patch('subprocess.run', side_effect=run):
                     process_post_media.call(media.pk)
 
                 media.refresh_from_db()
 
         self.assertIsNone(media.waveform)
+        self.assertFalse(media.mp3_file)
+
+    def test_waveform_from_pcm_folds_peaks_across_chunk_boundaries(self):
+        """Bucket peaks match a whole-buffer scan when reads split buckets."""
+        samples = array('h', [(index * 37) % 2000 - 1000 for index in range(1000)])
+        samples[3] = -32768
+        samples[999] = 16384
+        expected = []
+        for index in range(WAVEFORM_BUCKETS):
+            bucket = samples[index * 1000 // 120 : (index + 1) * 1000 // 120]
+            expected.append(max(abs(sample) for sample in bucket))
+
+        with mock.patch('apps.blogs.utils.media_processing.WAVEFORM_CHUNK_BYTES', 14):
+            waveform = waveform_from_pcm(BytesIO(samples.tobytes()), len(samples))
+
+        self.assertEqual(waveform, [round(peak / 32768 * 100) for peak in expected])
+        self.assertEqual(waveform[0], 100)
+        self.assertEqual(waveform[-1], 50)
+
+    def test_benchmark_waveform_reports_both_reducers(self):
+        """The benchmark prints timing and peak RSS for each reducer and duration."""
+        out = StringIO()
+        call_command('benchmark_waveform', '--durations', '2', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('2s (', output)
+        self.assertIn('streaming', output)
+        self.assertIn('buffered', output)
+        self.assertIn('peak RSS', output)
+
+    def test_benchmark_s3_download_reports_both_configurations(self):
+        """The download benchmark times boto3 defaults and the tuned settings."""
+        out = StringIO()
+        call_command(
+            'benchmark_s3_download',
+            '--sizes-mib', '9', '--repeat', '1', '--latency-ms', '0',
+            '--connection-mibps', '1024',
+            stdout=out,
+        )  # fmt: skip
+
+        output = out.getvalue()
+        self.assertIn('9 MiB object', output)
+        self.assertIn('defaults', output)
+        self.assertIn('tuned', output)
 
     def test_process_post_media_image_generates_capped_rendition(self):
         """Large image processing should save a JPEG rendition capped at 1600px."""
@@ -504,6 +751,78 @@ class MediaPipelineTests(ViewTestCase):
                         self.assertEqual(image.format, 'JPEG')
                         self.assertLessEqual(max(image.size), 1600)
 
+    def test_process_post_media_records_image_metadata(self):
+        """Processing records the sniffed mime type, byte size, and rotated dimensions."""
+        from ..tasks import process_post_media
+
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotated 90 degrees: displayed as portrait.
+        Image.new('RGB', (40, 20), color='red').save(buffer, format='JPEG', exif=exif)
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
+                media = Media.objects.create(
+                    file=self._image_file(content=buffer.getvalue(), name='photo.jpg'),
+                    media_type='image',
+                    # Declared by the client; the bytes are a JPEG.
+                    mime_type='image/png',
+                )
+
+                process_post_media.call(media.pk)
+                media.refresh_from_db()
+
+        self.assertEqual(media.mime_type, 'image/jpeg')
+        self.assertEqual(media.size, len(buffer.getvalue()))
+        self.assertEqual((media.width, media.height), (20, 40))
+
+    def test_backfill_media_metadata_fills_missing_fields_only(self):
+        """The backfill command keeps recorded values and fills in the rest."""
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
+                media = Media.objects.create(
+                    file=self._image_file(content=self._image_bytes(width=3, height=2)),
+                    media_type='image',
+                    mime_type='image/x-declared',
+                )
+                out = StringIO()
+
+                call_command('backfill_media_metadata', stdout=out)
+                media.refresh_from_db()
+
+        self.assertEqual(out.getvalue().strip(), 'checked 1 media, updated 1')
+        self.assertEqual(media.mime_type, 'image/x-declared')
+        self.assertEqual((media.width, media.height), (3, 2))
+        self.assertGreater(media.size, 0)
+
+    def test_backfill_media_metadata_continues_past_rows_it_cannot_describe(self):
+        """A run that hits --limit names the --after id that skips rows already tried."""
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True):
+                missing = Media.objects.create(media_type='image')
+                media = Media.objects.create(file=self._image_file(), media_type='image')
+                out = StringIO()
+
+                with self.assertLogs('apps.blogs.management.commands', 'ERROR'):
+                    call_command('backfill_media_metadata', '--limit', '1', stdout=out)
+                self.assertEqual(
+                    out.getvalue().splitlines(),
+                    [
+                        'checked 1 media, updated 0',
+                        f'more may remain; continue with --after {missing.pk}',
+                    ],
+                )
+
+                out = StringIO()
+                call_command(
+                    'backfill_media_metadata', '--limit', '1', '--after', str(missing.pk),
+                    stdout=out,
+                )  # fmt: skip
+                media.refresh_from_db()
+
+        self.assertEqual(out.getvalue().splitlines()[0], 'checked 1 media, updated 1')
+        self.assertEqual(media.mime_type, 'image/png')
+
     def test_process_post_media_image_skips_small_original(self):
         """Small image originals should be served directly without a rendition."""
         from ..tasks import process_post_media
@@ -658,20 +977,88 @@ class MediaPipelineTests(ViewTestCase):
         self.assertEqual(response.status_code, 201)
         mock_enqueue.assert_not_called()
 
-    def test_local_copy_downloads_s3_media_to_a_temp_file(self):
-        """local_copy should download S3-only media and clean up afterwards."""
+    def test_local_copy_downloads_s3_media_once_into_the_cache(self):
+        """local_copy should download S3-only media once and reuse the cached copy."""
         media = Media.objects.create(s3_file_key=self.key, media_type='audio')
+        head = {'ETag': '"v1"', 'ContentLength': 11}
 
         def fake_download(key, fileobj):
             fileobj.write(b'audio-bytes')
 
-        with mock.patch('apps.blogs.models.download_to_file', side_effect=fake_download):
+        with (
+            mock.patch('apps.uploads.object_cache.head_object', return_value=head),
+            mock.patch(
+                'apps.uploads.object_cache.download_to_file', side_effect=fake_download
+            ) as mock_download,
+        ):
             with media.local_copy() as path:
                 self.assertTrue(path.endswith('.mp3'))
                 with open(path, 'rb') as handle:
                     self.assertEqual(handle.read(), b'audio-bytes')
+            with media.local_copy() as second_path:
+                self.assertEqual(second_path, path)
+
+            head['ETag'] = '"v2"'
+            with media.local_copy() as replaced_path:
+                self.assertNotEqual(replaced_path, path)
 
-        self.assertFalse(os.path.exists(path))
+        self.assertEqual(mock_download.call_count, 2)
+
+    def test_download_cache_evicts_least_recently_used_entries_not_in_use(self):
+        """Fills past the size budget evict old entries but never one being read."""
+        from apps.uploads.object_cache import cached_object
+
+        def fake_download(key, fileobj):
+            fileobj.write(b'x' * 10)
+
+        with (
+            override_settings(MEDIA_DOWNLOAD_CACHE_MAX_BYTES=25),
+            mock.patch('apps.uploads.object_cache.download_to_file', side_effect=fake_download),
+        ):
+            with cached_object('held.mp3', '"1"') as held_path:
+                with cached_object('old.mp3', '"1"') as old_path:
+                    pass
+                with cached_object('new.mp3', '"1"') as new_path:
+                    pass
+
+                self.assertTrue(os.path.exists(held_path))
+                self.assertFalse(os.path.exists(old_path))
+                self.assertTrue(os.path.exists(new_path))
+
+            with cached_object('big.mp3', '"1"', size=100) as big_path:
+                self.assertNotEqual(os.path.dirname(big_path), os.path.dirname(held_path))
+            self.assertFalse(os.path.exists(big_path))
+
+    def test_s3_validation_download_is_reused_by_media_processing(self):
+        """An inconclusive image header falls back to a download that processing reuses."""
+        from ..tasks import process_post_media
+
+        key = f'post/audio/{self.user.id}/pixel.png'
+        png_bytes = self._png_bytes()
+        head = {'ETag': '"abc"', 'ContentLength': len(png_bytes), 'ContentType': 'image/png'}
+
+        def fake_download(_key, fileobj):
+            fileobj.write(png_bytes)
+
+        with (
+            mock.patch('apps.blogs.views.head_object', return_value=head),
+            mock.patch('apps.blogs.views.get_object_range', return_value=png_bytes[:8]),
+            mock.patch('apps.uploads.object_cache.head_object', return_value=head),
+            mock.patch(
+                'apps.uploads.object_cache.download_to_file', side_effect=fake_download
+            ) as mock_download,
+            mock.patch('apps.blogs.views._enqueue_process_post_media'),
+            mock.patch(
+                'apps.blogs.serializers.generate_presigned_get_url',
+                return_value='https://example.com/signed-image',
+            ),
+        ):
+            response = self._post_with_s3_key(key=key, media_type='image')
+            self.assertEqual(response.status_code, 201)
+            media = Post.objects.get(id=response.data['id']).media
+            process_post_media.call(media.pk)
+
+        mock_download.assert_called_once()
 
     def test_duplicate_s3_file_key_is_rejected_at_the_database(self):
         """The DB constraint should close the create-time exists() race."""
@@ -756,6 +1143,150 @@ class MediaPipelineTests(ViewTestCase):
         self.assertEqual(response.json()['id'], post.id)
 
 
+@override_settings(STREAM_UPLOADS_TO_S3=True)
+class StreamedUploadTests(ViewTestCase):
+    """Tests for direct uploads streamed into an S3 multipart upload."""
+
+    def setUp(self):
+        """Authenticate and stand in for the multipart upload API."""
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='stream_author', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+        self.parts = []
+        self.completed = []
+        patches = {
+            'create_multipart_upload': mock.Mock(return_value='upload-1'),
+            'upload_part': mock.Mock(side_effect=self._upload_part),
+            'complete_multipart_upload': mock.Mock(side_effect=self._complete),
+            'abort_multipart_upload': mock.Mock(),
+        }
+        for name, replacement in patches.items():
+            patcher = mock.patch(f'apps.uploads.handlers.{name}', replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.s3 = patches
+        signed_url_patcher = mock.patch(
+            'apps.blogs.serializers.generate_presigned_get_url', return_value='https://r2/signed'
+        )
+        signed_url_patcher.start()
+        self.addCleanup(signed_url_patcher.stop)
+
+    def _upload_part(self, key, upload_id, part_number, body):
+        self.assertEqual(part_number, len(self.parts) + 1)
+        self.parts.append(bytes(body))
+        return f'"part-{part_number}"'
+
+    def _complete(self, key, upload_id, part_etags):
+        self.completed.append((key, list(part_etags)))
+        return '"object-etag"'
+
+    def _post(
+        self, content, media_type='audio', name='clip.mp3', content_type='audio/mpeg', **fields
+    ):
+        return self.client.post(
+            reverse('post-list'),
+            {
+                'head': 'Streamed',
+                'media': SimpleUploadedFile(name, content, content_type=content_type),
+                'media_type': media_type,
+                **fields,
+            },
+            format='multipart',
+        )
+
+    def test_audio_upload_is_stored_in_parts_without_a_local_file(self):
+        """The body is uploaded part by part and becomes S3-keyed media."""
+        content = os.urandom(150 * 1024)
+        with (
+            mock.patch('apps.uploads.handlers.PART_SIZE', 64 * 1024),
+            mock.patch('apps.blogs.views.generate_presigned_get_url', return_value='https://r2/x'),
+            mock.patch(
+                'apps.blogs.views.probe_media_duration', return_value=timedelta(seconds=7)
+            ) as mock_probe,
+            mock.patch('tempfile.NamedTemporaryFile') as mock_temp_file,
+        ):
+            response = self._post(content)
+
+        self.assertEqual(response.status_code, 201)
+        media = Post.objects.get().media
+        self.assertRegex(media.s3_file_key, r'^post/direct/[0-9a-f]{32}\.mp3$')
+        self.assertFalse(media.file)
+        self.assertEqual(b''.join(self.parts), content)
+        self.assertEqual([len(part) for part in self.parts], [64 * 1024, 64 * 1024, 22 * 1024])
+        part_etags = ['"part-1"', '"part-2"', '"part-3"']
+        self.assertEqual(self.completed, [(media.s3_file_key, part_etags)])
+        self.assertEqual(media.size, len(content))
+        self.assertEqual(media.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(media.duration, timedelta(seconds=7))
+        self.assertEqual(media.mime_type, 'audio/mpeg')
+        mock_probe.assert_called_once_with('https://r2/x')
+        mock_temp_file.assert_not_called()
+        self.assertEqual(queued_object_keys(), [])
+
+    def test_image_upload_is_validated_from_the_streamed_header(self):
+        """Images are checked from the bytes kept while streaming, not fetched back."""
+        buffer = BytesIO()
+        Image.new('RGB', (4, 3), color='red').save(buffer, format='PNG')
+        with mock.patch('apps.blogs.views.get_object_range') as mock_range:
+            response = self._post(
+                buffer.getvalue(), media_type='image', name='pixel.png', content_type='image/png'
+            )
+
+        self.assertEqual(response.status_code, 201)
+        mock_range.assert_not_called()
+        media = Post.objects.get().media
+        self.assertTrue(media.s3_file_key.endswith('.png'))
+        self.assertEqual(media.mime_type, 'image/png')
+
+    def test_invalid_image_is_deleted_from_storage(self):
+        """A streamed object that fails validation is not left behind."""
+        response = self._post(
+            b'not an image', media_type='image', name='pixel.png', content_type='image/png'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'file is not a valid image')
+        self.assertEqual(queued_object_keys(), [self.completed[0][0]])
+        self.assertFalse(Post.objects.exists())
+
+    def test_upload_over_the_size_limit_is_aborted(self):
+        """Oversized bodies abort the multipart upload and store nothing."""
+        with override_settings(MAX_MEDIA_UPLOAD_BYTES=100 * 1024):
+            response = self._post(os.urandom(200 * 1024))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'media file is too large')
+        self.s3['abort_multipart_upload'].assert_called_once()
+        self.assertEqual(self.completed, [])
+        self.assertEqual(queued_object_keys(), [])
+
+    def test_rejected_post_deletes_the_streamed_object(self):
+        """Objects streamed for a request that is refused are deleted again."""
+        self.client.force_authenticate(user=None)
+        response = self._post(b'audio bytes', visibility='private')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(queued_object_keys(), [self.completed[0][0]])
+
+    @override_settings(STREAM_UPLOADS_TO_S3=False)
+    def test_disabled_streaming_keeps_local_uploads(self):
+        """With streaming off, uploads are stored as local files as before."""
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True),
+            mock.patch('apps.blogs.views.probe_media_duration', return_value=None),
+        ):
+            response = self._post(b'audio bytes')
+
+            self.assertEqual(response.status_code, 201)
+            media = Post.objects.get().media
+            self.assertTrue(media.file)
+            self.assertEqual(media.s3_file_key, '')
+        self.s3['create_multipart_upload'].assert_not_called()
+
+
 class StreamPostMediaRangeTests(ViewTestCase):
     """Tests for HTTP range handling on the media streaming endpoint."""
 
@@ -794,7 +1325,7 @@ class StreamPostMediaRangeTests(ViewTestCase):
         response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
 
         self.assertEqual(response.status_code, 206)
-        self.assertEqual(response.content, b'2345')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
         self.assertEqual(response['Content-Length'], '4')
         self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(self.CONTENT)}')
 
@@ -803,7 +1334,7 @@ class StreamPostMediaRangeTests(ViewTestCase):
         response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
 
         self.assertEqual(response.status_code, 206)
-        self.assertEqual(response.content, b'6789')
+        self.assertEqual(b''.join(response.streaming_content), b'6789')
         self.assertEqual(response['Content-Range'], f'bytes 6-9/{len(self.CONTENT)}')
 
     def test_open_ended_range_returns_remaining_bytes(self):
@@ -811,12 +1342,79 @@ class StreamPostMediaRangeTests(ViewTestCase):
         response = self.client.get(self.url, HTTP_RANGE='bytes=3-')
 
         self.assertEqual(response.status_code, 206)
-        self.assertEqual(response.content, b'3456789')
+        self.assertEqual(b''.join(response.streaming_content), b'3456789')
         self.assertEqual(response['Content-Range'], f'bytes 3-9/{len(self.CONTENT)}')
 
+    def test_recorded_mime_type_is_served_without_sniffing(self):
+        """Range responses use Media.mime_type instead of running `file` per request."""
+        Media.objects.filter(pk=self.post.media_id).update(mime_type='audio/mpeg')
+
+        with mock.patch('apps.blogs.views.get_file_mime_type') as mock_sniff:
+            response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(response['Content-Type'], 'audio/mpeg')
+        mock_sniff.assert_not_called()
+
     def test_unsatisfiable_range_returns_416(self):
         """A range past the end of the file should return 416 with the size."""
         response = self.client.get(self.url, HTTP_RANGE='bytes=50-60')
 
         self.assertEqual(response.status_code, 416)
         self.assertEqual(response['Content-Range'], f'bytes */{len(self.CONTENT)}')
+
+    def test_range_response_streams_only_the_requested_bytes(self):
+        """A single range is served from the open file, not buffered in memory."""
+        request = RequestFactory().get(self.url, HTTP_RANGE='bytes=2-5')
+        request.user = AnonymousUser()
+
+        response = stream_post_media(request, self.post.id)
+
+        # The file object is what wsgi.file_wrapper hands to os.sendfile().
+        self.addCleanup(response.close)
+        self.assertIsInstance(response.file_to_stream.fileno(), int)
+        self.assertEqual(response.file_to_stream.read(), b'2345')
+
+    def test_multiple_ranges_return_multipart_byteranges(self):
+        """Several ranges come back as one multipart/byteranges body."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,-2')
+
+        self.assertEqual(response.status_code, 206)
+        content_type = response['Content-Type']
+        self.assertTrue(content_type.startswith('multipart/byteranges; boundary='))
+        boundary = content_type.split('boundary=')[1]
+        part_type = get_file_mime_type(self.post.media.file.path)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertEqual(
+            body,
+            (
+                f'--{boundary}\r\nContent-Type: {part_type}\r\n'
+                f'Content-Range: bytes 0-1/10\r\n\r\n01\r\n'
+                f'--{boundary}\r\nContent-Type: {part_type}\r\n'
+                f'Content-Range: bytes 8-9/10\r\n\r\n89\r\n'
+                f'--{boundary}--\r\n'
+            ).encode(),
+        )
+
+    def test_matching_etag_returns_304(self):
+        """A revalidation with the current ETag returns 304 without a body."""
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_range_serves_the_range_only_for_the_current_version(self):
+        """A stale If-Range validator gets the whole file instead of a range."""
+        first = self.client.get(self.url)
+        etag, last_modified = first['ETag'], first['Last-Modified']
+
+        by_etag = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=etag)
+        by_date = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=last_modified)
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(by_etag.status_code, 206)
+        self.assertEqual(by_date.status_code, 206)
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(b''.join(stale.streaming_content), self.CONTENT)
@@ -0,0 +1,206 @@
+"""Tests for probing media duration over HTTP range reads."""
+
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import skipUnless
+
+from ..utils import probe_media_duration
+from . import BaseTestCase
+
+RANGE_RE = re.compile(r'^bytes=(\d+)-(\d*)$')
+SEND_CHUNK_BYTES = 16 * 1024
+
+
+class _ObjectHandler(BaseHTTPRequestHandler):
+    """Serve the server's objects with single-range support, like S3/R2 GETs."""
+
+    def do_HEAD(self):  # noqa: N802
+        """Answer HEAD with the object's length."""
+        self._respond(send_body=False)
+
+    def do_GET(self):  # noqa: N802
+        """Answer GET with the whole object or the requested byte range."""
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        path = self.path.split('?', 1)[0]
+        with self.server.lock:
+            self.server.requested_paths.add(path)
+        content = self.server.objects.get(path)
+        if content is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        start, end = 0, len(content) - 1
+        status = HTTPStatus.OK
+        match = RANGE_RE.match(self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), end)
+            if start > end:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{len(content)}')
+                self.end_headers()
+                return
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+        self.end_headers()
+        if not send_body:
+            return
+        # ffprobe asks for open-ended ranges and hangs up once it has read
+        # enough, so count only what was actually sent.
+        for offset in range(start, end + 1, SEND_CHUNK_BYTES):
+            chunk = content[offset : min(offset + SEND_CHUNK_BYTES, end + 1)]
+            try:
+                self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            with self.server.lock:
+                self.server.bytes_sent += len(chunk)
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Keep test output quiet."""
+
+
+class ObjectServer(ThreadingHTTPServer):
+    """A local stand-in for the object store, recording how many bytes it sent.
+
+    bytes_sent includes whatever the socket buffered before the client hung
+    up, so it is an upper bound on what the client actually read.
+    requested_paths records every object path the client asked for.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Listen on an ephemeral localhost port."""
+        super().__init__(('127.0.0.1', 0), _ObjectHandler)
+        self.objects = {}
+        self.bytes_sent = 0
+        self.requested_paths = set()
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        """Accept a connection with a small send buffer, so unread data is not counted."""
+        connection, address = super().get_request()
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_CHUNK_BYTES)
+        return connection, address
+
+    def url(self, path):
+        """Return a URL for path with a query string like a presigned GET."""
+        return f'http://127.0.0.1:{self.server_port}{path}?X-Amz-Signature=test'
+
+
+@skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'requires ffmpeg and ffprobe')
+class ProbeMediaDurationOverHttpTests(BaseTestCase):
+    """Tests that ffprobe reads only container headers from presigned URLs."""
+
+    # Long enough that the encoded files are several MB.
+    DURATION_SECONDS = 240
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the object server and encode one sample per container."""
+        super().setUpClass()
+        cls.server = ObjectServer()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the object server and remove the samples."""
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def _encode(self, name, *output_args, video=False):
+        """Encode noise (plus a test pattern for video), which keeps bitrates honest."""
+        noise = f'anoisesrc=amplitude=0.3:duration={self.DURATION_SECONDS}'
+        inputs = ['-f', 'lavfi', '-i', noise]
+        if video:
+            inputs += [
+                '-f',
+                'lavfi',
+                '-i',
+                f'testsrc=size=320x240:rate=10:duration={self.DURATION_SECONDS}',
+            ]
+        path = os.path.join(self.temp_dir, name)
+        subprocess.run(
+            ['ffmpeg', '-nostdin', '-y', '-v', 'error', *inputs, *output_args, path],
+            check=True,
+        )
+        with open(path, 'rb') as sample:
+            return sample.read()
+
+    def _assert_probed_from_headers(self, name, content):
+        self.server.objects[f'/{name}'] = content
+        self.server.bytes_sent = 0
+
+        duration = probe_media_duration(self.server.url(f'/{name}'))
+
+        self.assertIsNotNone(duration)
+        self.assertAlmostEqual(duration.total_seconds(), self.DURATION_SECONDS, delta=1)
+        self.assertLess(self.server.bytes_sent, len(content) / 4)
+
+    def test_mp4_with_trailing_moov_atom(self):
+        """MP4 from ffmpeg has its moov atom after mdat, so ffprobe must seek to the end."""
+        content = self._encode(
+            'clip.mp4', '-c:v', 'libx264', '-preset', 'ultrafast', '-b:v', '500k',
+            '-c:a', 'aac', '-b:a', '128k', video=True,
+        )  # fmt: skip
+        self._assert_probed_from_headers('clip.mp4', content)
+
+    def test_webm(self):
+        """Browser-recorded style Opus in WebM."""
+        content = self._encode('clip.webm', '-c:a', 'libopus', '-b:a', '128k')
+        self._assert_probed_from_headers('clip.webm', content)
+
+    def test_mp3(self):
+        """MP3 duration comes from the Xing header."""
+        content = self._encode('clip.mp3', '-c:a', 'libmp3lame', '-b:a', '128k')
+        self._assert_probed_from_headers('clip.mp3', content)
+
+    def test_ogg(self):
+        """Ogg duration comes from the last page's granule position, read from the tail."""
+        content = self._encode('clip.ogg', '-c:a', 'libvorbis', '-b:a', '128k')
+        self._assert_probed_from_headers('clip.ogg', content)
+
+    def test_missing_object_returns_none(self):
+        """A URL that cannot be fetched is reported like an unreadable file."""
+        self.assertIsNone(probe_media_duration(self.server.url('/missing.mp3')))
+
+    def test_playlist_references_are_not_followed(self):
+        """An HLS playlist is rejected before ffprobe fetches the segments it names."""
+        segment = self._encode('segment.mp3', '-c:a', 'libmp3lame', '-b:a', '128k')
+        self.server.objects['/segment.mp3'] = segment
+        playlist = (
+            '#EXTM3U\n#EXT-X-TARGETDURATION:240\n#EXTINF:240,\n'
+            f'{self.server.url("/segment.mp3")}\n#EXT-X-ENDLIST\n'
+        )
+        self.server.objects['/upload.m3u8'] = playlist.encode()
+        self.server.requested_paths.clear()
+
+        self.assertIsNone(probe_media_duration(self.server.url('/upload.m3u8')))
+        self.assertEqual(self.server.requested_paths, {'/upload.m3u8'})
+
+        local_playlist = os.path.join(self.temp_dir, 'upload.m3u8')
+        with open(local_playlist, 'w') as playlist_file:
+            playlist_file.write(playlist)
+        self.server.requested_paths.clear()
+        self.assertIsNone(probe_media_duration(local_playlist))
+        self.assertEqual(self.server.requested_paths, set())
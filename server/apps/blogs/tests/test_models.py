@@ -10,6 +10,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
 
 from ..models import Media, Post
+from ..tasks import process_post_media
 from ..utils.media import get_media_duration
 from . import BaseTestCase
 
@@ -67,8 +68,9 @@ class MediaModelTests(BaseTestCase):
         self.assertTrue(os.path.exists(file_path), f"Main file should exist at {file_path}")
         self.assertTrue(os.path.exists(media_dir), f"Media directory should exist at {media_dir}")
 
-        # Delete the media record
-        media.delete()
+        # Delete the media record; files go once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            media.delete()
 
         # Verify files are deleted
         self.assertFalse(
@@ -281,6 +283,11 @@ class MediaModelTests(BaseTestCase):
             self.assertIsNotNone(media.id)
             self.assertTrue(os.path.exists(media.file.path))
 
+            # Saving never probes the stored file; background processing does.
+            self.assertIsNone(media.duration)
+            process_post_media.call(media.pk)
+            media.refresh_from_db()
+
             # Check that duration was extracted and saved
             self.assertIsNotNone(media.duration)
             self.assertIsInstance(media.duration, timedelta)
@@ -370,7 +377,8 @@ class PostModelTests(BaseTestCase):
         self.assertTrue(os.path.exists(mp3_path), f"MP3 file should exist at {mp3_path}")
 
         # Delete the post
-        post.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
 
         # Verify files are deleted
         self.assertFalse(os.path.exists(file_path), f"File should be deleted from {file_path}")
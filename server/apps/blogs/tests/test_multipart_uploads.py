@@ -0,0 +1,211 @@
+"""Tests for presigned multipart and resumable media uploads."""
+
+import json
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.uploads.views import MULTIPART_PART_SIZE
+
+from . import ViewTestCase
+
+User = get_user_model()
+
+PART = MULTIPART_PART_SIZE
+
+
+class MultipartUploadTests(ViewTestCase):
+    """Initiate, sign, list, complete, and abort multipart uploads."""
+
+    def setUp(self):
+        """Log in and stand in for the object store's multipart API."""
+        super().setUp()
+        self.user = User.objects.create_user(username='uploader', password='testpass123')
+        self.client.force_login(self.user)
+
+        self.s3 = {}
+        for name in (
+            'create_multipart_upload',
+            'generate_presigned_upload_part_urls',
+            'list_uploaded_parts',
+            'complete_multipart_upload',
+            'abort_multipart_upload',
+        ):
+            patcher = mock.patch(f'apps.uploads.views.{name}')
+            self.s3[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.s3['create_multipart_upload'].return_value = 'upload-1'
+        self.s3['generate_presigned_upload_part_urls'].side_effect = (
+            lambda key, upload_id, numbers, expires_in: {
+                number: f'https://r2/{key}?partNumber={number}' for number in numbers
+            }
+        )
+
+    def _post(self, name, payload):
+        return self.client.post(
+            reverse(name), json.dumps(payload), content_type='application/json'
+        )
+
+    def _initiate(self, size=2 * PART + 10, file_name='clip.mp4'):
+        return self._post(
+            'multipart-upload-initiate',
+            {'content_type': 'video/mp4', 'file_name': file_name, 'size': size},
+        )
+
+    def _uploaded_parts(self, sizes):
+        return [
+            {'PartNumber': number, 'Size': size, 'ETag': f'"etag-{number}"'}
+            for number, size in enumerate(sizes, start=1)
+        ]
+
+    def test_initiate_returns_a_token_and_part_layout(self):
+        """Parts are a fixed size, so the count follows from the declared size."""
+        response = self._initiate()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['part_size'], PART)
+        self.assertEqual(data['part_count'], 3)
+        self.assertEqual(data['file_path'], f'post/audio/{self.user.id}/clip.mp4')
+        self.assertTrue(data['upload_token'])
+        self.s3['create_multipart_upload'].assert_called_once_with(data['file_path'], 'video/mp4')
+
+    def test_initiate_rejects_invalid_or_oversized_uploads(self):
+        """The size limit applies before any upload is started."""
+        with override_settings(MAX_MEDIA_UPLOAD_BYTES=PART):
+            self.assertEqual(self._initiate(size=PART + 1).status_code, 400)
+        self.assertEqual(self._initiate(size=0).status_code, 400)
+        self.assertEqual(self._initiate(size='100').status_code, 400)
+        self.assertEqual(self._initiate(file_name='../..').status_code, 400)
+        self.s3['create_multipart_upload'].assert_not_called()
+
+    def test_sign_parts_returns_urls_for_the_requested_batch(self):
+        """Clients sign several parts at once and upload them in parallel."""
+        token = self._initiate().json()['upload_token']
+
+        response = self._post(
+            'multipart-upload-sign-parts', {'upload_token': token, 'part_numbers': [3, 1]}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['urls']), {'1', '3'})
+        args = self.s3['generate_presigned_upload_part_urls'].call_args.args
+        self.assertEqual(args[1:], ('upload-1', [1, 3]))
+
+    def test_sign_parts_beyond_the_part_count_is_rejected(self):
+        """The part count fixed at initiate caps how much can be uploaded."""
+        token = self._initiate().json()['upload_token']
+
+        for part_numbers in ([4], [0], [], 'all', list(range(1, 102)), [True], [False]):
+            response = self._post(
+                'multipart-upload-sign-parts',
+                {'upload_token': token, 'part_numbers': part_numbers},
+            )
+            self.assertEqual(response.status_code, 400, part_numbers)
+        self.s3['generate_presigned_upload_part_urls'].assert_not_called()
+
+    def test_tokens_are_bound_to_the_user_who_started_the_upload(self):
+        """Another user cannot sign, complete, or abort someone else's upload."""
+        token = self._initiate().json()['upload_token']
+        other = User.objects.create_user(username='other_uploader', password='testpass123')
+        self.client.force_login(other)
+
+        response = self._post('multipart-upload-abort', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 403)
+        self.s3['abort_multipart_upload'].assert_not_called()
+
+    def test_tampered_token_is_rejected(self):
+        """Upload tokens are signed, so their key and limits cannot be edited."""
+        token = self._initiate().json()['upload_token']
+
+        response = self._post('multipart-upload-list-parts', {'upload_token': token + 'x'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_parts_reports_progress_for_resuming(self):
+        """An interrupted client learns which parts it no longer needs to send."""
+        token = self._initiate().json()['upload_token']
+        self.s3['list_uploaded_parts'].return_value = self._uploaded_parts([PART])
+
+        response = self._post('multipart-upload-list-parts', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['parts'], [{'part_number': 1, 'size': PART}])
+
+    def test_list_parts_of_a_discarded_upload_is_not_found(self):
+        """Clients start over when the store no longer has the upload."""
+        token = self._initiate().json()['upload_token']
+        self.s3['list_uploaded_parts'].return_value = None
+
+        response = self._post('multipart-upload-list-parts', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_complete_assembles_parts_in_order(self):
+        """The server lists the parts itself rather than trusting client ETags."""
+        token = self._initiate().json()['upload_token']
+        self.s3['list_uploaded_parts'].return_value = list(
+            reversed(self._uploaded_parts([PART, PART, 10]))
+        )
+
+        response = self._post('multipart-upload-complete', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['file_path'], f'post/audio/{self.user.id}/clip.mp4')
+        self.s3['complete_multipart_upload'].assert_called_once_with(
+            f'post/audio/{self.user.id}/clip.mp4',
+            'upload-1',
+            ['"etag-1"', '"etag-2"', '"etag-3"'],
+        )
+
+    def test_complete_rejected_by_the_object_store_is_a_client_error(self):
+        """S3 errors from assembling the parts come back as a 400 with their code."""
+        token = self._initiate().json()['upload_token']
+        self.s3['list_uploaded_parts'].return_value = self._uploaded_parts([PART, PART, 10])
+        self.s3['complete_multipart_upload'].side_effect = ClientError(
+            {'Error': {'Code': 'InvalidPart', 'Message': 'One or more parts were not found'}},
+            'CompleteMultipartUpload',
+        )
+
+        response = self._post('multipart-upload-complete', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['code'], 'InvalidPart')
+
+    def test_complete_with_missing_parts_keeps_the_upload_open(self):
+        """Missing parts are reported so the client can resume and retry."""
+        token = self._initiate().json()['upload_token']
+        self.s3['list_uploaded_parts'].return_value = self._uploaded_parts([PART])
+
+        response = self._post('multipart-upload-complete', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['missing_parts'], [2, 3])
+        self.s3['complete_multipart_upload'].assert_not_called()
+        self.s3['abort_multipart_upload'].assert_not_called()
+
+    def test_complete_with_oversized_parts_aborts(self):
+        """Parts larger than declared are discarded, never assembled."""
+        token = self._initiate().json()['upload_token']
+        self.s3['list_uploaded_parts'].return_value = self._uploaded_parts([PART, PART, PART])
+
+        response = self._post('multipart-upload-complete', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 400)
+        self.s3['complete_multipart_upload'].assert_not_called()
+        self.s3['abort_multipart_upload'].assert_called_once()
+
+    def test_abort_discards_the_upload(self):
+        """Clients can abandon an upload explicitly."""
+        token = self._initiate().json()['upload_token']
+
+        response = self._post('multipart-upload-abort', {'upload_token': token})
+
+        self.assertEqual(response.status_code, 204)
+        self.s3['abort_multipart_upload'].assert_called_once_with(
+            f'post/audio/{self.user.id}/clip.mp4', 'upload-1'
+        )
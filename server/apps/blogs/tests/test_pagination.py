@@ -1,11 +1,16 @@
 """Tests for post cursor pagination and feed filters."""
 
+from io import StringIO
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.urls import reverse
 from rest_framework.test import APIClient
 
-from ..models import Like, Post
-from . import ViewTestCase
+from ..models import VISIBILITY_PRIVATE, Like, Post
+from . import BaseTestCase, ViewTestCase
 
 User = get_user_model()
 
@@ -111,6 +116,31 @@ class PostPaginationTests(ViewTestCase):
         expected_ids = sorted((post.id for post in posts), reverse=True)
         self.assertEqual(seen_ids, expected_ids)
 
+    def test_signed_in_feed_shows_public_and_own_posts(self):
+        """Signed-in readers see every public post plus their own private ones."""
+        own_private = Post.objects.create(author=self.user, visibility=VISIBILITY_PRIVATE)
+        other_private = Post.objects.create(author=self.other_user, visibility=VISIBILITY_PRIVATE)
+        other_public = Post.objects.create(author=self.other_user)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(reverse('post-list'))
+
+        self.assertEqual(response.status_code, 200)
+        ids = {post['id'] for post in response.data['results']}
+        self.assertEqual(ids, {own_private.id, other_public.id})
+        self.assertNotIn(other_private.id, ids)
+
+    @skipUnless(connection.vendor == 'sqlite', 'checks the SQLite query plan')
+    def test_signed_in_feed_walks_the_feed_index_in_order(self):
+        """The public-or-own filter does not turn into a multi-index OR plus a sort."""
+        queryset = Post.objects.visible_to(self.user).order_by('-created', '-id')[:21]
+
+        plan = queryset.explain()
+
+        self.assertIn('post_feed_idx', plan)
+        self.assertNotIn('MULTI-INDEX OR', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
     def test_liked_filter_returns_empty_results_for_anonymous_user(self):
         """Anonymous liked=true requests should return an empty page."""
         posts = self._create_posts(1, author=self.other_user)
@@ -119,3 +149,22 @@ class PostPaginationTests(ViewTestCase):
         response = self.client.get(reverse('post-list'), {'liked': 'true'})
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['results'], [])
+
+
+class BenchmarkFeedCommandTests(BaseTestCase):
+    """Tests for the benchmark_feed management command."""
+
+    def test_reports_every_scope_and_rolls_back_seeded_posts(self):
+        """Each feed scope gets a plan and timing, and seeded rows are discarded."""
+        out = StringIO()
+        call_command(
+            'benchmark_feed', '--posts', '60', '--authors', '2', '--repeat', '1', stdout=out
+        )
+
+        output = out.getvalue()
+        for scope in ('public feed', 'public feed, signed in', 'author feed', 'drafts', 'pinned'):
+            self.assertIn(scope, output)
+        self.assertIn('sqlite: 60 posts in table', output)
+        self.assertIn('rolled back seeded rows', output)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(User.objects.filter(username__startswith='feedbench-').exists())
@@ -0,0 +1,108 @@
+"""Tests for the cached PostSerializer fragments."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Like, LinkPreview, Media, Post
+from ..serializers import PostSerializer, post_fragment_key
+from . import ViewTestCase
+
+User = get_user_model()
+
+
+class PostFragmentCacheTests(ViewTestCase):
+    """Tests for per-post fragment caching in feed responses."""
+
+    def setUp(self):
+        """Create an author, a reader, and a few posts."""
+        super().setUp()
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.posts = [
+            Post.objects.create(author=self.author, head=f'Post {index}') for index in range(3)
+        ]
+
+    def _feed(self):
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item for item in response.data['results']}
+
+    def test_second_feed_request_reuses_cached_fragments(self):
+        """Fragments are built once and later pages only overlay per-request fields."""
+        self._feed()
+
+        with mock.patch.object(
+            PostSerializer, 'build_fragment', autospec=True, side_effect=AssertionError
+        ):
+            feed = self._feed()
+
+        self.assertEqual(feed[self.posts[0].id]['head'], 'Post 0')
+
+    def test_viewer_fields_and_counters_are_not_cached(self):
+        """Liked, share_token, and counters reflect the current viewer and row."""
+        self.client.force_authenticate(user=self.author)
+        feed = self._feed()
+        self.assertEqual(feed[self.posts[0].id]['share_token'], self.posts[0].share_token)
+
+        Like.objects.create(user=self.reader, post=self.posts[0])
+        self.client.force_authenticate(user=self.reader)
+        feed = self._feed()
+
+        self.assertIsNone(feed[self.posts[0].id]['share_token'])
+        self.assertTrue(feed[self.posts[0].id]['liked'])
+        self.assertEqual(feed[self.posts[0].id]['like_count'], 1)
+
+    def test_post_edit_and_link_preview_fetch_invalidate_the_fragment(self):
+        """Saving the post or one of its previews changes the fragment key."""
+        post = self.posts[0]
+        self._feed()
+
+        post.head = 'Edited'
+        post.save(update_fields=['head'])
+        self.assertEqual(self._feed()[post.id]['head'], 'Edited')
+
+        preview = LinkPreview.objects.create(post=post, url='https://example.com/')
+        preview.status = 'ok'
+        preview.title = 'Example'
+        preview.save(update_fields=['status', 'title'])
+
+        previews = self._feed()[post.id]['link_previews']
+        self.assertEqual([item['title'] for item in previews], ['Example'])
+
+    def test_media_file_urls_are_absolute(self):
+        """Media file URLs cached without a request are made absolute per request."""
+        post = self.posts[0]
+        post.media = Media.objects.create(
+            file='post/audio/clip.webm', mp3_file='post/audio/clip.mp3', media_type='audio'
+        )
+        post.save()
+
+        for _ in range(2):
+            media = self._feed()[post.id]['media']
+            self.assertEqual(media['file'], 'http://testserver/media/post/audio/clip.webm')
+            self.assertEqual(media['mp3_file'], 'http://testserver/media/post/audio/clip.mp3')
+
+    def test_saving_a_stale_instance_keeps_a_concurrent_bump(self):
+        """A save bumps the stored version instead of writing back its loaded one."""
+        stale = Post.objects.get(pk=self.posts[0].pk)
+        Post.objects.filter(pk=stale.pk).bump_fragment_version()
+        stored = Post.objects.get(pk=stale.pk).fragment_version
+
+        stale.head = 'Edited'
+        stale.save()
+
+        self.assertEqual(stale.fragment_version, stored + 1)
+        self.assertEqual(Post.objects.get(pk=stale.pk).fragment_version, stored + 1)
+
+    def test_author_changes_change_the_fragment_key(self):
+        """Renaming the author or changing the avatar misses the cached fragment."""
+        post = Post.objects.select_related('author').get(pk=self.posts[0].pk)
+        key = post_fragment_key(post)
+
+        post.author.avatar.name = 'avatars/new.jpg'
+
+        self.assertNotEqual(post_fragment_key(post), key)
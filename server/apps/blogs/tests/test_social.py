@@ -42,6 +42,32 @@ class LikeTests(ViewTestCase):
         self.assertFalse(response.data['liked'], "Response should report liked=False")
         self.assertEqual(response.data['like_count'], 0, "Like count should be 0")
 
+    def test_like_and_unlike_keep_the_post_counter_in_step(self):
+        """The stored like_count should follow likes and unlikes, including repeats."""
+        self.client.force_authenticate(user=self.user)
+
+        self.client.post(reverse('post-like', args=[self.post.id]))
+        self.client.post(reverse('post-like', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1, "Repeat likes must not double count")
+
+        self.client.delete(reverse('post-like', args=[self.post.id]))
+        self.client.delete(reverse('post-like', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0, "Repeat unlikes must not go negative")
+
+    def test_concurrent_unlikes_uncount_the_like_once(self):
+        """Two requests deleting the same like row only decrement like_count once."""
+        like = Like.objects.create(user=self.user, post=self.post)
+        Like.objects.create(user=self.other_user, post=self.post)
+        stale = Like.objects.get(pk=like.pk)
+
+        like.delete()
+        stale.delete()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1, "Only the row actually deleted is uncounted")
+
     def test_like_is_idempotent(self):
         """Liking the same post twice should not create duplicate likes."""
         self.client.force_authenticate(user=self.user)
@@ -146,6 +172,33 @@ class CommentTests(ViewTestCase):
         comment = Comment.objects.get(id=response.data['id'])
         self.assertEqual(comment.post_id, self.post.id, "Comment should belong to the post")
 
+    def test_comment_create_and_delete_keep_the_post_counter_in_step(self):
+        """The stored comment_count should follow comment creation and deletion."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('post-comments', args=[self.post.id]), {'body': 'Counted'}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        self.client.delete(
+            reverse('post-delete-comment', args=[self.post.id, response.data['id']])
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_deleting_a_comment_twice_uncounts_it_once(self):
+        """A second delete of an already deleted comment leaves comment_count alone."""
+        comment = Comment.objects.create(author=self.user, post=self.post, body='First')
+        Comment.objects.create(author=self.user, post=self.post, body='Second')
+        stale = Comment.objects.get(pk=comment.pk)
+
+        comment.delete()
+        stale.delete()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
     def test_create_comment_rejects_empty_body(self):
         """Comments with an empty body should be rejected."""
         self.client.force_authenticate(user=self.user)
@@ -0,0 +1,181 @@
+"""Tests for queued stored-file deletion and the orphaned object sweep."""
+
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.uploads.s3 import delete_objects
+
+from ..models import LinkPreview, Media, Post, StorageDeletion, queue_storage_deletions
+from ..tasks import MAX_STORAGE_DELETION_ATTEMPTS, drain_storage_deletions
+from . import BaseTestCase
+
+User = get_user_model()
+
+
+class StorageDeletionQueueTests(BaseTestCase):
+    """Queueing deletions and draining them in batches."""
+
+    def test_queued_keys_are_deleted_after_commit_in_batches(self):
+        """One drain sends every queued key, DELETE_OBJECTS_MAX_KEYS at a time."""
+        keys = [f'post/audio/1/clip-{number}.mp3' for number in range(5)]
+        with (
+            mock.patch('apps.blogs.tasks.DELETE_OBJECTS_MAX_KEYS', 2),
+            mock.patch('apps.blogs.tasks.delete_objects', return_value={}) as mock_delete,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            queue_storage_deletions(object_keys=keys)
+            mock_delete.assert_not_called()
+
+        batches = [list(call.args[0]) for call in mock_delete.call_args_list]
+        self.assertEqual(batches, [keys[:2], keys[2:4], keys[4:]])
+        self.assertFalse(StorageDeletion.objects.exists())
+
+    def test_rolled_back_delete_keeps_its_files(self):
+        """Nothing is queued or deleted when the deleting transaction rolls back."""
+        media = Media.objects.create(s3_file_key='post/audio/1/kept.mp3', media_type='audio')
+        media_id = media.pk
+
+        with (
+            mock.patch('apps.blogs.tasks.delete_objects') as mock_delete,
+            self.captureOnCommitCallbacks(execute=True) as callbacks,
+        ):
+            with transaction.atomic():
+                media.delete()
+                transaction.set_rollback(True)
+
+        self.assertEqual(callbacks, [])
+        mock_delete.assert_not_called()
+        self.assertFalse(StorageDeletion.objects.exists())
+        self.assertTrue(Media.objects.filter(pk=media_id).exists())
+
+    def test_failed_deletions_stay_queued_with_the_error(self):
+        """Failures are retried by later drains until they run out of attempts."""
+        queue_storage_deletions(object_keys=['post/audio/1/a.mp3', 'post/audio/1/b.mp3'])
+
+        with mock.patch(
+            'apps.blogs.tasks.delete_objects',
+            return_value={'post/audio/1/b.mp3': 'Access Denied'},
+        ):
+            drain_storage_deletions.call()
+
+        row = StorageDeletion.objects.get()
+        self.assertEqual(row.name, 'post/audio/1/b.mp3')
+        self.assertEqual(row.attempts, 1)
+        self.assertEqual(row.last_error, 'Access Denied')
+
+        StorageDeletion.objects.update(attempts=MAX_STORAGE_DELETION_ATTEMPTS)
+        with mock.patch('apps.blogs.tasks.delete_objects') as mock_delete:
+            drain_storage_deletions.call()
+        mock_delete.assert_not_called()
+
+    def test_local_files_and_emptied_media_directories_are_removed(self):
+        """With local storage the files are deleted from disk, media folders included."""
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            override_settings(MEDIA_ROOT=media_root, USE_LOCAL_FILE_STORAGE=True),
+        ):
+            author = User.objects.create_user(username='deleter', password='testpass123')
+            post = Post.objects.create(author=author, head='Delete me')
+            preview = LinkPreview.objects.create(post=post, url='https://example.com')
+            preview.image.save('card.jpg', ContentFile(b'image bytes'), save=True)
+            media = Media.objects.create(
+                file=ContentFile(b'audio bytes', name='clip.mp3'), media_type='audio'
+            )
+            post.media = media
+            post.save()
+            paths = [preview.image.path, media.file.path]
+
+            with (
+                mock.patch('apps.blogs.tasks.delete_objects') as mock_delete,
+                self.captureOnCommitCallbacks(execute=True),
+            ):
+                post.delete()
+
+            mock_delete.assert_not_called()
+            for path in paths:
+                self.assertFalse(os.path.exists(path))
+            self.assertFalse(os.path.exists(os.path.dirname(paths[1])))
+            self.assertFalse(StorageDeletion.objects.exists())
+
+    def test_delete_objects_sends_at_most_1000_keys_per_request(self):
+        """Large deletes are split into DeleteObjects batches and errors mapped to keys."""
+        keys = [f'post/audio/1/{number}.mp3' for number in range(2500)]
+        s3 = mock.Mock()
+        s3.delete_objects.side_effect = [
+            {},
+            {'Errors': [{'Key': keys[1500], 'Code': 'AccessDenied', 'Message': 'Denied'}]},
+            {},
+        ]
+
+        with mock.patch('apps.uploads.s3.get_s3_client', return_value=s3):
+            errors = delete_objects(keys)
+
+        requests = [call.kwargs['Delete'] for call in s3.delete_objects.call_args_list]
+        self.assertEqual([len(request['Objects']) for request in requests], [1000, 1000, 500])
+        self.assertTrue(all(request['Quiet'] for request in requests))
+        self.assertEqual(errors, {keys[1500]: 'Denied'})
+
+
+@override_settings(USE_LOCAL_FILE_STORAGE=False)
+class SweepOrphanedObjectsTests(BaseTestCase):
+    """Tests for the sweep_orphaned_objects command."""
+
+    def setUp(self):
+        """List a bucket holding referenced, queued, recent, and orphaned objects."""
+        super().setUp()
+        Media.objects.create(s3_file_key='post/audio/1/attached.mp3', media_type='audio')
+        StorageDeletion.objects.create(
+            target=StorageDeletion.TARGET_BUCKET, name='post/audio/1/queued.mp3'
+        )
+        old = timezone.now() - timedelta(days=3)
+        listing = {
+            'post/': [
+                {'Key': 'post/audio/1/attached.mp3', 'LastModified': old},
+                {'Key': 'post/audio/1/queued.mp3', 'LastModified': old},
+                {'Key': 'post/audio/1/abandoned.mp3', 'LastModified': old},
+                {'Key': 'post/audio/1/uploading.mp3', 'LastModified': timezone.now()},
+            ],
+            'link_previews/': [{'Key': 'link_previews/2026/01/card.jpg', 'LastModified': old}],
+        }
+        patcher = mock.patch(
+            'apps.blogs.management.commands.sweep_orphaned_objects.iter_objects',
+            side_effect=lambda prefix: iter(listing[prefix]),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _sweep(self, *args):
+        out = StringIO()
+        call_command('sweep_orphaned_objects', *args, stdout=out)
+        return out.getvalue()
+
+    def test_old_unreferenced_objects_are_queued(self):
+        """Only objects past the cutoff that no row or queued deletion names are queued."""
+        output = self._sweep()
+
+        self.assertIn('scanned 5 objects, queued 2 for deletion', output)
+        self.assertEqual(
+            set(
+                StorageDeletion.objects.exclude(name='post/audio/1/queued.mp3').values_list(
+                    'name', flat=True
+                )
+            ),
+            {'post/audio/1/abandoned.mp3', 'link_previews/2026/01/card.jpg'},
+        )
+
+    def test_dry_run_queues_nothing(self):
+        """A dry run reports the orphans without queueing them."""
+        output = self._sweep('--dry-run')
+
+        self.assertIn('would queue 2', output)
+        self.assertEqual(StorageDeletion.objects.count(), 1)
@@ -3,13 +3,18 @@
 
 import os
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
-from ..models import Media, Post
+from ..models import Comment, Like, Media, Post, PostView
+from ..tasks import purge_deleted_posts
+from ..views import PostViewSet
 from . import ViewTestCase
 
 User = get_user_model()
@@ -141,7 +146,8 @@ class PostViewSetTests(ViewTestCase):
         self.assertTrue(os.path.exists(file_path), "Media file should exist before deletion")
 
         # Delete the post
-        response = self.client.delete(reverse('post-detail', args=[post.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('post-detail', args=[post.id]))
 
         # Check response
         self.assertEqual(response.status_code, 204, "Post deletion should return 204 status code")
@@ -158,6 +164,79 @@ class PostViewSetTests(ViewTestCase):
             "Media record should be deleted from database",
         )
 
+    def test_deleted_post_is_hidden_before_it_is_purged(self):
+        """A deleted post disappears at once, even for its author, and is purged later."""
+        post = Post.objects.create(
+            author=self.user, head='Soon gone', pinned_at='2026-01-01T00:00Z'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(reverse('post-detail', args=[post.id]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(callbacks), 1)
+        post.refresh_from_db()
+        self.assertIsNotNone(post.deleted_at)
+        self.assertIsNone(post.pinned_at)
+        self.assertEqual(self.client.get(reverse('post-detail', args=[post.id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('post-list')).data['results'], [])
+
+        callbacks[0]()
+
+        self.assertFalse(Post.objects.filter(id=post.id).exists())
+
+    def test_purge_removes_dependent_rows_in_chunks(self):
+        """Views, likes, and comments of a deleted post are deleted a batch at a time."""
+        post = Post.objects.create(author=self.user, head='Popular')
+        kept = Post.objects.create(author=self.user, head='Kept')
+        for number in range(5):
+            viewer = User.objects.create_user(username=f'viewer{number}', password='testpass123')
+            for target in (post, kept):
+                PostView.objects.create(post=target, viewer_key=f'viewer-{number}')
+                Like.objects.create(user=viewer, post=target)
+                Comment.objects.create(author=viewer, post=target, body='Nice')
+        post.soft_delete()
+
+        with (
+            mock.patch('apps.blogs.tasks.PURGE_BATCH_SIZE', 2),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            purge_deleted_posts.call()
+
+        self.assertFalse(Post.objects.filter(id=post.id).exists())
+        for model in (PostView, Like, Comment):
+            self.assertEqual(model.objects.count(), 5)
+            table = model._meta.db_table
+            chunk_deletes = [
+                query
+                for query in queries.captured_queries
+                if query['sql'].startswith(f'DELETE FROM "{table}" WHERE "{table}"."id" IN')
+            ]
+            self.assertEqual(len(chunk_deletes), 3)
+        kept.refresh_from_db()
+        self.assertEqual((kept.view_count, kept.like_count, kept.comment_count), (5, 5, 5))
+
+    def test_editing_a_post_keeps_a_like_that_lands_meanwhile(self):
+        """A full save of the edited post does not write back its loaded like_count."""
+        post = Post.objects.create(author=self.user, head='Before')
+        liker = User.objects.create_user(username='liker', password='testpass123')
+
+        def like_then_save(view, serializer):
+            Like.objects.create(user=liker, post=post)
+            serializer.save()
+
+        self.client.force_authenticate(user=self.user)
+        with mock.patch.object(PostViewSet, 'perform_update', autospec=True) as perform:
+            perform.side_effect = like_then_save
+            response = self.client.patch(
+                reverse('post-detail', args=[post.id]), {'head': 'After'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        post.refresh_from_db()
+        self.assertEqual((post.head, post.like_count), ('After', 1))
+
     def test_admin_can_delete_any_post(self):
         """Test that admin users can delete any post, not just their own."""
         # Create an admin user
@@ -177,7 +256,8 @@ class PostViewSetTests(ViewTestCase):
         self.client.force_authenticate(user=admin_user)
 
         # Admin should be able to delete the regular user's post
-        response = self.client.delete(reverse('post-detail', args=[post.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('post-detail', args=[post.id]))
 
         # Check response
         self.assertEqual(response.status_code, 204, "Admin should be able to delete any post")
@@ -2,13 +2,18 @@
 
 # pyright: reportAttributeAccessIssue=false
 
+from io import StringIO
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
-from ..models import VISIBILITY_PRIVATE, VISIBILITY_UNLISTED, Post, PostView
-from . import ViewTestCase
+from ..models import VISIBILITY_PRIVATE, VISIBILITY_UNLISTED, Comment, Like, Post, PostView
+from . import BaseTestCase, ViewTestCase
 
 User = get_user_model()
 
@@ -61,6 +66,41 @@ class PostViewCountTests(ViewTestCase):
             f'u:{self.viewer.id}',
         )
 
+    def test_view_counter_counts_each_viewer_once(self):
+        """The stored view_count should only move for newly recorded viewers."""
+        self._record_views(self.viewer_client, [self.public.id])
+        self._record_views(self.viewer_client, [self.public.id])
+        self._record_views(self.other_client, [self.public.id])
+
+        self.public.refresh_from_db()
+        self.assertEqual(self.public.view_count, 2)
+
+    def test_view_inserted_by_a_concurrent_request_is_not_counted_again(self):
+        """Only rows this request inserts are counted; another request counts its own."""
+        other = Post.objects.create(author=self.author, head='Other')
+        PostView.objects.bulk_create(
+            [PostView(post=self.public, viewer_key=f'u:{self.viewer.id}')]
+        )
+
+        self._record_views(self.viewer_client, [self.public.id, other.id])
+
+        self.public.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.public.view_count, other.view_count), (0, 1))
+
+    def test_views_beacon_takes_the_same_queries_for_any_number_of_posts(self):
+        """Rows are inserted and counted with one statement each, however many posts."""
+        posts = [Post.objects.create(author=self.author, head=f'Post {n}') for n in range(20)]
+        query_counts = []
+        for client, batch in ((self.viewer_client, posts[:2]), (self.other_client, posts)):
+            with CaptureQueriesContext(connection) as queries:
+                self._record_views(client, [post.id for post in batch])
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Post.objects.get(pk=posts[0].pk).view_count, 2)
+        self.assertEqual(Post.objects.get(pk=posts[-1].pk).view_count, 1)
+
     def test_separate_viewers_accumulate(self):
         """Different viewer identities each add one view."""
         self._record_views(self.viewer_client, [self.public.id])
@@ -136,3 +176,41 @@ class PostViewCountTests(ViewTestCase):
         self.assertEqual(second_response.status_code, 200)
         self.assertEqual(PostView.objects.filter(post=self.public).count(), 1)
         self.assertContains(response, '<strong>1</strong> view')
+
+
+class ReconcilePostCountsCommandTests(BaseTestCase):
+    """Tests for the reconcile_post_counts management command."""
+
+    def setUp(self):
+        """Create a post with one like, comment, and view."""
+        super().setUp()
+        self.user = User.objects.create_user(username='counter', password='testpass123')
+        self.post = Post.objects.create(author=self.user, head='Counted')
+        self.untouched = Post.objects.create(author=self.user, head='Untouched')
+        Like.objects.create(user=self.user, post=self.post)
+        Comment.objects.create(author=self.user, post=self.post, body='Hi')
+        PostView.objects.create(post=self.post, viewer_key='u:100')
+
+    def test_command_repairs_only_drifted_posts(self):
+        """Drifted counters should be recounted from rows; accurate ones left alone."""
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=0, view_count=3)
+        output = StringIO()
+
+        call_command('reconcile_post_counts', '--batch-size', '1', stdout=output)
+
+        self.post.refresh_from_db()
+        self.assertEqual(
+            (self.post.like_count, self.post.comment_count, self.post.view_count), (1, 1, 1)
+        )
+        self.assertEqual(output.getvalue().strip(), 'checked 2 posts, repaired 1')
+
+    def test_dry_run_reports_without_writing(self):
+        """--dry-run should count drifted posts but leave them unchanged."""
+        Post.objects.filter(pk=self.post.pk).update(view_count=9)
+        output = StringIO()
+
+        call_command('reconcile_post_counts', '--dry-run', stdout=output)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 9)
+        self.assertEqual(output.getvalue().strip(), 'checked 2 posts, would repair 1')
@@ -1,31 +1,39 @@
 """Media utility exports."""
 
 from .convert_to_mp3 import convert_to_mp3
-from .images import is_valid_image
+from .images import (
+    IMAGE_HEADER_BYTES,
+    get_image_dimensions,
+    identify_image_header,
+    is_valid_image,
+)
 from .media import (
     MediaProbeError,
-    get_field_file_duration,
+    describe_media_file,
     get_media_duration,
     probe_media_duration,
+    probe_media_info,
 )
 from .media_processing import (
-    generate_audio_waveform,
+    analyze_media,
     generate_image_rendition,
     generate_poster_rendition,
-    generate_video_poster,
     save_media_thumbnail,
 )
 
 __all__ = [
+    'IMAGE_HEADER_BYTES',
     'MediaProbeError',
+    'analyze_media',
     'convert_to_mp3',
-    'generate_audio_waveform',
-    'get_field_file_duration',
+    'describe_media_file',
     'generate_image_rendition',
     'generate_poster_rendition',
-    'generate_video_poster',
+    'get_image_dimensions',
     'get_media_duration',
+    'identify_image_header',
     'is_valid_image',
     'probe_media_duration',
+    'probe_media_info',
     'save_media_thumbnail',
 ]
@@ -23,3 +23,22 @@ def get_file_mime_type(file_path):
     except Exception as e:
         logger.error(f'Error getting mime type for {file_path}: {str(e)}')
         return 'unknown'
+
+
+def get_buffer_mime_type(data):
+    """Return the MIME type the file command reports for leading file bytes."""
+    try:
+        result = subprocess.run(
+            [
+                'file',
+                '-b',
+                '--mime-type',
+                '-',
+            ],
+            input=data,
+            capture_output=True,
+        )
+        return result.stdout.decode().strip() or 'unknown'
+    except Exception as e:
+        logger.error(f'Error getting mime type from buffer: {str(e)}')
+        return 'unknown'
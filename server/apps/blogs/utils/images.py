@@ -1,7 +1,16 @@
 """Image validation helpers."""
 
+from io import BytesIO
+
 from PIL import Image
 
+# EXIF orientations that rotate the image by 90 or 270 degrees.
+EXIF_ORIENTATION_TAG = 0x0112
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+# Enough of the file for the format and dimensions of common images, even
+# with large EXIF or ICC metadata ahead of the frame header.
+IMAGE_HEADER_BYTES = 256 * 1024
+
 
 def is_valid_image(source) -> bool:
     """Return True when source (a path or file object) contains a decodable image."""
@@ -11,3 +20,38 @@ def is_valid_image(source) -> bool:
     except Exception:
         return False
     return True
+
+
+def identify_image_header(header: bytes) -> tuple[str, int, int] | None:
+    """Return (format, width, height) from the leading bytes of an image, or None.
+
+    Only the header is parsed, so header can be a prefix of the file. None
+    means the bytes are not a recognizable image header, or too little of it
+    was given.
+    """
+    try:
+        with Image.open(BytesIO(header)) as image:
+            image_format = image.format
+            width, height = image.size
+    except Exception:
+        return None
+    if not image_format or width <= 0 or height <= 0:
+        return None
+    return image_format, width, height
+
+
+def get_image_dimensions(source) -> tuple[int, int] | None:
+    """Return the displayed (width, height) of an image, or None when unreadable.
+
+    Only the header is parsed; EXIF rotation is applied so portrait photos
+    report portrait dimensions.
+    """
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            orientation = image.getexif().get(EXIF_ORIENTATION_TAG)
+    except Exception:
+        return None
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
@@ -1,13 +1,24 @@
 """Media probing helpers."""
 
+import json
 import logging
 import os
 import subprocess
-import tempfile
 from datetime import timedelta
 
+from .get_file_mimetype import get_file_mime_type
+from .images import get_image_dimensions
+
 logger = logging.getLogger('server.apps.blogs')
 
+# Upper bound on each network read or connect when probing a URL.
+PROBE_URL_TIMEOUT_SECONDS = 15
+
+# Demuxers ffprobe/ffmpeg may open. Playlist and script formats such as hls
+# and concat are left out because they make ffmpeg fetch the files they
+# reference, which would let an upload point the worker at arbitrary URLs.
+MEDIA_FORMAT_WHITELIST = 'mov,matroska,ogg,mp3,wav,w64,flac,aac,aiff,caf,amr,avi,asf,flv,mpegts'
+
 
 class MediaProbeError(Exception):
     """Raised when ffprobe cannot run at all (missing binary, OS failure).
@@ -17,30 +28,40 @@ class MediaProbeError(Exception):
     """
 
 
-def probe_media_duration(file_path: str) -> timedelta | None:
+def probe_media_duration(source: str) -> timedelta | None:
     """Return the media duration, or None when ffprobe rejects the file.
 
+    source is a local path or an http(s) URL such as a presigned GET; for a
+    URL ffprobe reads only the container headers (and seeks to an MP4 moov
+    atom or an Ogg tail) over range requests instead of the whole object.
+    A URL that cannot be fetched also returns None.
+
     Raises MediaProbeError when ffprobe itself cannot run, so callers can
     distinguish an invalid file from a broken environment.
     """
+    network_options = []
+    if _is_url(source):
+        network_options = ['-rw_timeout', str(PROBE_URL_TIMEOUT_SECONDS * 1_000_000)]
     try:
         result = subprocess.run(
             [
                 'ffprobe',
                 '-v',
                 'error',
+                *media_input_options(source),
+                *network_options,
                 '-show_entries',
                 'format=duration',
                 '-of',
                 'default=noprint_wrappers=1:nokey=1',
-                file_path,
+                source,
             ],
             capture_output=True,
             text=True,
             check=True,
         )
     except subprocess.CalledProcessError as e:
-        logger.info(f'ffprobe rejected {file_path}: {e.stderr.strip() if e.stderr else e}')
+        logger.info(f'ffprobe rejected {_loggable(source)}: {e.stderr.strip() if e.stderr else e}')
         return None
     except OSError as e:
         raise MediaProbeError(f'ffprobe could not run: {e}') from e
@@ -48,48 +69,129 @@ def probe_media_duration(file_path: str) -> timedelta | None:
     try:
         return timedelta(seconds=float(result.stdout.strip()))
     except ValueError:
-        logger.info(f'ffprobe found no duration for {file_path}')
+        logger.info(f'ffprobe found no duration for {_loggable(source)}')
         return None
 
 
-def get_media_duration(file_path: str) -> timedelta | None:
-    """Returns the duration of a media file as a timedelta object using ffprobe."""
+def media_input_options(source: str) -> list[str]:
+    """Return the ffmpeg/ffprobe input options that confine what source may open.
+
+    A local path may only read local files and a URL only its own scheme, and
+    either way only the containers in MEDIA_FORMAT_WHITELIST are demuxed, so a
+    crafted upload cannot make ffmpeg follow references to other resources.
+    """
+    if source.startswith('https://'):
+        protocols = 'https,tls,tcp'
+    elif source.startswith('http://'):
+        protocols = 'http,tcp'
+    else:
+        protocols = 'file'
+    return ['-protocol_whitelist', protocols, '-format_whitelist', MEDIA_FORMAT_WHITELIST]
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(('http://', 'https://'))
+
+
+def _loggable(source: str) -> str:
+    """Drop the query string, which holds a presigned URL's signature."""
+    return source.split('?', 1)[0] if _is_url(source) else source
+
+
+def probe_media_info(file_path: str) -> dict | None:
+    """Return duration, dimensions, and stream presence from one ffprobe run.
+
+    Width and height come from the first video stream that is not embedded
+    cover art and are None for audio. has_audio reports whether any audio
+    stream exists. Returns None when ffprobe rejects the file and raises
+    MediaProbeError when ffprobe cannot run.
+    """
     try:
-        return probe_media_duration(file_path)
-    except MediaProbeError as e:
-        logger.error(f'Error getting duration for {file_path}: {str(e)}')
+        result = subprocess.run(
+            [
+                'ffprobe',
+                '-v',
+                'error',
+                *media_input_options(file_path),
+                '-show_entries',
+                'format=duration:stream=codec_type,width,height:stream_disposition=attached_pic',
+                '-of',
+                'json',
+                file_path,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        logger.info(f'ffprobe rejected {file_path}: {e.stderr.strip() if e.stderr else e}')
         return None
+    except OSError as e:
+        raise MediaProbeError(f'ffprobe could not run: {e}') from e
 
+    try:
+        probe = json.loads(result.stdout)
+    except ValueError:
+        logger.info(f'ffprobe returned unreadable output for {file_path}')
+        return None
 
-def get_field_file_duration(field_file) -> timedelta | None:
-    """Return media duration for a Django FieldFile without assuming local storage."""
+    info = {'duration': None, 'width': None, 'height': None, 'has_audio': False}
     try:
-        return get_media_duration(field_file.path)
-    except (NotImplementedError, ValueError):
+        info['duration'] = timedelta(seconds=float(probe.get('format', {})['duration']))
+    except (KeyError, TypeError, ValueError):
         pass
-    except Exception:
-        logger.exception("Error opening local media path for %s", field_file.name)
-        return None
+    for stream in probe.get('streams', []):
+        if stream.get('codec_type') == 'audio':
+            info['has_audio'] = True
+        elif (
+            stream.get('codec_type') == 'video'
+            and stream.get('width')
+            and info['width'] is None
+            and not stream.get('disposition', {}).get('attached_pic')
+        ):
+            info['width'] = stream['width']
+            info['height'] = stream.get('height')
+    return info
+
+
+def describe_media_file(file_path: str, media_type: str, probe: bool = True) -> dict:
+    """Return the Media metadata columns detected from a local file.
+
+    Values that cannot be detected are None; probing failures are logged
+    rather than raised so the cheap fields are still recorded. Pass
+    probe=False to skip ffprobe for audio/video when the caller probes anyway.
+    """
+    mime_type = get_file_mime_type(file_path)
+    metadata = {
+        'mime_type': '' if mime_type == 'unknown' else mime_type,
+        'size': os.path.getsize(file_path),
+        'width': None,
+        'height': None,
+    }
+    if media_type == 'image':
+        dimensions = get_image_dimensions(file_path)
+        if dimensions:
+            metadata['width'], metadata['height'] = dimensions
+        return metadata
+    if not probe:
+        return metadata
 
-    temp_path = None
-    suffix = os.path.splitext(field_file.name)[1]
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            temp_path = temp_file.name
-            field_file.open('rb')
-            try:
-                while chunk := field_file.read(64 * 1024):
-                    temp_file.write(chunk)
-            finally:
-                field_file.close()
-
-        return get_media_duration(temp_path)
-    except Exception:
-        logger.exception("Error getting duration for %s", field_file.name)
+        info = probe_media_info(file_path)
+    except MediaProbeError:
+        logger.exception('Could not probe %s for metadata', file_path)
+        info = None
+    if info:
+        metadata['duration'] = info['duration']
+        if media_type == 'video':
+            metadata['width'], metadata['height'] = info['width'], info['height']
+    return metadata
+
+
+def get_media_duration(file_path: str) -> timedelta | None:
+    """Returns the duration of a media file as a timedelta object using ffprobe."""
+    try:
+        return probe_media_duration(file_path)
+    except MediaProbeError as e:
+        logger.error(f'Error getting duration for {file_path}: {str(e)}')
         return None
-    finally:
-        if temp_path:
-            try:
-                os.unlink(temp_path)
-            except FileNotFoundError:
-                pass
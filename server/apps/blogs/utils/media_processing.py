@@ -2,81 +2,165 @@
 
 from __future__ import annotations
 
+import logging
 import os
 import subprocess
 import sys
-import tempfile
 from array import array
 from io import BytesIO
+from typing import BinaryIO
 
 from django.core.files.base import ContentFile
 from PIL import Image, ImageOps
 
+from .media import media_input_options, probe_media_info
+
+logger = logging.getLogger('server.apps.blogs')
+
 VIDEO_THUMBNAIL_MAX_WIDTH = 1280
 IMAGE_RENDITION_MAX_EDGE = 1600
 POSTER_MAX_EDGE = 1280
 IMAGE_SKIP_MAX_BYTES = 300 * 1024
 WAVEFORM_BUCKETS = 120
-
-
-def generate_video_poster(input_path: str) -> ContentFile | None:
-    """Capture a JPEG poster frame from a video file."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        output_path = os.path.join(temp_dir, 'poster.jpg')
-        for seek_time in ('0.5', '0'):
-            _run_video_poster_ffmpeg(input_path, output_path, seek_time)
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                with open(output_path, 'rb') as image_file:
-                    return ContentFile(image_file.read())
-        return None
-
-
-def _run_video_poster_ffmpeg(input_path: str, output_path: str, seek_time: str) -> None:
-    subprocess.run(
-        [
-            'ffmpeg',
-            '-y',
-            '-ss',
-            seek_time,
-            '-i',
-            input_path,
-            '-frames:v',
-            '1',
-            '-vf',
-            "scale='min(1280,iw)':-2",
-            '-q:v',
-            '3',
-            output_path,
-        ],
-        capture_output=True,
-        check=False,
-    )
-
-
-def generate_audio_waveform(input_path: str) -> list[int] | None:
-    """Decode audio and return normalized per-bucket peak amplitudes."""
-    result = subprocess.run(
-        ['ffmpeg', '-i', input_path, '-ac', '1', '-ar', '8000', '-f', 's16le', '-'],
-        capture_output=True,
-        check=False,
-    )
-    if result.returncode != 0 or not result.stdout:
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_CHUNK_BYTES = 256 * 1024
+POSTER_SEEK_SECONDS = 0.5
+POSTER_SCALE_FILTER = f"scale='min({VIDEO_THUMBNAIL_MAX_WIDTH},iw)':-2"
+# Whisper resamples to 16 kHz mono; this keeps an hour of speech near 14 MB,
+# well under the API's 25 MB upload cap.
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_BITRATE = '32k'
+
+
+def analyze_media(input_path: str, media_type: str, output_dir: str) -> dict | None:
+    """Derive every audio/video asset from one header probe and one decode.
+
+    ffprobe reads the container header for duration, dimensions, and which
+    streams exist; a single ffmpeg run then decodes the file once and writes
+    the waveform PCM, a mono 16 kHz MP3 speech track for transcription, and
+    (for video) the poster frame as separate outputs in output_dir.
+
+    Returns None when ffprobe rejects the file. Otherwise returns a dict with
+    duration, width, height, waveform, poster (a ContentFile), and
+    speech_path; anything that could not be produced is None. Raises
+    MediaProbeError when ffprobe cannot run.
+    """
+    info = probe_media_info(input_path)
+    if info is None:
         return None
 
-    samples = array('h')
-    samples.frombytes(result.stdout[: len(result.stdout) - (len(result.stdout) % 2)])
-    if sys.byteorder != 'little':
-        samples.byteswap()
-    if not samples:
+    analysis = {
+        'duration': info['duration'],
+        'width': info['width'],
+        'height': info['height'],
+        'waveform': None,
+        'poster': None,
+        'speech_path': None,
+    }
+    waveform_path = os.path.join(output_dir, 'waveform.pcm')
+    speech_path = os.path.join(output_dir, 'speech.mp3')
+    poster_path = os.path.join(output_dir, 'poster.jpg')
+
+    outputs = []
+    if info['has_audio']:
+        # fmt: off
+        outputs += [
+            '-map', '0:a:0', '-ac', '1', '-ar', str(WAVEFORM_SAMPLE_RATE),
+            '-f', 's16le', waveform_path,
+            '-map', '0:a:0', '-ac', '1', '-ar', str(SPEECH_SAMPLE_RATE),
+            '-c:a', 'libmp3lame', '-b:a', SPEECH_BITRATE, speech_path,
+        ]
+        # fmt: on
+    if media_type == 'video' and info['width']:
+        duration = info['duration']
+        seek = POSTER_SEEK_SECONDS
+        if duration is not None and duration.total_seconds() <= POSTER_SEEK_SECONDS:
+            seek = 0
+        # fmt: off
+        outputs += [
+            '-map', '0:v:0', '-ss', str(seek), '-frames:v', '1',
+            '-vf', POSTER_SCALE_FILTER, '-q:v', '3', poster_path,
+        ]
+        # fmt: on
+    if not outputs:
+        return analysis
+
+    # fmt: off
+    command = [
+        'ffmpeg', '-nostdin', '-y', '-v', 'error',
+        *media_input_options(input_path), '-i', input_path, *outputs,
+    ]
+    # fmt: on
+    result = subprocess.run(command, capture_output=True, check=False)
+    if result.returncode != 0:
+        logger.info('ffmpeg could not decode %s: %s', input_path, result.stderr[-500:])
+        return analysis
+
+    if _nonempty(waveform_path):
+        with open(waveform_path, 'rb') as waveform_file:
+            sample_count = os.path.getsize(waveform_path) // 2
+            analysis['waveform'] = waveform_from_pcm(waveform_file, sample_count)
+    if _nonempty(speech_path):
+        analysis['speech_path'] = speech_path
+    if media_type == 'video' and info['width'] and not _nonempty(poster_path):
+        # Output-side seeking drops frames before the seek point, so a video
+        # whose only early frame starts before it (e.g. 1 fps) yields nothing.
+        # Grabbing the first frame reads only the start of the file.
+        _capture_first_frame(input_path, poster_path)
+    if _nonempty(poster_path):
+        with open(poster_path, 'rb') as poster_file:
+            analysis['poster'] = ContentFile(poster_file.read())
+    return analysis
+
+
+def _capture_first_frame(input_path: str, poster_path: str) -> None:
+    # fmt: off
+    command = [
+        'ffmpeg', '-nostdin', '-y', '-v', 'error',
+        *media_input_options(input_path), '-i', input_path,
+        '-map', '0:v:0', '-frames:v', '1', '-vf', POSTER_SCALE_FILTER, '-q:v', '3',
+        poster_path,
+    ]
+    # fmt: on
+    subprocess.run(command, capture_output=True, check=False)
+
+
+def _nonempty(path: str) -> bool:
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def waveform_from_pcm(stream: BinaryIO, sample_count: int) -> list[int] | None:
+    """Return normalized per-bucket peak amplitudes from a mono s16le stream.
+
+    sample_count fixes the bucket boundaries up front, so the stream is folded
+    in WAVEFORM_CHUNK_BYTES reads into a single reused buffer; memory stays
+    constant however long the recording is. Each bucket's peak is taken with
+    max()/min() over a memoryview slice rather than per sample in Python.
+    """
+    bucket_count = min(WAVEFORM_BUCKETS, sample_count)
+    if bucket_count <= 0:
         return None
 
-    bucket_count = min(WAVEFORM_BUCKETS, len(samples))
-    peaks = []
-    for index in range(bucket_count):
-        start = index * len(samples) // bucket_count
-        end = (index + 1) * len(samples) // bucket_count
-        bucket = samples[start:end]
-        peaks.append(max(abs(sample) for sample in bucket) if bucket else 0)
+    peaks = [0] * bucket_count
+    buffer = bytearray(WAVEFORM_CHUNK_BYTES)
+    position = 0
+    bucket = 0
+    bucket_end = sample_count // bucket_count
+    while position < sample_count:
+        read = stream.readinto(buffer)
+        if not read:
+            break
+        samples = _pcm_samples(buffer, read - (read % 2))
+        offset = 0
+        while offset < len(samples) and position < sample_count:
+            while position >= bucket_end:
+                bucket += 1
+                bucket_end = (bucket + 1) * sample_count // bucket_count
+            take = min(len(samples) - offset, bucket_end - position)
+            window = samples[offset : offset + take]
+            peaks[bucket] = max(peaks[bucket], max(window), -min(window))
+            offset += take
+            position += take
 
     loudest = max(peaks)
     if loudest <= 0:
@@ -85,6 +169,15 @@ def generate_audio_waveform(input_path: str) -> list[int] | None:
     return [min(100, round((peak / loudest) * 100)) for peak in peaks]
 
 
+def _pcm_samples(buffer: bytearray, length: int) -> memoryview | array:
+    """View the first length bytes of buffer as native 16-bit samples."""
+    if sys.byteorder == 'little':
+        return memoryview(buffer)[:length].cast('h')
+    samples = array('h', buffer[:length])
+    samples.byteswap()
+    return samples
+
+
 def generate_image_rendition(input_path: str) -> ContentFile | None:
     """Return a compressed image rendition, or None when the original is small enough."""
     source_size = os.path.getsize(input_path)
@@ -142,11 +235,16 @@ def generate_jpeg_rendition(
     return ContentFile(buffer.getvalue())
 
 
-def save_media_thumbnail(media, content: ContentFile, filename: str) -> None:
-    """Save a thumbnail and remove the previous thumbnail object when replaced."""
+def save_media_thumbnail(
+    media, content: ContentFile, filename: str, update_fields: list[str] | tuple = ()
+) -> None:
+    """Save a thumbnail and remove the previous thumbnail object when replaced.
+
+    Other changed fields named in update_fields are written in the same update.
+    """
     old_name = media.thumbnail.name if media.thumbnail else ''
     media.thumbnail.save(filename, content, save=False)
-    media.save(update_fields=['thumbnail'])
+    media.save(update_fields=['thumbnail', *update_fields])
 
     if old_name and old_name != media.thumbnail.name:
         media.thumbnail.storage.delete(old_name)
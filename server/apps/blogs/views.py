@@ -4,27 +4,30 @@ import hashlib
 import logging
 import mimetypes
 import os
+import secrets
 import tempfile
+from io import BytesIO
 from urllib.parse import urlsplit
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import (
-    BooleanField,
-    Count,
-    Exists,
-    IntegerField,
-    OuterRef,
-    Subquery,
-    Value,
-)
+from django.db import connection, transaction
+from django.db.models import BooleanField, Count, Exists, OuterRef, Sum, Value
 from django.db.models.functions import Coalesce
-from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.utils.dateformat import format as format_date
+from django.utils.http import http_date, parse_http_date_safe
 from django.views.decorators.http import require_GET
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -34,11 +37,12 @@ from rest_framework.response import Response
 from rest_framework.throttling import ScopedRateThrottle, UserRateThrottle
 from werkzeug.http import parse_range_header
 
+from apps.uploads.handlers import StreamedUpload
+from apps.uploads.object_cache import cached_object
 from apps.uploads.s3 import (
     ALLOWED_CONTENT_TYPE_RE,
-    delete_object,
-    download_to_file,
     generate_presigned_get_url,
+    get_object_range,
     head_object,
 )
 
@@ -53,14 +57,18 @@ from .models import (
     Media,
     Post,
     PostView,
+    adjust_post_counter,
     generate_share_token,
+    queue_storage_deletions,
 )
 from .pagination import PostCursorPagination
 from .serializers import CommentSerializer, PostCreateSerializer, PostSerializer
 from .tasks import fetch_link_previews, process_post_media, transcribe_post_media
 from .utils import (
+    IMAGE_HEADER_BYTES,
     MediaProbeError,
     generate_poster_rendition,
+    identify_image_header,
     is_valid_image,
     probe_media_duration,
     save_media_thumbnail,
@@ -72,6 +80,9 @@ logger = logging.getLogger(__name__)
 
 VALID_MEDIA_TYPES = {choice[0] for choice in MEDIA_TYPE_CHOICES}
 POSTER_UPLOAD_LIMIT_BYTES = 5 * 1024 * 1024
+# Larger multi-range requests are answered with the whole file instead.
+MAX_MEDIA_RANGES = 16
+MEDIA_STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class MediaValidationError(ValueError):
@@ -80,23 +91,10 @@ class MediaValidationError(ValueError):
     pass
 
 
-def _related_count(model):
-    """Count a post's related rows via a subquery.
+class MediaContentError(MediaValidationError):
+    """Raised when an upload's content itself is rejected, so keeping it is pointless."""
 
-    Joining two to-many relations into one aggregate produces an L×C row
-    fan-out per post; independent subqueries keep each count linear.
-    """
-    return Coalesce(
-        Subquery(
-            model.objects.filter(post=OuterRef('pk'))
-            .order_by()
-            .values('post')
-            .annotate(total=Count('pk'))
-            .values('total'),
-            output_field=IntegerField(),
-        ),
-        0,
-    )
+    pass
 
 
 class TranscribeRateThrottle(UserRateThrottle):
@@ -159,10 +157,34 @@ def _record_post_views(request, posts):
         return
 
     viewer_key = _viewer_key_for_request(request)
-    PostView.objects.bulk_create(
-        [PostView(post=post, viewer_key=viewer_key) for post in posts_to_record],
-        ignore_conflicts=True,
-    )
+    with transaction.atomic():
+        new_post_ids = _insert_post_views(viewer_key, [post.pk for post in posts_to_record])
+
+    # Keep in-memory instances in step so same-request renders show the view.
+    for post in posts_to_record:
+        if post.pk in new_post_ids:
+            post.view_count += 1
+
+
+def _insert_post_views(viewer_key, post_ids):
+    """Insert and count the viewer's missing view rows; return the posts newly viewed.
+
+    One INSERT ... ON CONFLICT DO NOTHING RETURNING, which PostgreSQL and
+    SQLite 3.35+ both support, reports which rows were new, and only those
+    are counted, so concurrent requests from one viewer count a view once.
+    """
+    table = connection.ops.quote_name(PostView._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (created, post_id, viewer_key) '
+            f'VALUES {", ".join(["(%s, %s, %s)"] * len(post_ids))} '
+            'ON CONFLICT (post_id, viewer_key) DO NOTHING RETURNING post_id',
+            [value for post_id in post_ids for value in (now, post_id, viewer_key)],
+        )
+        new_post_ids = {row[0] for row in cursor.fetchall()}
+    adjust_post_counter(list(new_post_ids), 'view_count', 1)
+    return new_post_ids
 
 
 def _enqueue_process_post_media(media_id):
@@ -192,14 +214,8 @@ class PostViewSet(viewsets.ModelViewSet):
 
     def get_annotated_queryset(self):
         """Return the annotated post queryset before visibility filtering."""
-        queryset = (
-            Post.objects.select_related('author', 'media')
-            .prefetch_related('post_set', 'link_previews')
-            .annotate(
-                like_count=_related_count(Like),
-                comment_count=_related_count(Comment),
-                view_count=_related_count(PostView),
-            )
+        queryset = Post.objects.select_related('author', 'media').prefetch_related(
+            'post_set', 'link_previews'
         )
 
         user = self.request.user
@@ -220,7 +236,7 @@ class PostViewSet(viewsets.ModelViewSet):
         if self.request.query_params.get('drafts', '').lower() == 'true':
             if not user.is_authenticated:
                 return queryset.none()
-            return queryset.filter(author=user, is_draft=True)
+            return queryset.filter(author=user, is_draft=True, deleted_at__isnull=True)
 
         queryset = queryset.visible_to(user)
 
@@ -276,7 +292,23 @@ class PostViewSet(viewsets.ModelViewSet):
             serializer.save(author=get_user_model().objects.get(username='anonymous'))
 
     def create(self, request, *args, **kwargs):
-        """Create a post and attach validated media when provided."""
+        """Create a post and attach validated media when provided.
+
+        A streamed upload is already in object storage by now, so it is
+        queued for deletion unless the post is created.
+        """
+        media = request.FILES.get('media')
+        streamed_key = media.key if isinstance(media, StreamedUpload) else None
+        created = False
+        try:
+            response = self._create_post(request)
+            created = response.status_code == status.HTTP_201_CREATED
+            return response
+        finally:
+            if streamed_key and not created:
+                queue_storage_deletions(object_keys=[streamed_key])
+
+    def _create_post(self, request):
         requested_visibility = request.data.get('visibility', VISIBILITY_PUBLIC)
         requested_is_draft = _is_truthy(request.data.get('is_draft'))
         if (
@@ -311,15 +343,21 @@ class PostViewSet(viewsets.ModelViewSet):
             post = serializer.instance
 
             if media_payload:
+                # The declared type and size, and the duration probed from the
+                # upload; process_post_media fills in whatever else can be
+                # detected from the bytes.
                 media_kwargs = {
                     'id': post.id,  # pyright: ignore [reportOptionalMemberAccess]
                     'media_type': media_payload['media_type'],
+                    'duration': media_payload['duration'],
+                    'mime_type': media_payload['mime_type'],
+                    'size': media_payload['size'],
+                    'sha256': media_payload.get('sha256', ''),
                 }
                 if media_payload['source'] == 'direct':
                     media_kwargs['file'] = media_payload['file']
                 else:
                     media_kwargs['s3_file_key'] = media_payload['s3_file_key']
-                    media_kwargs['duration'] = media_payload['duration']
 
                 media = Media.objects.create(**media_kwargs)
                 post.media = media  # pyright: ignore [reportOptionalMemberAccess]
@@ -354,6 +392,9 @@ class PostViewSet(viewsets.ModelViewSet):
         if media_type not in VALID_MEDIA_TYPES:
             raise MediaValidationError('media_type is required and must be audio, video or image')
 
+        if isinstance(media, StreamedUpload):
+            return self._validate_streamed_media(media, media_type)
+
         if media:
             content_type = getattr(media, 'content_type', None)
             if not isinstance(content_type, str) or not ALLOWED_CONTENT_TYPE_RE.match(
@@ -364,16 +405,22 @@ class PostViewSet(viewsets.ModelViewSet):
                 )
             if getattr(media, 'size', 0) > settings.MAX_MEDIA_UPLOAD_BYTES:
                 raise MediaValidationError('media file is too large')
+            duration = None
             if media_type == 'image':
                 try:
                     if not is_valid_image(media):
                         raise MediaValidationError('file is not a valid image')
                 finally:
                     media.seek(0)
+            else:
+                duration = self._probe_uploaded_duration(media)
             return {
                 'source': 'direct',
                 'file': media,
                 'media_type': media_type,
+                'duration': duration,
+                'mime_type': content_type,
+                'size': media.size,
             }
 
         if not isinstance(s3_file_key, str):
@@ -387,77 +434,147 @@ class PostViewSet(viewsets.ModelViewSet):
         if Media.objects.filter(s3_file_key=s3_file_key).exists():
             raise MediaValidationError('s3_file_key is already attached to another post')
 
+        try:
+            return self._validate_s3_upload(s3_file_key, media_type)
+        except MediaContentError:
+            # The key is this user's and unattached, so rejected content
+            # would otherwise stay in the bucket forever. Anonymous uploads
+            # share one prefix, so one could name another client's pending
+            # key; those are left to sweep_orphaned_objects.
+            if request.user.is_authenticated:
+                queue_storage_deletions(object_keys=[s3_file_key])
+            raise
+
+    def _validate_s3_upload(self, s3_file_key, media_type):
+        """Validate an owned, unattached presigned upload and describe it."""
         head = head_object(s3_file_key)
         if head is None:
             raise MediaValidationError('file was not uploaded')
 
         if head.get('ContentLength', 0) > settings.MAX_MEDIA_UPLOAD_BYTES:
-            raise MediaValidationError('media file is too large')
+            raise MediaContentError('media file is too large')
 
         content_type = head.get('ContentType')
         if not isinstance(content_type, str) or not ALLOWED_CONTENT_TYPE_RE.match(content_type):
-            raise MediaValidationError('media content_type must be an audio, video or image type')
+            raise MediaContentError('media content_type must be an audio, video or image type')
 
         duration = None
         if media_type in {'audio', 'video'}:
-            duration = self._validate_s3_audio_video_duration(s3_file_key)
+            duration = self._validate_s3_audio_video_duration(s3_file_key, head)
         else:
-            self._validate_s3_image(s3_file_key)
+            self._validate_s3_image(s3_file_key, head)
 
         return {
             'source': 's3',
             's3_file_key': s3_file_key,
             'media_type': media_type,
             'duration': duration,
+            'mime_type': content_type,
+            'size': head.get('ContentLength'),
         }
 
+    def _validate_streamed_media(self, media, media_type):
+        """Validate a direct upload that was streamed into object storage.
+
+        The upload handler already hashed the body and kept its header, so
+        images are checked without another GET and audio/video are probed
+        over HTTP like any other S3 upload. The stored object becomes the
+        media's s3_file_key; create queues it for deletion if the post is
+        not created.
+        """
+        if media.key is None or media.size > settings.MAX_MEDIA_UPLOAD_BYTES:
+            raise MediaValidationError('media file is too large')
+
+        head = {'ETag': media.etag or '', 'ContentLength': media.size}
+        duration = None
+        if media_type in {'audio', 'video'}:
+            duration = self._validate_s3_audio_video_duration(media.key, head)
+        else:
+            self._validate_s3_image(media.key, head, header=media.header)
+
+        # Prefer the sniffed type; browsers often declare a generic one.
+        mime_type = media.content_type
+        if ALLOWED_CONTENT_TYPE_RE.match(media.sniffed_content_type):
+            mime_type = media.sniffed_content_type
+        return {
+            'source': 's3',
+            's3_file_key': media.key,
+            'media_type': media_type,
+            'duration': duration,
+            'mime_type': mime_type,
+            'size': media.size,
+            'sha256': media.sha256,
+        }
+
+    def _probe_uploaded_duration(self, media):
+        """Probe a direct audio/video upload before it is stored.
+
+        Large uploads are already temp files on disk; smaller in-memory ones
+        are written out for ffprobe. A duration that cannot be read here is
+        left for process_post_media rather than failing the request.
+        """
+        try:
+            if hasattr(media, 'temporary_file_path'):
+                return probe_media_duration(media.temporary_file_path())
+            suffix = os.path.splitext(media.name)[1]
+            with tempfile.NamedTemporaryFile(suffix=suffix) as temp_file:
+                for chunk in media.chunks():
+                    temp_file.write(chunk)
+                temp_file.flush()
+                return probe_media_duration(temp_file.name)
+        except MediaProbeError:
+            logger.exception('Could not probe an uploaded file; leaving it to processing')
+            return None
+        finally:
+            media.seek(0)
+
     def _media_owner_user_id(self, request):
         if request.user.is_authenticated:
             return request.user.id
         return get_user_model().objects.get(username='anonymous').id
 
-    def _validate_s3_audio_video_duration(self, s3_file_key):
-        temp_path = None
-        suffix = os.path.splitext(s3_file_key)[1]
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                temp_path = temp_file.name
-                download_to_file(s3_file_key, temp_file)
+    def _validate_s3_audio_video_duration(self, s3_file_key, head):
+        """Probe an uploaded object's duration, reading only its headers over HTTP.
 
-            duration = probe_media_duration(temp_path)
-        finally:
-            if temp_path:
-                try:
-                    os.unlink(temp_path)
-                except FileNotFoundError:
-                    pass
+        A URL probe can also fail for reasons unrelated to the file (network,
+        signing), so the whole object is downloaded and probed before it is
+        rejected; processing then reuses that cached download.
+        """
+        duration = probe_media_duration(generate_presigned_get_url(s3_file_key))
+        if duration is None:
+            with cached_object(
+                s3_file_key, head.get('ETag', ''), head.get('ContentLength')
+            ) as path:
+                duration = probe_media_duration(path)
 
         if duration is None:
-            delete_object(s3_file_key)
-            raise MediaValidationError('file is not valid audio/video')
+            raise MediaContentError('file is not valid audio/video')
 
         return duration
 
-    def _validate_s3_image(self, s3_file_key):
-        """Validate that an S3 object contains decodable image bytes."""
-        temp_path = None
-        suffix = os.path.splitext(s3_file_key)[1]
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                temp_path = temp_file.name
-                download_to_file(s3_file_key, temp_file)
+    def _validate_s3_image(self, s3_file_key, head, header=None):
+        """Validate that an S3 object contains an image, reading only its header.
 
-            is_valid = is_valid_image(temp_path)
-        finally:
-            if temp_path:
-                try:
-                    os.unlink(temp_path)
-                except FileNotFoundError:
-                    pass
+        A ranged GET of the first IMAGE_HEADER_BYTES identifies the format and
+        dimensions, so the check costs the same for any file size; pass the
+        header when it is already known. Objects that fit in the range are
+        verified in full; the whole object is only downloaded when a larger
+        file's header is inconclusive.
+        """
+        if header is None:
+            header = get_object_range(s3_file_key, 0, IMAGE_HEADER_BYTES - 1)
+        if len(header) >= head.get('ContentLength', 0):
+            is_valid = is_valid_image(BytesIO(header))
+        elif identify_image_header(header) is not None:
+            is_valid = True
+        else:
+            with cached_object(
+                s3_file_key, head.get('ETag', ''), head.get('ContentLength')
+            ) as path:
+                is_valid = is_valid_image(path)
 
         if not is_valid:
-            delete_object(s3_file_key)
-            raise MediaValidationError('file is not a valid image')
+            raise MediaContentError('file is not a valid image')
 
     def update(self, request, *args, **kwargs):
         """Update a post and supported media metadata fields."""
@@ -575,10 +692,14 @@ class PostViewSet(viewsets.ModelViewSet):
             Like.objects.get_or_create(user=request.user, post=post)
             liked = True
         else:
-            Like.objects.filter(user=request.user, post=post).delete()
+            # Delete through the instance so Like.delete() uncounts it.
+            like = Like.objects.filter(user=request.user, post=post).first()
+            if like is not None:
+                like.delete()
             liked = False
 
-        return Response({'liked': liked, 'like_count': post.likes.count()})
+        post.refresh_from_db(fields=['like_count'])
+        return Response({'liked': liked, 'like_count': post.like_count})
 
     @action(detail=True, methods=['post', 'delete'])
     def pin(self, request, pk=None):
@@ -766,16 +887,12 @@ class PostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return Response(
-            {
-                'post_count': Post.objects.visible_to(request.user)
-                .filter(author_id=author_id)
-                .count(),
-                'likes_received': Like.objects.filter(
-                    post__in=Post.objects.visible_to(request.user).filter(author_id=author_id)
-                ).count(),
-            }
+        totals = (
+            Post.objects.visible_to(request.user)
+            .filter(author_id=author_id)
+            .aggregate(post_count=Count('pk'), likes_received=Coalesce(Sum('like_count'), 0))
         )
+        return Response(totals)
 
     @action(detail=True, methods=['post'], throttle_classes=[TranscribeRateThrottle])
     def transcribe(self, request, pk=None):
@@ -848,6 +965,10 @@ class PostViewSet(viewsets.ModelViewSet):
 
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        """Hide the post at once; purge_deleted_posts removes it and its rows."""
+        instance.soft_delete()
+
 
 @require_GET
 def get_post_media_mime_type(request, post_id):
@@ -860,7 +981,10 @@ def get_post_media_mime_type(request, post_id):
         return HttpResponse(status=status.HTTP_404_NOT_FOUND)
 
     file_path = _get_usable_media_file_path(post.media)
-    if file_path:
+    if post.media.mime_type:
+        mime_type = post.media.mime_type
+    elif file_path:
+        # Media saved before mime_type was recorded; see backfill_media_metadata.
         mime_type = get_file_mime_type(file_path)
     else:
         name = post.media.s3_file_key or post.media.file.name
@@ -888,40 +1012,44 @@ def stream_post_media(request, post_id):
             return HttpResponse(status=status.HTTP_404_NOT_FOUND)
         return HttpResponseRedirect(generate_presigned_get_url(key))
 
-    file_size = os.path.getsize(file_path)
+    stat_result = os.stat(file_path)
+    file_size = stat_result.st_size
+    # Strong validator: If-Range only honours exact matches.
+    etag = f'"{stat_result.st_mtime_ns:x}-{file_size:x}"'
+    last_modified = int(stat_result.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
 
     # The Range header is always HTTP_RANGE in request.META, regardless of the
     # request scheme ('HTTPS_RANGE' is not a thing).
     range_header = request.META.get('HTTP_RANGE')
+    if range_header and not _if_range_matches(request, etag, last_modified):
+        range_header = None
 
     ranges = parse_range_header(range_header)
-    if not ranges:
-        return FileResponse(open(file_path, 'rb'))
-
-    if len(ranges.ranges) > 1:
-        return HttpResponse(
-            'Only one range request is supported', status=status.HTTP_400_BAD_REQUEST
-        )
-
-    # Resolves suffix (bytes=-N) and open-ended (bytes=N-) ranges against the
-    # file size, returning end-exclusive bounds, or None when unsatisfiable.
-    bounds = ranges.range_for_length(file_size)
-    if bounds is None:
-        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
-        response['Content-Range'] = f'bytes */{file_size}'
-        return response
-
-    start, end = bounds
-    with open(file_path, 'rb') as file_to_send:
-        file_to_send.seek(start)
-        data = file_to_send.read(end - start)
+    if not ranges or len(ranges.ranges) > MAX_MEDIA_RANGES:
+        # Serving the whole file is always a valid answer to a Range request.
+        response = FileResponse(open(file_path, 'rb'), content_type=post.media.mime_type or None)
+    else:
+        bounds = _resolve_byte_ranges(ranges.ranges, file_size)
+        if not bounds:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{file_size}'
+            return response
+
+        content_type = post.media.mime_type or get_file_mime_type(file_path)
+        if len(bounds) == 1:
+            response = _single_range_response(file_path, bounds[0], file_size, content_type)
+        else:
+            response = _multipart_range_response(file_path, bounds, file_size, content_type)
 
-    # HTTP Content-Range is end-inclusive, hence end - 1.
-    response = HttpResponse(data, content_type=get_file_mime_type(file_path))
-    response['Content-Length'] = len(data)
-    response['Content-Range'] = f'bytes {start}-{end - 1}/{file_size}'
     response['Accept-Ranges'] = 'bytes'
-    response.status_code = 206  # Partial Content
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
     return response
 
 
@@ -939,6 +1067,112 @@ def link_preview_image(request, preview_id):
     return response
 
 
+class _FileRange:
+    """Read-only view of one byte range of an open file.
+
+    It keeps the file's fileno() and leaves the file positioned at the range
+    start, so gunicorn's wsgi.file_wrapper can os.sendfile() exactly
+    Content-Length bytes; other servers read it in FileResponse-sized blocks.
+    """
+
+    def __init__(self, file, start, end):
+        self._file = file
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def fileno(self):
+        """Return the underlying file descriptor."""
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        """Read at most size bytes without crossing the range end."""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        """Close the underlying file."""
+        self._file.close()
+
+
+def _resolve_byte_ranges(ranges, file_size):
+    """Resolve parsed ranges to end-exclusive bounds, dropping unsatisfiable ones."""
+    bounds = []
+    for start, stop in ranges:
+        if start < 0:  # Suffix range (bytes=-N).
+            start, stop = max(file_size + start, 0), file_size
+        else:
+            stop = file_size if stop is None else min(stop, file_size)
+        if start < stop:
+            bounds.append((start, stop))
+    return bounds
+
+
+def _if_range_matches(request, etag, last_modified):
+    """Return whether a Range header may be honoured under If-Range."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _single_range_response(file_path, bounds, file_size, content_type):
+    start, end = bounds
+    response = FileResponse(
+        _FileRange(open(file_path, 'rb'), start, end),
+        status=status.HTTP_206_PARTIAL_CONTENT,
+        content_type=content_type,
+    )
+    response['Content-Length'] = end - start
+    # HTTP Content-Range is end-inclusive, hence end - 1.
+    response['Content-Range'] = f'bytes {start}-{end - 1}/{file_size}'
+    return response
+
+
+def _multipart_range_response(file_path, bounds, file_size, content_type):
+    boundary = secrets.token_hex(16)
+    part_headers = [
+        (
+            f'--{boundary}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end - 1}/{file_size}\r\n\r\n'
+        ).encode()
+        for start, end in bounds
+    ]
+    closing = f'--{boundary}--\r\n'.encode()
+    content_length = sum(
+        len(header) + (end - start) + 2
+        for header, (start, end) in zip(part_headers, bounds, strict=True)
+    ) + len(closing)
+
+    def parts():
+        with open(file_path, 'rb') as file:
+            for header, (start, end) in zip(part_headers, bounds, strict=True):
+                yield header
+                file.seek(start)
+                remaining = end - start
+                while remaining:
+                    chunk = file.read(min(MEDIA_STREAM_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+                yield b'\r\n'
+            yield closing
+
+    response = StreamingHttpResponse(
+        parts(),
+        status=status.HTTP_206_PARTIAL_CONTENT,
+        content_type=f'multipart/byteranges; boundary={boundary}',
+    )
+    response['Content-Length'] = content_length
+    return response
+
+
 def _get_usable_media_file_path(media):
     if not media.file:
         return None
@@ -1030,9 +1264,9 @@ def post_detail(request, post_id):
         'post': post,
         'media_url': media_url,
         'link_previews': link_previews,
-        'like_count': post.likes.count(),
-        'comment_count': post.comments.count(),
-        'view_count': post.views.count(),
+        'like_count': post.like_count,
+        'comment_count': post.comment_count,
+        'view_count': post.view_count,
         'noindex': post.visibility != VISIBILITY_PUBLIC or post.is_draft,
         'debug': settings.DEBUG,
     }
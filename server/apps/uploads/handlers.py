@@ -0,0 +1,177 @@
+"""Upload handler that streams multipart file fields straight to object storage."""
+
+import hashlib
+import logging
+import os
+import re
+import uuid
+
+from apps.blogs.utils.get_file_mimetype import get_buffer_mime_type
+from apps.blogs.utils.images import IMAGE_HEADER_BYTES
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from .s3 import (
+    ALLOWED_CONTENT_TYPE_RE,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    upload_part,
+)
+
+logger = logging.getLogger(__name__)
+
+# S3 requires every part but the last to be at least 5 MiB; this is also the
+# most of an upload held in memory at once.
+PART_SIZE = 5 * 1024 * 1024
+# Leading bytes kept for content sniffing and header-only image validation.
+HEADER_BYTES = IMAGE_HEADER_BYTES
+STREAMED_FIELD_NAMES = {'media'}
+STREAMED_URL_NAMES = {'post-list'}
+SAFE_EXTENSION_RE = re.compile(r'^\.[A-Za-z0-9]{1,10}$')
+
+
+class StreamedUpload(UploadedFile):
+    """A file field that was streamed to object storage instead of to disk.
+
+    key is None when the upload exceeded MAX_MEDIA_UPLOAD_BYTES; nothing is
+    kept in storage then, and size is how much was received.
+    """
+
+    def __init__(
+        self, *, key, etag, name, content_type, size, sha256, header, sniffed_content_type
+    ):
+        """Describe the stored object; there is no local file to read."""
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.key = key
+        self.etag = etag
+        self.sha256 = sha256
+        self.header = header
+        self.sniffed_content_type = sniffed_content_type
+
+    def open(self, mode=None):
+        """Streamed uploads have no local bytes; read them from object storage."""
+        raise ValueError('StreamedUpload has no local file; use its key')
+
+    def close(self):
+        """Nothing local to close."""
+
+
+class S3MultipartUploadHandler(FileUploadHandler):
+    """Stream allowed media file fields into an S3 multipart upload.
+
+    Parts are uploaded as soon as PART_SIZE bytes arrive, so memory stays
+    bounded and nothing touches local disk. A SHA-256 of the whole body and
+    the first HEADER_BYTES are kept for the view. Other fields, requests,
+    and disallowed content types fall through to the default handlers.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):  # noqa: N803
+        """Decide once per request whether this handler takes part."""
+        resolver_match = getattr(self.request, 'resolver_match', None)
+        self.enabled = bool(
+            settings.STREAM_UPLOADS_TO_S3
+            and self.request.method == 'POST'
+            and resolver_match is not None
+            and resolver_match.url_name in STREAMED_URL_NAMES
+        )
+        self.upload_id = None
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        """Start a multipart upload for a streamed field, or leave it to other handlers."""
+        super().new_file(field_name, file_name, content_type, content_length, *args, **kwargs)
+        self.upload_id = None
+        if not (
+            self.enabled
+            and field_name in STREAMED_FIELD_NAMES
+            and ALLOWED_CONTENT_TYPE_RE.match(content_type or '')
+        ):
+            return
+
+        extension = os.path.splitext(file_name)[1]
+        if not SAFE_EXTENSION_RE.match(extension):
+            extension = ''
+        self.key = f'post/direct/{uuid.uuid4().hex}{extension.lower()}'
+        self.upload_id = create_multipart_upload(self.key, content_type)
+        self.part_etags = []
+        self.buffer = bytearray()
+        self.header = bytearray()
+        self.digest = hashlib.sha256()
+        self.received = 0
+        self.too_large = False
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        """Hash and buffer the chunk, uploading a part whenever one fills."""
+        if self.upload_id is None:
+            return raw_data
+
+        self.received += len(raw_data)
+        if self.too_large:
+            return None
+        if self.received > settings.MAX_MEDIA_UPLOAD_BYTES:
+            # Keep reading the body so the request completes, but store nothing.
+            self.too_large = True
+            self.buffer = bytearray()
+            abort_multipart_upload(self.key, self.upload_id)
+            return None
+
+        self.digest.update(raw_data)
+        if len(self.header) < HEADER_BYTES:
+            self.header += raw_data[: HEADER_BYTES - len(self.header)]
+        self.buffer += raw_data
+        # R2 requires every part but the last to be the same size.
+        while len(self.buffer) >= PART_SIZE:
+            self._upload_part(self.buffer[:PART_SIZE])
+            del self.buffer[:PART_SIZE]
+        return None
+
+    def file_complete(self, file_size):
+        """Upload the last part, assemble the object, and describe it."""
+        if self.upload_id is None:
+            return None
+
+        key = etag = None
+        if not self.too_large:
+            # A single part may be smaller than PART_SIZE, including empty.
+            if self.buffer or not self.part_etags:
+                self._upload_part(self.buffer)
+                self.buffer = bytearray()
+            try:
+                etag = complete_multipart_upload(self.key, self.upload_id, self.part_etags)
+            except Exception:
+                abort_multipart_upload(self.key, self.upload_id)
+                raise
+            finally:
+                self.upload_id = None
+            key = self.key
+        self.upload_id = None
+
+        header = bytes(self.header)
+        return StreamedUpload(
+            key=key,
+            etag=etag,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.received,
+            sha256=self.digest.hexdigest(),
+            header=header,
+            sniffed_content_type=get_buffer_mime_type(header) if header else 'unknown',
+        )
+
+    def upload_interrupted(self):
+        """Discard the parts of an upload the client abandoned."""
+        if self.upload_id is not None and not self.too_large:
+            abort_multipart_upload(self.key, self.upload_id)
+        self.upload_id = None
+
+    def _upload_part(self, body):
+        part_number = len(self.part_etags) + 1
+        try:
+            etag = upload_part(self.key, self.upload_id, part_number, bytes(body))
+        except Exception:
+            abort_multipart_upload(self.key, self.upload_id)
+            self.upload_id = None
+            raise
+        self.part_etags.append(etag)
@@ -0,0 +1,185 @@
+"""Size-bounded on-disk LRU cache of downloaded S3 objects.
+
+Validation at create time, each media processor, and transcription all need
+the same object's bytes on local disk. Entries are keyed by object key and
+ETag, so a replaced object is a different entry, and are shared across the
+web and task worker processes through the data volume.
+
+Each entry is a data file plus a lock file. Readers hold a shared flock on
+the lock file while they use the path; fills and eviction take it
+exclusively, so an entry is never deleted out from under a reader and a
+concurrent miss downloads the object once. Fills download to a temporary
+name and are renamed into place, so a crash never leaves a partial entry.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+
+from django.conf import settings
+
+from .s3 import download_to_file, head_object
+
+logger = logging.getLogger(__name__)
+
+LOCK_SUFFIX = '.lock'
+FILL_PREFIX = '.fill-'
+# Abandoned partial downloads older than this are removed during eviction.
+STALE_FILL_SECONDS = 60 * 60
+
+
+@contextlib.contextmanager
+def cached_object(key: str, etag: str | None = None, size: int | None = None) -> Iterator[str]:
+    """Yield a local path holding the bytes of an S3 object.
+
+    The path is valid until the context exits. Pass the etag and size from
+    an earlier HEAD to skip the extra request; otherwise one HEAD is made to
+    find the current ETag. Objects larger than the whole cache are
+    downloaded to a temporary file instead of being cached.
+    """
+    if etag is None:
+        head = head_object(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        etag = head.get('ETag', '')
+        size = head.get('ContentLength', size)
+
+    cache_dir = settings.MEDIA_DOWNLOAD_CACHE_DIR
+    max_bytes = settings.MEDIA_DOWNLOAD_CACHE_MAX_BYTES
+    suffix = os.path.splitext(key)[1]
+    if max_bytes <= 0 or (size is not None and size > max_bytes):
+        with _uncached_download(key, suffix) as path:
+            yield path
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = hashlib.blake2b(f'{key}\0{etag}'.encode(), digest_size=20).hexdigest()
+    path = os.path.join(cache_dir, f'{digest}{suffix}')
+
+    with _locked(path + LOCK_SUFFIX, fcntl.LOCK_SH) as lock_file:
+        while not os.path.exists(path):
+            # Upgrade to fill; flock conversion is not atomic, so re-check.
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if not os.path.exists(path):
+                _fill(key, path, cache_dir)
+                _evict(cache_dir, max_bytes)
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+        # mtime is the recency clock for LRU eviction.
+        os.utime(path)
+        yield path
+
+
+@contextlib.contextmanager
+def _uncached_download(key: str, suffix: str) -> Iterator[str]:
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+            temp_path = temp_file.name
+            download_to_file(key, temp_file)
+        yield temp_path
+    finally:
+        if temp_path:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp_path)
+
+
+@contextlib.contextmanager
+def _locked(lock_path: str, operation: int, blocking: bool = True) -> Iterator:
+    """Hold a flock on lock_path, yielding the open file or None if busy.
+
+    Eviction unlinks lock files, so after locking, the open file must still
+    be the one at lock_path; otherwise the lock guards nothing and is retaken.
+    """
+    while True:
+        lock_file = open(lock_path, 'a+b')  # noqa: SIM115
+        try:
+            try:
+                fcntl.flock(lock_file, operation if blocking else operation | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield None
+                return
+            try:
+                current = os.stat(lock_path)
+            except FileNotFoundError:
+                continue
+            if current.st_ino != os.fstat(lock_file.fileno()).st_ino:
+                continue
+            yield lock_file
+            return
+        finally:
+            lock_file.close()
+
+
+def _fill(key: str, path: str, cache_dir: str) -> None:
+    """Download into a temporary name in the cache and rename it into place."""
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=FILL_PREFIX)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            download_to_file(key, temp_file)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+
+
+def _evict(cache_dir: str, max_bytes: int) -> None:
+    """Delete least recently used entries until the cache fits in max_bytes.
+
+    Entries a reader currently holds are skipped; they are reconsidered on
+    the next fill.
+    """
+    entries = []
+    orphaned_locks = []
+    total = 0
+    stale_before = time.time() - STALE_FILL_SECONDS
+    with os.scandir(cache_dir) as scan:
+        for entry in scan:
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Removed by a concurrent eviction or fill since the listing.
+                continue
+            if entry.name.endswith(LOCK_SUFFIX):
+                if stat.st_mtime < stale_before:
+                    orphaned_locks.append(entry.path)
+                continue
+            if entry.name.startswith(FILL_PREFIX):
+                if stat.st_mtime < stale_before:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(entry.path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    entries.sort()
+    for _mtime, entry_size, entry_path in entries:
+        if total <= max_bytes:
+            break
+        lock_path = entry_path + LOCK_SUFFIX
+        with _locked(lock_path, fcntl.LOCK_EX, blocking=False) as lock_file:
+            if lock_file is None:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(entry_path)
+                total -= entry_size
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(lock_path)
+    # Lock files left by failed fills have no data file to evict with them.
+    for lock_path in orphaned_locks:
+        if os.path.exists(lock_path.removesuffix(LOCK_SUFFIX)):
+            continue
+        with _locked(lock_path, fcntl.LOCK_EX, blocking=False) as lock_file:
+            if lock_file is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(lock_path)
+
+    if total > max_bytes:
+        logger.info('Media download cache over budget by %d bytes in use', total - max_bytes)
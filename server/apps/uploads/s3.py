@@ -1,13 +1,17 @@
 """S3-compatible object storage helpers for upload and media flows."""
 
+import hashlib
 import logging
 import re
+from collections.abc import Iterable, Iterator
 from functools import lru_cache
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,46 @@ logger = logging.getLogger(__name__)
 # 'audio/webm;codecs=opus'.
 ALLOWED_CONTENT_TYPE_RE = re.compile(r'^(audio|video|image)/[\w.+-]+(;\s*codecs=[\w.,+" -]+)?$')
 
+# The most keys one DeleteObjects request accepts.
+DELETE_OBJECTS_MAX_KEYS = 1000
+
+# Cached presigned GET URLs are handed out until this many seconds before
+# they expire, so a URL from the cache is always valid for at least this long.
+PRESIGNED_GET_MIN_REMAINING = 15 * 60
+
+
+def client_config() -> Config:
+    """Return the botocore config shared by every S3 client.
+
+    The connection pool is sized for a full set of concurrent ranged GETs
+    plus regular requests, retries back off adaptively when the store
+    throttles, and TCP keepalive stops idle pooled connections from being
+    dropped by NAT between tasks.
+    """
+    return Config(
+        signature_version='s3v4',
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        retries={'mode': 'adaptive', 'max_attempts': settings.S3_MAX_ATTEMPTS},
+        tcp_keepalive=True,
+    )
+
+
+@lru_cache(maxsize=1)
+def transfer_config() -> TransferConfig:
+    """Return the shared transfer settings for downloads.
+
+    Objects above one chunk are fetched as concurrent ranged GETs written
+    straight into place. Smaller chunks than boto3's 8 MiB default split
+    typical uploads (tens of MB) across more connections, each of which R2
+    serves at a capped rate.
+    """
+    chunk_bytes = settings.S3_TRANSFER_CHUNK_BYTES
+    return TransferConfig(
+        multipart_threshold=chunk_bytes,
+        multipart_chunksize=chunk_bytes,
+        max_concurrency=settings.S3_TRANSFER_MAX_CONCURRENCY,
+    )
+
 
 @lru_cache(maxsize=1)
 def get_s3_client():
@@ -26,7 +70,7 @@ def get_s3_client():
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        config=Config(signature_version='s3v4'),
+        config=client_config(),
     )
 
 
@@ -44,17 +88,47 @@ def generate_presigned_put_url(key: str, content_type: str, expires_in: int = 30
     )
 
 
+def _presigned_get_cache_key(key: str, expires_in: int) -> str:
+    # Object keys can contain spaces and exceed cache key limits.
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return f'presigned-get:{expires_in}:{digest}'
+
+
+def generate_presigned_get_urls(keys: Iterable[str], expires_in: int = 3600) -> dict[str, str]:
+    """Return presigned GET URLs for many object keys, keyed by object key.
+
+    URLs are cached and reused until PRESIGNED_GET_MIN_REMAINING seconds
+    before expiry, so only keys without a usable cached URL are signed. A
+    stable URL also lets browsers and the CDN cache the object across page
+    loads.
+    """
+    cache_keys = {_presigned_get_cache_key(key, expires_in): key for key in keys}
+    urls = {cache_keys[cache_key]: url for cache_key, url in cache.get_many(cache_keys).items()}
+
+    signed = {}
+    s3 = None
+    for cache_key, key in cache_keys.items():
+        if key in urls:
+            continue
+        s3 = s3 or get_s3_client()
+        urls[key] = signed[cache_key] = s3.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
+                'Key': key,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    reuse_for = expires_in - PRESIGNED_GET_MIN_REMAINING
+    if signed and reuse_for > 0:
+        cache.set_many(signed, timeout=reuse_for)
+    return urls
+
+
 def generate_presigned_get_url(key: str, expires_in: int = 3600) -> str:
-    """Generate a presigned GET URL for downloading one object."""
-    s3 = get_s3_client()
-    return s3.generate_presigned_url(
-        'get_object',
-        Params={
-            'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-            'Key': key,
-        },
-        ExpiresIn=expires_in,
-    )
+    """Generate, or reuse a cached, presigned GET URL for one object."""
+    return generate_presigned_get_urls([key], expires_in)[key]
 
 
 def head_object(key: str) -> dict | None:
@@ -79,7 +153,143 @@ def delete_object(key: str) -> None:
         logger.exception("Error deleting object %s", key)
 
 
+def delete_objects(keys: Iterable[str]) -> dict[str, str]:
+    """Delete keys with as few DeleteObjects requests as possible.
+
+    Returns an error message for each key that could not be deleted; keys
+    that did not exist count as deleted.
+    """
+    keys = list(dict.fromkeys(keys))
+    errors = {}
+    s3 = get_s3_client()
+    for start in range(0, len(keys), DELETE_OBJECTS_MAX_KEYS):
+        batch = keys[start : start + DELETE_OBJECTS_MAX_KEYS]
+        try:
+            response = s3.delete_objects(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            )
+        except Exception as error:
+            logger.exception("Error deleting %d objects", len(batch))
+            errors.update(dict.fromkeys(batch, str(error)))
+            continue
+        for error in response.get('Errors', []):
+            errors[error['Key']] = error.get('Message') or error.get('Code', 'unknown error')
+    return errors
+
+
+def iter_objects(prefix: str) -> Iterator[dict]:
+    """Yield the listing entry (Key, Size, LastModified, ...) of every object under prefix."""
+    s3 = get_s3_client()
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Prefix=prefix):
+        yield from page.get('Contents', [])
+
+
+def get_object_range(key: str, start: int, end: int) -> bytes:
+    """Return bytes start through end (inclusive) of an object."""
+    s3 = get_s3_client()
+    response = s3.get_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, Range=f'bytes={start}-{end}'
+    )
+    return response['Body'].read()
+
+
+def create_multipart_upload(key: str, content_type: str) -> str:
+    """Start a multipart upload for key and return its upload id."""
+    s3 = get_s3_client()
+    response = s3.create_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, ContentType=content_type
+    )
+    return response['UploadId']
+
+
+def upload_part(key: str, upload_id: str, part_number: int, body: bytes) -> str:
+    """Upload one part of a multipart upload and return its ETag."""
+    s3 = get_s3_client()
+    response = s3.upload_part(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body,
+    )
+    return response['ETag']
+
+
+def complete_multipart_upload(key: str, upload_id: str, part_etags: list[str]) -> str:
+    """Assemble uploaded parts, in order, into the object and return its ETag."""
+    s3 = get_s3_client()
+    response = s3.complete_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            'Parts': [
+                {'ETag': etag, 'PartNumber': number}
+                for number, etag in enumerate(part_etags, start=1)
+            ]
+        },
+    )
+    return response['ETag']
+
+
+def generate_presigned_upload_part_urls(
+    key: str, upload_id: str, part_numbers: Iterable[int], expires_in: int = 3600
+) -> dict[int, str]:
+    """Generate presigned PUT URLs for parts of a multipart upload, keyed by part number."""
+    s3 = get_s3_client()
+    return {
+        part_number: s3.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
+                'Key': key,
+                'UploadId': upload_id,
+                'PartNumber': part_number,
+            },
+            ExpiresIn=expires_in,
+        )
+        for part_number in part_numbers
+    }
+
+
+def list_uploaded_parts(key: str, upload_id: str) -> list[dict] | None:
+    """Return the parts uploaded so far, or None when the upload no longer exists."""
+    s3 = get_s3_client()
+    parts = []
+    marker = 0
+    while True:
+        try:
+            response = s3.list_parts(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=key,
+                UploadId=upload_id,
+                PartNumberMarker=marker,
+            )
+        except ClientError as error:
+            code = error.response.get('Error', {}).get('Code')
+            if code in {'NoSuchUpload', '404'}:
+                return None
+            raise
+        parts.extend(response.get('Parts', []))
+        if not response.get('IsTruncated'):
+            return parts
+        marker = response['NextPartNumberMarker']
+
+
+def abort_multipart_upload(key: str, upload_id: str) -> None:
+    """Best-effort abort of a multipart upload, discarding its parts."""
+    try:
+        s3 = get_s3_client()
+        s3.abort_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, UploadId=upload_id
+        )
+    except Exception:
+        logger.exception("Error aborting multipart upload %s for %s", upload_id, key)
+
+
 def download_to_file(key: str, fileobj) -> None:
-    """Download an object key into an open file object."""
+    """Download an object key into an open file object using parallel ranged GETs."""
     s3 = get_s3_client()
-    s3.download_fileobj(settings.AWS_STORAGE_BUCKET_NAME, key, fileobj)
+    s3.download_fileobj(settings.AWS_STORAGE_BUCKET_NAME, key, fileobj, Config=transfer_config())
@@ -1,20 +1,41 @@
 """Views for presigned media upload URLs."""
 
 import json
+import math
 import re
 from datetime import datetime
 
 from apps.blogs.models import Post
 from apps.ratelimit import rate_limit
+from botocore.exceptions import ClientError
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse
+from django.core import signing
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
 
-from .s3 import ALLOWED_CONTENT_TYPE_RE, generate_presigned_put_url
+from .s3 import (
+    ALLOWED_CONTENT_TYPE_RE,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    generate_presigned_put_url,
+    generate_presigned_upload_part_urls,
+    list_uploaded_parts,
+)
 
 User = get_user_model()
 
 MAX_FILE_NAME_LENGTH = 100
+# Every part but the last is exactly this size (R2 requires equal parts), so
+# the part count alone bounds an upload to MAX_MEDIA_UPLOAD_BYTES.
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+MAX_PARTS_PER_SIGN_REQUEST = 100
+# Part URLs are short-lived; a client that outlives one signs the part again.
+MULTIPART_PART_URL_EXPIRY_SECONDS = 3600
+# R2 discards incomplete multipart uploads after seven days by default.
+MULTIPART_UPLOAD_MAX_AGE_SECONDS = 7 * 24 * 3600
+MULTIPART_TOKEN_SALT = 'uploads.multipart'
 
 
 def _clean_file_name(file_name):
@@ -34,9 +55,8 @@ def _clean_file_name(file_name):
 @rate_limit('presign-upload', limit=30, window_seconds=3600)
 def get_presigned_url(request):
     """Validate a client upload request and return a presigned PUT URL."""
-    try:
-        data = json.loads(request.body)
-    except (json.JSONDecodeError, UnicodeDecodeError):
+    data = _load_json(request)
+    if data is None:
         return JsonResponse({'error': 'Invalid JSON body'}, status=400)
 
     content_type = data.get('content_type')
@@ -49,12 +69,22 @@ def get_presigned_url(request):
     if not file_name:
         return JsonResponse({'error': 'file_name is missing or invalid'}, status=400)
 
+    file_path = _upload_file_path(_upload_user_id(request), file_name)
+    presigned_url = generate_presigned_put_url(file_path, content_type)
+
+    return JsonResponse({'url': presigned_url, 'file_path': file_path})
+
+
+def _upload_user_id(request):
     if request.user.is_authenticated:
-        user_id = request.user.id
-    else:
-        # Anonymous uploads are keyed under the dedicated 'anonymous' user
-        # (created by migrations / init_users).
-        user_id = User.objects.get(username='anonymous').id
+        return request.user.id
+    # Anonymous uploads are keyed under the dedicated 'anonymous' user
+    # (created by migrations / init_users).
+    return User.objects.get(username='anonymous').id
+
+
+def _upload_file_path(user_id, file_name):
+    """Return the object key for a user's upload, avoiding keys already in use."""
     file_path = f'post/audio/{user_id}/{file_name}'
 
     # check if file path is already used in the database
@@ -64,7 +94,208 @@ def get_presigned_url(request):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         file_name = f'{stem}-{timestamp}.{extension}' if dot else f'{file_name}-{timestamp}'
         file_path = f'post/audio/{user_id}/{file_name}'
+    return file_path
 
-    presigned_url = generate_presigned_put_url(file_path, content_type)
 
-    return JsonResponse({'url': presigned_url, 'file_path': file_path})
+def _load_json(request):
+    """Return the request's JSON object body, or None if it is not one."""
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _load_multipart_upload(request, data):
+    """Return (upload, None) for the body's upload token, or (None, error response).
+
+    The token is signed state from initiate, so no server-side record of
+    in-progress uploads is kept; it is only honoured for the user who
+    started the upload.
+    """
+    try:
+        upload = signing.loads(
+            data.get('upload_token') or '',
+            salt=MULTIPART_TOKEN_SALT,
+            max_age=MULTIPART_UPLOAD_MAX_AGE_SECONDS,
+        )
+    except signing.BadSignature:
+        return None, JsonResponse({'error': 'upload_token is invalid or expired'}, status=400)
+    if upload['user_id'] != _upload_user_id(request):
+        return None, JsonResponse(
+            {'error': 'upload_token does not belong to this user'}, status=403
+        )
+    return upload, None
+
+
+@require_POST
+@rate_limit('presign-upload', limit=30, window_seconds=3600)
+def initiate_multipart_upload(request):
+    """Start a multipart upload and return its token, part size, and part count.
+
+    Large files are uploaded as parts the client sends in parallel and can
+    resume after an interruption; the size limit is enforced by the number
+    of parts the upload is allowed.
+    """
+    data = _load_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    content_type = data.get('content_type')
+    if not isinstance(content_type, str) or not ALLOWED_CONTENT_TYPE_RE.match(content_type):
+        return JsonResponse(
+            {'error': 'content_type must be an audio, video or image type'}, status=400
+        )
+
+    file_name = _clean_file_name(data.get('file_name'))
+    if not file_name:
+        return JsonResponse({'error': 'file_name is missing or invalid'}, status=400)
+
+    size = data.get('size')
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        return JsonResponse({'error': 'size must be a positive integer'}, status=400)
+    if size > settings.MAX_MEDIA_UPLOAD_BYTES:
+        return JsonResponse({'error': 'media file is too large'}, status=400)
+
+    user_id = _upload_user_id(request)
+    file_path = _upload_file_path(user_id, file_name)
+    upload_id = create_multipart_upload(file_path, content_type)
+    part_count = math.ceil(size / MULTIPART_PART_SIZE)
+    upload_token = signing.dumps(
+        {
+            'user_id': user_id,
+            'key': file_path,
+            'upload_id': upload_id,
+            'size': size,
+            'part_count': part_count,
+        },
+        salt=MULTIPART_TOKEN_SALT,
+    )
+
+    return JsonResponse(
+        {
+            'upload_token': upload_token,
+            'file_path': file_path,
+            'part_size': MULTIPART_PART_SIZE,
+            'part_count': part_count,
+        }
+    )
+
+
+@require_POST
+@rate_limit('multipart-upload', limit=600, window_seconds=3600)
+def sign_multipart_upload_parts(request):
+    """Return presigned PUT URLs for a batch of part numbers."""
+    data = _load_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    upload, error = _load_multipart_upload(request, data)
+    if error:
+        return error
+
+    part_numbers = data.get('part_numbers')
+    if (
+        not isinstance(part_numbers, list)
+        or not 0 < len(part_numbers) <= MAX_PARTS_PER_SIGN_REQUEST
+        or not all(
+            isinstance(number, int)
+            and not isinstance(number, bool)
+            and 1 <= number <= upload['part_count']
+            for number in part_numbers
+        )
+    ):
+        return JsonResponse(
+            {
+                'error': (
+                    f'part_numbers must list up to {MAX_PARTS_PER_SIGN_REQUEST} '
+                    f'part numbers from 1 to {upload["part_count"]}'
+                )
+            },
+            status=400,
+        )
+
+    urls = generate_presigned_upload_part_urls(
+        upload['key'],
+        upload['upload_id'],
+        sorted(set(part_numbers)),
+        expires_in=MULTIPART_PART_URL_EXPIRY_SECONDS,
+    )
+    return JsonResponse({'urls': {str(number): url for number, url in urls.items()}})
+
+
+@require_POST
+@rate_limit('multipart-upload', limit=600, window_seconds=3600)
+def list_multipart_upload_parts(request):
+    """List the parts already uploaded, so an interrupted upload can resume."""
+    data = _load_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    upload, error = _load_multipart_upload(request, data)
+    if error:
+        return error
+
+    parts = list_uploaded_parts(upload['key'], upload['upload_id'])
+    if parts is None:
+        return JsonResponse({'error': 'upload no longer exists'}, status=404)
+    return JsonResponse(
+        {'parts': [{'part_number': part['PartNumber'], 'size': part['Size']} for part in parts]}
+    )
+
+
+@require_POST
+@rate_limit('multipart-upload', limit=600, window_seconds=3600)
+def complete_multipart_upload_view(request):
+    """Assemble the uploaded parts into the object once every part is present.
+
+    Parts are checked against the sizes promised at initiate before they are
+    assembled, so the object can never exceed the declared size.
+    """
+    data = _load_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    upload, error = _load_multipart_upload(request, data)
+    if error:
+        return error
+
+    parts = list_uploaded_parts(upload['key'], upload['upload_id'])
+    if parts is None:
+        return JsonResponse({'error': 'upload no longer exists'}, status=404)
+
+    part_count = upload['part_count']
+    sizes = {part['PartNumber']: part['Size'] for part in parts}
+    missing = [number for number in range(1, part_count + 1) if number not in sizes]
+    if missing:
+        return JsonResponse(
+            {'error': 'upload is incomplete', 'missing_parts': missing}, status=400
+        )
+
+    last_part_size = upload['size'] - (part_count - 1) * MULTIPART_PART_SIZE
+    expected = {number: MULTIPART_PART_SIZE for number in range(1, part_count)}
+    expected[part_count] = last_part_size
+    if sizes != expected:
+        abort_multipart_upload(upload['key'], upload['upload_id'])
+        return JsonResponse({'error': 'uploaded parts do not match the declared size'}, status=400)
+
+    etags = [part['ETag'] for part in sorted(parts, key=lambda part: part['PartNumber'])]
+    try:
+        complete_multipart_upload(upload['key'], upload['upload_id'], etags)
+    except ClientError as error:
+        # e.g. InvalidPart or EntityTooSmall: the parts cannot be assembled.
+        code = error.response.get('Error', {}).get('Code', 'unknown')
+        return JsonResponse({'error': 'upload could not be completed', 'code': code}, status=400)
+    return JsonResponse({'file_path': upload['key']})
+
+
+@require_POST
+@rate_limit('multipart-upload', limit=600, window_seconds=3600)
+def abort_multipart_upload_view(request):
+    """Abandon a multipart upload and discard its parts."""
+    data = _load_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    upload, error = _load_multipart_upload(request, data)
+    if error:
+        return error
+
+    abort_multipart_upload(upload['key'], upload['upload_id'])
+    return HttpResponse(status=204)
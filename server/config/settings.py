@@ -16,6 +16,7 @@ import copy
 import logging
 import logging.config
 import os
+import tempfile
 from pathlib import Path
 
 from csp.constants import SELF
@@ -233,6 +234,37 @@ if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
     DATABASES['default']['CONN_HEALTH_CHECKS'] = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Serialized post fragments (see PostSerializer). Per-process is enough:
+    # keys carry Post.fragment_version, so stale entries are never read.
+    'post_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'post-fragments',
+        'TIMEOUT': env.int('POST_FRAGMENT_CACHE_TIMEOUT', default=60 * 60),
+        'OPTIONS': {'MAX_ENTRIES': env.int('POST_FRAGMENT_CACHE_MAX_ENTRIES', default=2000)},
+    },
+    # Link preview circuit breakers. Files are shared by every process on
+    # the host (web, db_worker, link_preview_hosts), so one worker's
+    # failures keep the others off a struggling provider; point it at a
+    # shared volume when those run in separate containers.
+    'link_preview_breakers': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env.str(
+            'LINK_PREVIEW_BREAKER_CACHE_DIR',
+            default=os.path.join(tempfile.gettempdir(), 'link-preview-breakers'),
+        ),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -454,12 +486,39 @@ AWS_S3_REGION_NAME = 'auto'  # R2 doesn't need a specific region
 AWS_DEFAULT_ACL = 'public-read'
 AWS_QUERYSTRING_AUTH = False  # Don't add complex authentication-related query parameters to URLs
 AWS_S3_ENDPOINT_FOR_CSP = os.getenv('R2_ENDPOINT_DOMAIN_FOR_CSP')
+# Downloads above one chunk run as this many concurrent ranged GETs, which
+# are written straight into the target file. Tuned with
+# `manage.py benchmark_s3_download`.
+S3_TRANSFER_MAX_CONCURRENCY = env.int('S3_TRANSFER_MAX_CONCURRENCY', default=16)
+S3_TRANSFER_CHUNK_BYTES = env.int('S3_TRANSFER_CHUNK_BYTES', default=4 * 1024 * 1024)
+# Room for a full set of ranged GETs alongside HEADs, deletes, and signing.
+S3_MAX_POOL_CONNECTIONS = env.int('S3_MAX_POOL_CONNECTIONS', default=24)
+S3_MAX_ATTEMPTS = env.int('S3_MAX_ATTEMPTS', default=5)
 SENTRY_FRONTEND_INGEST_FOR_CSP = os.getenv('SENTRY_FRONTEND_INGEST_FOR_CSP')
 
 # Media files configuration
 MEDIA_URL = env.str('MEDIA_URL', default='/media/')
 MEDIA_ROOT = env.str('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'uploads'))
 MAX_MEDIA_UPLOAD_BYTES = 100 * 1024 * 1024
+# Downloaded S3 objects are kept in an LRU cache on the data volume so
+# validation, processing, and transcription of one upload fetch it once.
+MEDIA_DOWNLOAD_CACHE_DIR = env.str(
+    'MEDIA_DOWNLOAD_CACHE_DIR',
+    default=os.path.join(os.path.dirname(os.path.abspath(MEDIA_ROOT)), 'media-cache'),
+)
+MEDIA_DOWNLOAD_CACHE_MAX_BYTES = env.int('MEDIA_DOWNLOAD_CACHE_MAX_BYTES', default=1024**3)
+# Direct uploads to the post create endpoint are streamed into an S3
+# multipart upload instead of being spooled to a temp file and re-stored.
+# Off with local file storage, where media is saved to disk instead.
+STREAM_UPLOADS_TO_S3 = env.bool(
+    'STREAM_UPLOADS_TO_S3',
+    default=bool(AWS_STORAGE_BUCKET_NAME) and not USE_LOCAL_FILE_STORAGE,
+)
+FILE_UPLOAD_HANDLERS = [
+    'apps.uploads.handlers.S3MultipartUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
 
 # Storage backend configuration
 STORAGES = {
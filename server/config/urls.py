@@ -23,7 +23,14 @@ from apps.blogs.views import (
     post_detail,
     stream_post_media,
 )
-from apps.uploads.views import get_presigned_url
+from apps.uploads.views import (
+    abort_multipart_upload_view,
+    complete_multipart_upload_view,
+    get_presigned_url,
+    initiate_multipart_upload,
+    list_multipart_upload_parts,
+    sign_multipart_upload_parts,
+)
 from apps.users.views import avatar
 from apps.website.views import index
 from django.conf import settings
@@ -49,6 +56,27 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),
     #
     path('api/uploads/presign/', get_presigned_url, name='get_presigned_url'),
+    path('api/uploads/multipart/', initiate_multipart_upload, name='multipart-upload-initiate'),
+    path(
+        'api/uploads/multipart/parts/',
+        sign_multipart_upload_parts,
+        name='multipart-upload-sign-parts',
+    ),
+    path(
+        'api/uploads/multipart/list/',
+        list_multipart_upload_parts,
+        name='multipart-upload-list-parts',
+    ),
+    path(
+        'api/uploads/multipart/complete/',
+        complete_multipart_upload_view,
+        name='multipart-upload-complete',
+    ),
+    path(
+        'api/uploads/multipart/abort/',
+        abort_multipart_upload_view,
+        name='multipart-upload-abort',
+    ),
     path('api/users/me/avatar/', avatar, name='user-avatar'),
     #
     path(